@@ -0,0 +1,95 @@
+"""Sohbet kaydetme/yükleme kıyaslaması.
+
+Geçici bir klasörde ChatStore ile sohbetler oluşturur ve arayüzün yaptığı gibi
+her turda yalnızca yeni mesajları ekler. Tur başına ekleme süresini, tek bir
+sohbeti yükleme süresini ve dizinin (kenar çubuğu) eşitlenip ilk sayfanın
+okunma süresini ölçer.
+
+Kullanım: python benchmarks/bench_chat_store.py [--chats 200] [--turns 50] [--json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lmRagStudio import CHAT_LIST_PAGE_SIZE, ChatStore
+
+ANSWER = ("Bu bir **örnek** yanıttır. `kod` ve tablo içerir.\n\n| a | b |\n|---|---|\n| 1 | 2 |\n" * 8)
+
+
+def write_chat(store, chat_id, turns):
+    """Sohbeti tur tur yazar; her tur için ekleme süresini (sn) döner."""
+    timings = []
+    for turn in range(turns):
+        now = time.time()
+        records = []
+        if turn == 0:
+            records.append({"type": "meta", "id": chat_id, "title": f"Sohbet {chat_id}", "ts": now})
+        records.append({"type": "message", "role": "user", "content": f"Soru {turn}?", "ts": now})
+        records.append({"type": "message", "role": "assistant", "content": ANSWER, "ts": now})
+        started = time.perf_counter()
+        store.append(chat_id, records)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run(chats=200, turns=50, repeat=5):
+    directory = tempfile.mkdtemp(prefix="lmrag-chats-")
+    try:
+        store = ChatStore(directory)
+        append_times = []
+        for index in range(chats):
+            append_times.extend(write_chat(store, f"chat-{index:05d}", turns))
+
+        load_times = []
+        for index in range(repeat):
+            started = time.perf_counter()
+            store.load(f"chat-{index:05d}")
+            load_times.append(time.perf_counter() - started)
+
+        # Kenar çubuğu başlangıcı: yeni açılan dizinle eşitleme ve ilk sayfa
+        store.index.conn.close()
+        started = time.perf_counter()
+        reopened = ChatStore(directory)
+        reopened.sync_index()
+        reopened.index.page(0, CHAT_LIST_PAGE_SIZE)
+        index_seconds = time.perf_counter() - started
+        reopened.index.conn.close()
+
+        return {"chat_store": {
+            "chats": chats,
+            "messages_per_chat": turns * 2,
+            "append_turn_ms": round(sum(append_times) / len(append_times) * 1000, 3),
+            "load_chat_ms": round(min(load_times) * 1000, 3),
+            "list_startup_ms": round(index_seconds * 1000, 3),
+        }}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    result = run(chats=args.chats, turns=args.turns)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    row = result["chat_store"]
+    print(f"{row['chats']} sohbet × {row['messages_per_chat']} mesaj")
+    print(f"  tur başına ekleme : {row['append_turn_ms']} ms")
+    print(f"  sohbet yükleme    : {row['load_chat_ms']} ms")
+    print(f"  liste başlangıcı  : {row['list_startup_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Uçtan uca ilk token süresi (time-to-first-token) kıyaslaması.
+
+Sahte LM Studio sunucusunu (mock_lmstudio.py) başlatır ve RagEngine.answer ile
+sorular sorar. Sunucuya ayarlanan gecikme bilindiği için ölçülen ilk token
+süresinden çıkarılarak uygulamanın kendi eklediği ek yük de raporlanır.
+Vektör deposu açılmaz; arama maliyeti bench_rag.py ile ayrıca ölçülür.
+
+Kullanım: python benchmarks/bench_e2e.py [--questions 20] [--latency 0.05] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_lmstudio import MockLMStudio
+from rag_engine import LMStudioClient, RagEngine
+
+
+def run(questions=20, latency=0.05, tokens_per_second=0, answer_tokens=300, history_messages=20):
+    with MockLMStudio(latency=latency, tokens_per_second=tokens_per_second,
+                      answer_tokens=answer_tokens) as server:
+        engine = RagEngine(LMStudioClient(server.url))
+        model = engine.client.list_models()[0]
+        history = [{"role": "user" if index % 2 == 0 else "assistant",
+                    "content": f"Önceki mesaj {index}: " + "bağlam " * 40}
+                   for index in range(history_messages)]
+
+        results = []
+        started = time.perf_counter()
+        for index in range(questions):
+            results.append(engine.answer(model, f"Soru {index}: bu ayar ne işe yarar?", history=history))
+        wall = time.perf_counter() - started
+
+    first_tokens = sorted(result["first_token_ms"] for result in results)
+    latencies = sorted(result["latency_ms"] for result in results)
+    median = lambda values: values[len(values) // 2]
+    return {"e2e": {
+        "questions": questions,
+        "server_latency_ms": latency * 1000,
+        "answer_tokens": answer_tokens,
+        "ttft_median_ms": median(first_tokens),
+        "ttft_overhead_ms": round(median(first_tokens) - latency * 1000, 2),
+        "total_median_ms": median(latencies),
+        "questions_per_sec": round(questions / wall, 2),
+    }}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Sunucunun ilk token gecikmesi (sn)")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="0 = sınırsız")
+    parser.add_argument("--answer-tokens", type=int, default=300)
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    result = run(questions=args.questions, latency=args.latency,
+                 tokens_per_second=args.tokens_per_second, answer_tokens=args.answer_tokens)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    row = result["e2e"]
+    print(f"{row['questions']} soru, sunucu gecikmesi {row['server_latency_ms']} ms, {row['answer_tokens']} token")
+    print(f"  ilk token (medyan) : {row['ttft_median_ms']} ms (ek yük {row['ttft_overhead_ms']} ms)")
+    print(f"  toplam (medyan)    : {row['total_median_ms']} ms")
+    print(f"  soru/sn            : {row['questions_per_sec']}")
+
+
+if __name__ == "__main__":
+    main()
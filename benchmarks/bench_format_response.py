@@ -0,0 +1,100 @@
+"""format_response mikro kıyaslaması.
+
+Büyük tablolar ve çok sayıda kod bloğu içeren yanıtları farklı boyutlarda
+üretir, önbelleksiz render süresini ölçer ve KB başına maliyetin sabit
+kaldığını (doğrusal ölçeklenme) gösterir. Aynı ölçüm kapanmayan '*', '_',
+'`' ve '[' işaretleriyle dolu tek satırlık yanıtlar için de yapılır; eski
+düzenli ifade bu girdide karesel geri izleme yapıyordu.
+
+Kullanım: python benchmarks/bench_format_response.py [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdown_render import MarkdownRenderer
+
+
+def build_answer(scale):
+    """scale ile doğrusal büyüyen, tablo/kod/liste karışık bir yanıt üretir."""
+    parts = []
+    for section in range(scale):
+        parts.append(f"## Bölüm {section}\n\nBu bölüm **kalın**, *italik* ve `satır içi kod` içerir.\n")
+        parts.append("| Kod | Açıklama | Değer |\n|---|:---:|---:|")
+        parts.extend(f"| ERR-{section}-{row} | Satır {row} açıklaması | {row * 3} |" for row in range(50))
+        parts.append("")
+        for block in range(10):
+            parts.append(f"```python\ndef f_{section}_{block}(x):\n    return x < {block} and x > 0\n```\n")
+        parts.extend(f"- madde {item} [bağlantı](https://example.com/{item})" for item in range(20))
+        parts.append("")
+    return "\n".join(parts)
+
+
+def build_unmatched(scale):
+    """scale ile doğrusal büyüyen, kapanmayan biçim işaretleriyle dolu tek satır."""
+    return "*a _b `c [d " * (1000 * scale)
+
+
+def time_render(renderer, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        renderer.render(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(scales=(1, 2, 4, 8, 16), repeat=5):
+    """Her boyut için en iyi süreyi ölçer; sonuçları sözlük olarak döner."""
+    return {name: measure(builder, scales, repeat) for name, builder in CASES.items()}
+
+
+def measure(build, scales, repeat):
+    uncached = MarkdownRenderer(cache_size=0)
+    cached = MarkdownRenderer()
+    rows = []
+    for scale in scales:
+        text = build(scale)
+        size_kb = len(text.encode("utf-8")) / 1024
+        seconds = time_render(uncached, text, repeat)
+        cached.render(text)
+        cached_seconds = time_render(cached, text, repeat)
+        rows.append({
+            "scale": scale,
+            "size_kb": round(size_kb, 1),
+            "render_ms": round(seconds * 1000, 3),
+            "us_per_kb": round(seconds * 1e6 / size_kb, 2),
+            "cached_ms": round(cached_seconds * 1000, 4),
+        })
+    # Doğrusal ölçeklenmede KB başına maliyet boyuttan bağımsız kalır
+    per_kb = [row["us_per_kb"] for row in rows]
+    return {"rows": rows, "per_kb_ratio": round(max(per_kb) / min(per_kb), 2)}
+
+
+CASES = {"format_response": build_answer, "unmatched_markers": build_unmatched}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    result = run(repeat=args.repeat)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    for name, case in result.items():
+        print(f"{name}\n{'boyut (KB)':>12} {'render (ms)':>12} {'µs/KB':>10} {'önbellek (ms)':>14}")
+        for row in case["rows"]:
+            print(f"{row['size_kb']:>12} {row['render_ms']:>12} {row['us_per_kb']:>10} {row['cached_ms']:>14}")
+        print(f"KB başına maliyet oranı (en kötü / en iyi): {case['per_kb_ratio']}\n")
+
+
+if __name__ == "__main__":
+    main()
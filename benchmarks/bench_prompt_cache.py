@@ -0,0 +1,160 @@
+"""Çok turlu sohbette istem düzeninin ilk token süresine etkisi.
+
+Aynı sohbeti iki istem düzeniyle oynatır ve her turda ilk token süresini
+ölçer:
+
+- ``stable``: ContextBuilder'ın sabit düzeni (sistem istemi, kesim
+  noktasında kullanıcı/asistan çifti olarak özet, kısaltılmış RAG
+  bağlamıyla yeniden gönderilen ve adım adım kesilen geçmiş, sonda RAG
+  bağlamı ve soru).
+- ``sliding``: önceki düzen; geçmiş her turda bir mesaj kayar ve taşan
+  mesajların özeti her turda yeniden hesaplanır.
+
+Varsayılan olarak önek önbelleğini taklit eden sahte sunucu kullanılır ve
+yeniden kullanılan istem oranı da raporlanır. --url ile gerçek bir LM Studio
+sunucusuna karşı ölçülür; iki düzen farklı metinlerle başladığı için biri
+diğerinin önbelleğinden yararlanamaz.
+
+Kullanım: python benchmarks/bench_prompt_cache.py [--turns 16] [--url http://localhost:1234 --model ad] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_lmstudio import MockLMStudio
+from rag_engine import (CONTEXT_MESSAGE_OVERHEAD, ContextBuilder, LMStudioClient, RagEngine,
+                        estimate_tokens)
+
+
+class SlidingContextBuilder(ContextBuilder):
+    """Karşılaştırma için önceki düzen: sistem istemi yok, pencere her turda kayar."""
+
+    def build(self, messages, rag_context=""):
+        last = messages[-1]
+        content = last["content"]
+        if rag_context:
+            content = f"İlgili bilgiler:\n{rag_context}\n\nSoru: {content}"
+        question = {"role": last["role"], "content": content}
+        used = self.message_tokens(question)
+
+        older = messages[:-1]
+        cut = len(older)
+        recent = []
+        while cut > 0 and len(recent) < self.recent_messages:
+            message = older[cut - 1]
+            cost = self.message_tokens(message)
+            if used + cost > self.budget:
+                break
+            recent.append({"role": message["role"], "content": message["content"]})
+            used += cost
+            cut -= 1
+        recent.reverse()
+
+        summary_lines = []
+        summary_used = estimate_tokens(self.SUMMARY_HEADER) + CONTEXT_MESSAGE_OVERHEAD
+        for message in reversed(older[:cut]):
+            line = self.summary_line(message)
+            cost = estimate_tokens(line) + 1
+            if used + summary_used + cost > self.budget:
+                break
+            summary_lines.append(line)
+            summary_used += cost
+
+        result = []
+        if summary_lines:
+            summary_lines.reverse()
+            result.append({"role": "system",
+                           "content": self.SUMMARY_HEADER + "\n" + "\n".join(summary_lines)})
+            used += summary_used
+        result.extend(recent)
+        result.append(question)
+        return result, used, len(summary_lines), cut - len(summary_lines)
+
+
+LAYOUTS = {"stable": ContextBuilder, "sliding": SlidingContextBuilder}
+
+
+def play_chat(engine, model, builder, turns, label):
+    """Sohbeti tur tur oynatır; her turun ilk token süresini (ms) döner."""
+    history = []
+    first_tokens = []
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"[{label}] Soru {turn}: bu ayar ne işe yarar? " + "ayrıntı " * 30})
+        rag_context = "\n\n".join(f"Belge {turn}.{index}: " + "bağlam cümlesi " * 40 for index in range(3))
+        messages, _, _, _ = builder.build(history, rag_context)
+        # Arayüz gibi gönderilen bağlam mesajla saklanır (eski düzen bunu kullanmaz)
+        history[-1] = {**history[-1], "context": rag_context}
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+        for content in engine.stream_completion(model, messages):
+            if first_token is None:
+                first_token = time.perf_counter()
+            parts.append(content)
+        first_tokens.append((first_token - started) * 1000 if first_token else None)
+        history.append({"role": "assistant", "content": "".join(parts)})
+    return first_tokens
+
+
+def run(turns=16, budget=4096, latency=0.01, prefill_per_char=5e-5, answer_tokens=120,
+        url=None, model=None):
+    median = lambda values: sorted(values)[len(values) // 2]
+    results = {}
+    server = None
+    if url is None:
+        server = MockLMStudio(latency=latency, prefill_per_char=prefill_per_char,
+                              answer_tokens=answer_tokens, prefix_cache=True).start()
+        url = server.url
+    try:
+        engine = RagEngine(LMStudioClient(url))
+        model = model or engine.client.list_models()[0]
+        for name, builder_class in LAYOUTS.items():
+            if server is not None:
+                server.prompt_chars = server.reused_chars = 0
+            # İlk turda önbellek boştur; medyan sonraki turlardan hesaplanır
+            first_tokens = play_chat(engine, model, builder_class(budget), turns, name)
+            row = {"turns": turns, "ttft_median_ms": round(median(first_tokens[1:]), 2),
+                   "ttft_last_ms": round(first_tokens[-1], 2)}
+            if server is not None and server.prompt_chars:
+                row["reused_prompt_percent"] = round(server.reused_chars / server.prompt_chars * 100, 1)
+            results[name] = row
+    finally:
+        if server is not None:
+            server.stop()
+    results["speedup"] = round(results["sliding"]["ttft_median_ms"] / results["stable"]["ttft_median_ms"], 2)
+    return {"prompt_cache": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=16)
+    parser.add_argument("--budget", type=int, default=4096, help="İstem token bütçesi")
+    parser.add_argument("--prefill-per-char", type=float, default=5e-5,
+                        help="Sahte sunucuda önbellekte olmayan istem karakteri başına bekleme (sn)")
+    parser.add_argument("--url", help="Gerçek LM Studio adresi (verilmezse sahte sunucu kullanılır)")
+    parser.add_argument("--model", help="Gerçek sunucuda kullanılacak model")
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    result = run(turns=args.turns, budget=args.budget, prefill_per_char=args.prefill_per_char,
+                 url=args.url, model=args.model)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    rows = result["prompt_cache"]
+    print(f"{'düzen':>8} {'ilk token medyan (ms)':>22} {'son tur (ms)':>13} {'yeniden kullanılan istem':>25}")
+    for name in LAYOUTS:
+        row = rows[name]
+        reused = f"%{row['reused_prompt_percent']}" if "reused_prompt_percent" in row else "-"
+        print(f"{name:>8} {row['ttft_median_ms']:>22} {row['ttft_last_ms']:>13} {reused:>25}")
+    print(f"\nSabit düzen {rows['speedup']}× daha hızlı ilk token")
+
+
+if __name__ == "__main__":
+    main()
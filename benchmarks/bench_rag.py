@@ -0,0 +1,205 @@
+"""RAG içe aktarma ve arama kıyaslaması.
+
+Geçici bir klasörde gerçek bir ChromaDB deposu açar, IngestThread ile
+sentetik belgeleri ekler (parça/sn) ve her koleksiyon boyutunda önbelleksiz
+karma arama gecikmesini (ortalama ve p95) ile vektör ve BM25 aramasının
+ayrı ortalamalarını ölçer. Gömme modeli ilk kullanımda indirilebileceği için
+ısınma sorgusu ölçüme dahil edilmez.
+
+BM25 dizini ayrıca gömme olmadan, --keyword-sizes boyutlarında tek başına
+ölçülür (ör. --keyword-sizes 1000000); nadir kod aramalarının gecikmesi
+koleksiyon büyüdükçe sabit kalmalıdır.
+
+--embedding-model ile yerel gömme modeli kullanılır; bu durumda koleksiyon
+sıfırlanıp aynı metinler yeniden eklenerek gömme önbelleğinin etkisi de ölçülür.
+
+Kullanım: python benchmarks/bench_rag.py [--sizes 200 1000 5000] [--keyword-sizes 10000 100000]
+                                       [--embedding-model yol] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lmRagStudio import IngestThread
+from rag_engine import BM25Index, LocalEmbeddingFunction, RagEngine, RagQueryCache
+
+TOPICS = ("veritabanı", "ağ", "bellek", "derleyici", "önbellek", "iş parçacığı", "disk", "arayüz")
+
+
+def build_text(chunks, chunk_size, seed=0):
+    """Yaklaşık chunks parça verecek uzunlukta, konulara bölünmüş metin üretir."""
+    rng = random.Random(seed)
+    sentences = []
+    length = 0
+    while length < chunks * chunk_size:
+        topic = rng.choice(TOPICS)
+        sentence = f"{topic.capitalize()} ayarı {rng.randint(1, 999)} için {rng.choice(TOPICS)} değeri {rng.random():.3f} olarak ölçüldü. "
+        sentences.append(sentence)
+        length += len(sentence)
+    return "".join(sentences)
+
+
+def ingest(engine, text, chunk_size):
+    """IngestThread'i bu iş parçacığında çalıştırır; eklenen parça sayısını döner."""
+    thread = IngestThread(engine, text, chunk_size=chunk_size, overlap=chunk_size // 5)
+    result = {}
+    thread.ingest_finished.connect(lambda added, cancelled: result.update(added=added))
+    thread.error_occurred.connect(lambda error: result.update(error=error))
+    thread.run()
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result.get("added", 0)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def mean(values):
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def run_keyword(sizes, queries, data_dir, batch_size=5000):
+    """BM25 dizinini sentetik parçalarla büyütür; ekleme hızı ve kod arama gecikmesini ölçer."""
+    index = BM25Index(os.path.join(data_dir, "bm25-only.sqlite3"))
+    rows = []
+    total = 0
+    for step, size in enumerate(sizes):
+        rng = random.Random(step)
+        started = time.perf_counter()
+        for start in range(total, size, batch_size):
+            end = min(size, start + batch_size)
+            index.add([f"chunk-{number}" for number in range(start, end)],
+                      [f"{rng.choice(TOPICS)} ayarı {rng.randint(1, 999)} için {rng.choice(TOPICS)} "
+                       f"değeri ölçüldü, kayıt KOD-{number}" for number in range(start, end)])
+        seconds = time.perf_counter() - started
+        added = max(size - total, 0)
+        total = index.count()
+
+        latencies = []
+        for _ in range(queries):
+            query = f"KOD-{rng.randrange(total)} hatası {rng.choice(TOPICS)}"
+            started = time.perf_counter()
+            index.search(query, 12)
+            latencies.append((time.perf_counter() - started) * 1000)
+        rows.append({
+            "index_size": total,
+            "index_chunks_per_sec": round(added / seconds, 1) if seconds else None,
+            "keyword_mean_ms": round(sum(latencies) / len(latencies), 3),
+            "keyword_p95_ms": round(percentile(latencies, 0.95), 3),
+        })
+    index.conn.close()
+    return rows
+
+
+def run(sizes=(200, 1000, 5000), queries=30, chunk_size=500, embedding_model=None,
+        keyword_sizes=(10000, 100000)):
+    """Koleksiyonu sizes boyutlarına kadar büyütür; her adımda ekleme ve aramayı ölçer."""
+    data_dir = tempfile.mkdtemp(prefix="lmrag-bench-")
+    try:
+        embedding_function = None
+        if embedding_model:
+            embedding_function = LocalEmbeddingFunction(
+                embedding_model, cache_dir=os.path.join(data_dir, "embedding_cache"))
+        # Önbellek boyutu 0: her sorgu gerçekten depoya gider
+        engine = RagEngine(None, data_dir, cache=RagQueryCache(max_size=0),
+                           embedding_function=embedding_function)
+        engine.open_store()
+        engine.search_documents("ısınma")
+
+        result = {}
+        if keyword_sizes:
+            result["keyword"] = run_keyword(keyword_sizes, queries, data_dir)
+
+        rows = []
+        texts = []
+        total = 0
+        for step, size in enumerate(sizes):
+            text = build_text(max(size - total, 0), chunk_size, seed=step)
+            texts.append(text)
+            started = time.perf_counter()
+            added = ingest(engine, text, chunk_size)
+            ingest_seconds = time.perf_counter() - started
+            total = engine.collection.count()
+
+            rng = random.Random(step)
+            latencies = []
+            vector_times, keyword_times = [], []
+            for index in range(queries):
+                query = f"{rng.choice(TOPICS)} ayarı {rng.randint(1, 999)} değeri nedir {index}"
+                started = time.perf_counter()
+                _, timings = engine.search_documents_timed(query)
+                latencies.append((time.perf_counter() - started) * 1000)
+                vector_times.append(timings.get("vector_ms", 0))
+                keyword_times.append(timings.get("keyword_ms", 0))
+            rows.append({
+                "collection_size": total,
+                "ingested_chunks": added,
+                "ingest_chunks_per_sec": round(added / ingest_seconds, 1) if ingest_seconds else None,
+                "search_mean_ms": round(sum(latencies) / len(latencies), 2),
+                "search_p95_ms": round(percentile(latencies, 0.95), 2),
+                "vector_mean_ms": mean(vector_times),
+                "keyword_mean_ms": mean(keyword_times),
+            })
+        result["rag"] = rows
+        if embedding_function is not None:
+            # Değişmeyen metin yeniden eklenirken hiçbir vektör yeniden hesaplanmamalı
+            engine.reset_store()
+            computed = embedding_function.computed
+            started = time.perf_counter()
+            added = sum(ingest(engine, text, chunk_size) for text in texts)
+            seconds = time.perf_counter() - started
+            result["reingest"] = {
+                "chunks": added,
+                "chunks_per_sec": round(added / seconds, 1) if seconds else None,
+                "recomputed": embedding_function.computed - computed,
+            }
+        return result
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--keyword-sizes", type=int, nargs="*", default=[10000, 100000],
+                        help="Yalnız BM25 dizini için boyutlar (boş = atla)")
+    parser.add_argument("--embedding-model", help="Yerel gömme modeli klasörü")
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    result = run(sizes=args.sizes, queries=args.queries, embedding_model=args.embedding_model,
+                 keyword_sizes=args.keyword_sizes)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    if "keyword" in result:
+        print(f"{'BM25 dizini':>12} {'parça/sn':>10} {'kod ort (ms)':>13} {'kod p95 (ms)':>13}")
+        for row in result["keyword"]:
+            print(f"{row['index_size']:>12} {row['index_chunks_per_sec']:>10} "
+                  f"{row['keyword_mean_ms']:>13} {row['keyword_p95_ms']:>13}")
+        print()
+    print(f"{'koleksiyon':>12} {'eklenen':>8} {'parça/sn':>10} {'arama ort (ms)':>15} {'arama p95 (ms)':>15} "
+          f"{'vektör (ms)':>12} {'BM25 (ms)':>10}")
+    for row in result["rag"]:
+        print(f"{row['collection_size']:>12} {row['ingested_chunks']:>8} {row['ingest_chunks_per_sec']:>10} "
+              f"{row['search_mean_ms']:>15} {row['search_p95_ms']:>15} "
+              f"{row['vector_mean_ms']:>12} {row['keyword_mean_ms']:>10}")
+    if "reingest" in result:
+        row = result["reingest"]
+        print(f"\nYeniden ekleme: {row['chunks']} parça · {row['chunks_per_sec']} parça/sn · "
+              f"{row['recomputed']} vektör yeniden hesaplandı")
+
+
+if __name__ == "__main__":
+    main()
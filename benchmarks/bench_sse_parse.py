@@ -0,0 +1,197 @@
+"""SSE akış ayrıştırma mikro kıyaslaması.
+
+Eski yol (iter_lines + str çözme + json.loads + full_response +=) ile bayt
+düzeyindeki SSEParser/iter_sse_content yolunu aynı akış üzerinde karşılaştırır
+ve token başına CPU maliyetini raporlar. orjson kuruluysa hem stdlib yolu
+(yalnızca içerik dizgisini çözen tarama) hem orjson ile tam çözme ölçülür.
+Tek ölçümler gürültülüdür; --runs kez ölçülüp medyan raporlanır.
+
+Akış, LM Studio biçiminde sentetik olarak üretilir ya da --record ile
+kaydedilmiş ham bir akış dosyası kullanılır, örneğin:
+
+    curl -N http://localhost:1234/v1/chat/completions -H "Content-Type: application/json" \\
+         -d '{"model": "...", "stream": true, "messages": [...]}' > stream.txt
+
+Kullanım: python benchmarks/bench_sse_parse.py [--record stream.txt] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rag_engine
+from rag_engine import SSEParser, iter_sse_content
+
+WORDS = ("model", " yanıt", " üretir", " ve", " bağlam", " içinde", " arama", " yapar", ".",
+         "\n\n", " `kod`", " **kalın**", " tablo", " |", " satır", " değer", " 42", " çğüşöı")
+
+
+def build_stream(tokens, seed=0):
+    """LM Studio'nun gönderdiğine benzer bir SSE akışı (bytes) üretir."""
+    rng = random.Random(seed)
+    events = []
+    for index in range(tokens):
+        event = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "bench-model",
+            "system_fingerprint": "bench-model",
+            "choices": [{"index": 0, "delta": {"content": rng.choice(WORDS)},
+                         "logprobs": None, "finish_reason": None}],
+        }
+        events.append(b"data: " + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n\n")
+        # Ara sıra içeriksiz olaylar da gelir
+        if index % 100 == 0:
+            events.append(b": keep-alive\n\n")
+    events.append(b"data: [DONE]\n\n")
+    return b"".join(events)
+
+
+def split_network(data, seed=0, low=64, high=1500):
+    """Akışı ağdan gelir gibi rastgele boyutlu tamponlara böler."""
+    rng = random.Random(seed)
+    chunks = []
+    position = 0
+    while position < len(data):
+        size = rng.randint(low, high)
+        chunks.append(data[position:position + size])
+        position += size
+    return chunks
+
+
+class _ChunkedRaw:
+    """requests.Response.raw yerine geçer; read() tamponları sırayla verir."""
+
+    def __init__(self, chunks):
+        self.data = b"".join(chunks)
+        self.position = 0
+
+    def read(self, amount):
+        chunk = self.data[self.position:self.position + amount]
+        self.position += len(chunk)
+        return chunk
+
+
+def legacy_parse(chunks):
+    """Önceki ChatThread döngüsünün birebir kopyası (iter_lines tabanlı)."""
+    response = requests.Response()
+    response.raw = _ChunkedRaw(chunks)
+    full_response = ""
+    tokens = 0
+    for line in response.iter_lines():
+        if line:
+            line = line.decode('utf-8')
+            if line.startswith('data: '):
+                line = line[6:]
+                if line.strip() == '[DONE]':
+                    break
+                try:
+                    chunk_data = json.loads(line)
+                    if 'choices' in chunk_data and len(chunk_data['choices']) > 0:
+                        delta = chunk_data['choices'][0].get('delta', {})
+                        content = delta.get('content', '')
+                        if content:
+                            full_response += content
+                            tokens += 1
+                except json.JSONDecodeError:
+                    continue
+    return full_response, tokens
+
+
+def parser_parse(chunks):
+    parts = list(iter_sse_content(chunks, SSEParser()))
+    return "".join(parts), len(parts)
+
+
+def with_extractor(extract, func):
+    """iter_sse_content'in olaylardan içerik çıkaran işlevini geçici olarak değiştirir."""
+    def wrapped(chunks):
+        previous = rag_engine.extract_sse_content
+        rag_engine.extract_sse_content = extract
+        try:
+            return func(chunks)
+        finally:
+            rag_engine.extract_sse_content = previous
+    return wrapped
+
+
+def time_parse(func, chunks, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = func(chunks)
+        best = min(best, time.process_time() - started)
+    return best, result
+
+
+def run(sizes=(1000, 10000, 50000), repeat=5, record=None, runs=5):
+    """Her akış boyutu için yöntemleri ölçer; sonuçları sözlük olarak döner.
+
+    Her yöntem runs kez, her seferinde repeat denemenin en iyisiyle ölçülür;
+    token başına süre bu ölçümlerin medyanıdır.
+    """
+    median = lambda values: sorted(values)[len(values) // 2]
+    methods = [("legacy_iter_lines", legacy_parse),
+               ("sse_parser_scan", with_extractor(rag_engine._content_scan, parser_parse))]
+    if rag_engine.HAVE_ORJSON:
+        methods.append(("sse_parser_orjson", with_extractor(rag_engine._content_json, parser_parse)))
+
+    if record:
+        with open(record, "rb") as f:
+            streams = [(os.path.basename(record), f.read())]
+    else:
+        streams = [(str(size), build_stream(size)) for size in sizes]
+
+    rows = []
+    for name, data in streams:
+        chunks = split_network(data)
+        expected = None
+        row = {"stream": name, "bytes": len(data), "chunks": len(chunks)}
+        timings = {method: [] for method, _ in methods}
+        # Yöntemler her turda sırayla ölçülür; makinedeki dalgalanma hepsine dağılır
+        for _ in range(runs):
+            for method, func in methods:
+                seconds, (text, tokens) = time_parse(func, chunks, repeat)
+                if expected is None:
+                    expected = text
+                    row["tokens"] = tokens
+                elif text != expected:
+                    raise AssertionError(f"{method} farklı bir yanıt üretti")
+                timings[method].append(seconds * 1e6 / max(tokens, 1))
+        for method, values in timings.items():
+            row[f"{method}_us_per_token"] = round(median(values), 3)
+        rows.append(row)
+    return {"sse_parse": rows, "orjson": rag_engine.HAVE_ORJSON}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--record", help="Kaydedilmiş ham SSE akışı dosyası")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=5, help="Medyanı alınacak ölçüm sayısı")
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    result = run(repeat=args.repeat, record=args.record, runs=args.runs)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    methods = [key[:-len("_us_per_token")] for key in result["sse_parse"][0] if key.endswith("_us_per_token")]
+    print(f"{'akış':>10} {'token':>8} " + " ".join(f"{method:>20}" for method in methods))
+    for row in result["sse_parse"]:
+        print(f"{row['stream']:>10} {row['tokens']:>8} "
+              + " ".join(f"{row[method + '_us_per_token']:>20}" for method in methods))
+    print(f"\n(token başına CPU süresi, µs; {args.runs} ölçümün medyanı)")
+
+
+if __name__ == "__main__":
+    main()
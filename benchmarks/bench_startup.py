@@ -0,0 +1,143 @@
+"""Başlangıç süresi kıyaslaması.
+
+İki şeyi ölçer:
+
+* ``python -X importtime -c "import lmRagStudio"`` çıktısından modülün toplam
+  içe aktarma süresi ve en pahalı üst düzey içe aktarmalar,
+* ayrı bir süreçte pencerenin ilk boyanmasına (time-to-first-paint) ve
+  vektör deposunun hazır olmasına kadar geçen süre.
+
+Pencere ölçümü ekran gerektirmesin diye Qt ``offscreen`` platformuyla çalışır.
+Kullanıcının ayarlarına, sohbetlerine ve RAG verilerine dokunulmaz: pencere
+boş, geçici bir klasörde açılır ve model listesini sahte LM Studio
+sunucusundan alır.
+
+Kullanım: python benchmarks/bench_startup.py [--repeat 3] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_lmstudio import MockLMStudio
+
+# Ayrı süreçte çalışır; zamanları süreç başlangıcına göre ms olarak JSON yazar
+PAINT_PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+import lmRagStudio
+imported = time.perf_counter()
+
+app = QApplication(sys.argv[:1])
+window = lmRagStudio.LMStudioRAGChat(sys.argv[2])
+constructed = time.perf_counter()
+marks = {}
+
+class PaintProbe(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "first_paint" not in marks:
+            marks["first_paint"] = time.perf_counter()
+        return False
+
+probe = PaintProbe()
+window.installEventFilter(probe)
+window.show()
+
+def poll():
+    if window.collection is not None and "store_ready" not in marks:
+        marks["store_ready"] = time.perf_counter()
+    if "first_paint" in marks and ("store_ready" in marks or time.perf_counter() - started > 60):
+        window.close()
+        app.quit()
+
+timer = QTimer()
+timer.timeout.connect(poll)
+timer.start(5)
+app.exec()
+ms = lambda t: round((t - started) * 1000, 1) if t is not None else None
+print(json.dumps({"import_ms": ms(imported), "window_ms": ms(constructed),
+                  "first_paint_ms": ms(marks.get("first_paint")),
+                  "store_ready_ms": ms(marks.get("store_ready"))}))
+"""
+
+
+def parse_importtime(stderr, top=10):
+    """-X importtime çıktısını (self, kümülatif, modül) satırlarına ayırır."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name[1:].rstrip()))
+    total = next((cumulative for _, cumulative, name in rows if name == "lmRagStudio"), None)
+    # Yalnızca lmRagStudio'nun doğrudan içe aktardıkları (bir seviye girinti) listelenir
+    direct = [row for row in rows if len(row[2]) - len(row[2].lstrip()) == 2]
+    direct.sort(key=lambda row: row[1], reverse=True)
+    return total, [{"module": name.strip(), "cumulative_ms": round(cumulative / 1000, 1)}
+                   for _, cumulative, name in direct[:top]]
+
+
+def measure_import():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import lmRagStudio"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, heaviest = parse_importtime(result.stderr)
+    return {"import_ms": round(total / 1000, 1) if total is not None else None, "heaviest": heaviest}
+
+
+def measure_first_paint(url):
+    """Pencereyi her seferinde yeni, boş bir klasörde açar."""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    with tempfile.TemporaryDirectory(prefix="lmrag-startup-") as base_dir:
+        with open(os.path.join(base_dir, "settings.json"), "w", encoding="utf-8") as f:
+            json.dump({"lm_studio_url": url}, f)
+        result = subprocess.run([sys.executable, "-c", PAINT_PROBE, ROOT, base_dir],
+                                cwd=ROOT, capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat=3):
+    """Her ölçümü repeat kez tekrarlar, en iyi değerleri döner."""
+    imports = [measure_import() for _ in range(repeat)]
+    with MockLMStudio() as server:
+        paints = [measure_first_paint(server.url) for _ in range(repeat)]
+    best_import = min(imports, key=lambda row: row["import_ms"] or float("inf"))
+    startup = {key: min((row[key] for row in paints if row[key] is not None), default=None)
+               for key in ("import_ms", "window_ms", "first_paint_ms", "store_ready_ms")}
+    return {"importtime": best_import, "startup": startup}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    result = run(repeat=args.repeat)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    print(f"lmRagStudio içe aktarma: {result['importtime']['import_ms']} ms")
+    print("En pahalı içe aktarmalar:")
+    for row in result["importtime"]["heaviest"]:
+        print(f"  {row['cumulative_ms']:>10} ms  {row['module']}")
+    print()
+    for key, label in (("import_ms", "içe aktarma bitti"), ("window_ms", "pencere oluşturuldu"),
+                       ("first_paint_ms", "ilk boyama"), ("store_ready_ms", "vektör deposu hazır")):
+        print(f"{label:>22}: {result['startup'][key]} ms")
+
+
+if __name__ == "__main__":
+    main()
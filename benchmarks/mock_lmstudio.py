@@ -0,0 +1,176 @@
+"""Kıyaslamalar için yerel, sahte bir LM Studio sunucusu.
+
+``/v1/models`` ve akışlı ``/v1/chat/completions`` uç noktalarını taklit eder.
+İlk bayttan önceki gecikme, saniyedeki token hızı ve yanıt uzunluğu
+ayarlanabilir; yanıtlar tohum değerle üretildiği için her çalıştırmada aynıdır.
+Bağlantılar keep-alive'dır (chunked aktarım), böylece istemci havuzu da ölçülür.
+
+prefix_cache açıkken llama.cpp'nin tek yuvalı KV önbelleği taklit edilir:
+istem bir önceki istemle ortak başlangıcından sonraki kısmı kadar bekletilir.
+
+Koddan kullanım:
+
+    with MockLMStudio(tokens_per_second=200, latency=0.05, answer_tokens=300) as server:
+        client = LMStudioClient(server.url)
+
+Tek başına: python benchmarks/mock_lmstudio.py --port 1234 --tokens-per-second 50
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("model", " yanıt", " üretir", " ve", " bağlam", " içinde", " arama", " yapar", ".",
+         "\n\n", " `kod`", " **kalın**", " tablo", " satır", " değer", " 42")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Küçük SSE parçaları Nagle + gecikmeli ACK yüzünden ~40 ms bekletilmesin
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/v1/models":
+            self.send_json(404, {"error": "not found"})
+            return
+        self.send_json(200, {"object": "list", "data": [
+            {"id": model, "object": "model", "owned_by": "mock"} for model in self.server.models]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_json(404, {"error": "not found"})
+            return
+        self.server.requests += 1
+        config = self.server
+        # İstem ne kadar uzunsa model o kadar geç başlar (prefill); sohbet
+        # şablonu gibi her mesaj rol etiketiyle art arda eklenir
+        prompt = "".join(f"<|{message.get('role')}|>\n{message.get('content', '')}\n"
+                         for message in payload.get("messages", []))
+        reused = 0
+        if config.prefix_cache:
+            with config.cache_lock:
+                reused = len(os.path.commonprefix([config.cached_prompt, prompt]))
+                config.cached_prompt = prompt
+                config.prompt_chars += len(prompt)
+                config.reused_chars += reused
+        time.sleep(config.latency + (len(prompt) - reused) * config.prefill_per_char)
+
+        rng = random.Random(config.seed)
+        tokens = [rng.choice(WORDS) for _ in range(config.answer_tokens)]
+        if not payload.get("stream"):
+            self.send_json(200, {"choices": [{"index": 0, "message": {
+                "role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        interval = 1.0 / config.tokens_per_second if config.tokens_per_second else 0
+        started = time.perf_counter()
+        try:
+            for index, token in enumerate(tokens):
+                event = {"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                         "model": payload.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                self.write_chunk(b"data: " + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n\n")
+                # Sabit token hızı: birikmiş gecikme kadar beklenir
+                delay = started + (index + 1) * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.write_chunk(b"data: [DONE]\n\n")
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # İstemci akışı durdurdu
+            self.close_connection = True
+
+
+class MockLMStudio(ThreadingHTTPServer):
+    """Arka planda çalışan sahte LM Studio; with bloğuyla başlatılıp durdurulur."""
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, models=("mock-model",), tokens_per_second=0,
+                 latency=0.0, answer_tokens=200, prefill_per_char=0.0, seed=0, prefix_cache=False):
+        super().__init__((host, port), _Handler)
+        self.models = list(models)
+        self.tokens_per_second = tokens_per_second
+        self.latency = latency
+        self.answer_tokens = answer_tokens
+        self.prefill_per_char = prefill_per_char
+        self.seed = seed
+        self.prefix_cache = prefix_cache
+        self.cached_prompt = ""
+        self.cache_lock = threading.Lock()
+        self.prompt_chars = 0
+        self.reused_chars = 0
+        self.requests = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--model", action="append", help="Listelenecek model (birden çok verilebilir)")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="0 = sınırsız")
+    parser.add_argument("--latency", type=float, default=0.2, help="İlk token öncesi gecikme (sn)")
+    parser.add_argument("--answer-tokens", type=int, default=300)
+    parser.add_argument("--prefill-per-char", type=float, default=0.0, help="İstem karakteri başına bekleme (sn)")
+    parser.add_argument("--prefix-cache", action="store_true", help="Önek (KV) önbelleğini taklit et")
+    args = parser.parse_args()
+
+    server = MockLMStudio(args.host, args.port, models=args.model or ("mock-model",),
+                          tokens_per_second=args.tokens_per_second, latency=args.latency,
+                          answer_tokens=args.answer_tokens, prefill_per_char=args.prefill_per_char,
+                          prefix_cache=args.prefix_cache)
+    print(f"Sahte LM Studio {server.url} adresinde çalışıyor (Ctrl+C ile durdurun)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
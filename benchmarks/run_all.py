@@ -0,0 +1,137 @@
+"""Tüm kıyaslamaları çalıştırıp tek bir JSON raporu üretir.
+
+Sürümler arasında gerilemeleri yakalamak için rapor bir dosyaya yazılır ve
+sonraki çalıştırma --compare ile ona karşı kıyaslanır. Süre ölçen metriklerde
+(``_ms``, ``_us_per_token``, ``us_per_kb``) artış, hız ölçenlerde
+(``_per_sec``) azalış eşik yüzdesini aşarsa gerileme sayılır ve çıkış kodu 1 olur.
+
+Eksik bağımlılığı olan (ör. PyQt6 ya da chromadb kurulu olmayan) kıyaslamalar
+atlanır ve raporda "skipped" olarak işaretlenir.
+
+Kullanım:
+    python benchmarks/run_all.py --output sonuc.json
+    python benchmarks/run_all.py --quick --compare onceki.json --threshold 15
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+# (modül, tam ayarlar, --quick ayarları)
+SUITE = (
+    ("bench_sse_parse", {}, {"sizes": (1000, 10000), "repeat": 3}),
+    ("bench_format_response", {}, {"scales": (1, 4), "repeat": 3}),
+    ("bench_chat_store", {}, {"chats": 50, "turns": 20}),
+    ("bench_e2e", {}, {"questions": 5}),
+    ("bench_prompt_cache", {}, {"turns": 8}),
+    ("bench_rag", {}, {"sizes": (200, 1000), "queries": 10, "keyword_sizes": (10000,)}),
+    ("bench_startup", {}, {"repeat": 1}),
+)
+
+LOWER_IS_BETTER = ("_ms", "_us_per_token", "us_per_kb")
+HIGHER_IS_BETTER = ("_per_sec",)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(quick=False, only=None):
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name, full, fast in SUITE:
+        if only and name not in only:
+            continue
+        print(f"· {name} çalışıyor...", file=sys.stderr)
+        try:
+            module = importlib.import_module(name)
+            started = time.perf_counter()
+            result = module.run(**(fast if quick else full))
+            result["elapsed_s"] = round(time.perf_counter() - started, 2)
+        except ImportError as e:
+            result = {"skipped": f"bağımlılık eksik: {e.name}"}
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        report["benchmarks"][name] = result
+    return report
+
+
+def flatten(value, prefix=""):
+    """İç içe sonuçları 'bench.tablo[anahtar].metrik' yollu sayılara düzleştirir."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            # Satırları sıraya değil ilk alanlarına göre eşle (ör. boyut)
+            label = next(iter(item.values())) if isinstance(item, dict) and item else index
+            yield from flatten(item, f"{prefix}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def compare(baseline, current, threshold):
+    """Eşiği aşan değişiklikleri (metrik, önceki, şimdiki, % değişim) listesi olarak döner."""
+    before = dict(flatten(baseline.get("benchmarks", {})))
+    regressions = []
+    for path, value in flatten(current.get("benchmarks", {})):
+        metric = path.rsplit(".", 1)[-1]
+        previous = before.get(path)
+        if not previous or path.endswith("elapsed_s"):
+            continue
+        change = (value - previous) / previous * 100
+        if metric.endswith(LOWER_IS_BETTER) and change > threshold:
+            regressions.append((path, previous, value, change))
+        elif metric.endswith(HIGHER_IS_BETTER) and -change > threshold:
+            regressions.append((path, previous, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Raporun yazılacağı JSON dosyası (varsayılan: standart çıktı)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki rapor")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Gerileme eşiği (yüzde)")
+    parser.add_argument("--quick", action="store_true", help="Küçük boyutlarla hızlı çalıştır")
+    parser.add_argument("--only", nargs="+", help="Yalnızca bu kıyaslamaları çalıştır")
+    args = parser.parse_args()
+
+    report = run_suite(quick=args.quick, only=args.only)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for path, previous, value, change in regressions:
+            print(f"GERİLEME {path}: {previous} → {value} ({change:+.1f}%)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"{baseline.get('revision')} ile karşılaştırıldı: gerileme yok", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
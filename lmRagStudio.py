@@ -1,215 +1,1215 @@
 import sys
 import json
-import requests
 import os
 import re
+import time
+import html
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QTextEdit, QLineEdit, QPushButton, 
-                             QComboBox, QLabel, QTabWidget, QListWidget, 
-                             QSplitter, QMessageBox, QListWidgetItem)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize
-from PyQt6.QtGui import QTextCursor, QPalette, QColor, QFont, QIcon
-import chromadb
-from chromadb.config import Settings
+                             QComboBox, QLabel, QTabWidget, QMessageBox,
+                             QSpinBox, QDoubleSpinBox, QProgressBar, QFileDialog, QListView,
+                             QAbstractItemView, QStyledItemDelegate, QMenu,
+                             QToolButton, QInputDialog)
+from PyQt6.QtCore import (Qt, QThread, pyqtSignal, QTimer, QSize, QRect,
+                          QAbstractListModel, QModelIndex, QPersistentModelIndex)
+from PyQt6.QtGui import (QPalette, QColor, QFont, QPainter, QLinearGradient,
+                         QTextDocument, QTextCursor, QTextBlockFormat, QTextCharFormat,
+                         QAbstractTextDocumentLayout, QKeySequence, QShortcut, QAction)
 import uuid
+from markdown_render import TABLE_STYLE, TD_STYLE, TH_STYLE, MarkdownBlockSplitter, MarkdownRenderer
+from rag_engine import (CONTEXT_TOKEN_BUDGET, DEFAULT_KNOWLEDGE_BASE, LM_STUDIO_DEFAULT_URL, AppSettings,
+                        LMStudioClient, LMStudioError, LocalEmbeddingFunction, MetricsLog,
+                        RagEngine, RagQueryCache, app_base_dir)
 
-# Markdown desteği için deneyelim
-try:
-    import markdown
-    HAVE_MARKDOWN = True
-except ImportError:
-    HAVE_MARKDOWN = False
+# RAG içe aktarma ayarları (karakter cinsinden)
+RAG_CHUNK_SIZE = 1000
+RAG_CHUNK_OVERLAP = 200
+RAG_BATCH_SIZE = 64
+RAG_IMPORT_EXTENSIONS = (".txt", ".md", ".markdown", ".html", ".htm", ".pdf")
+
+# RAG listesi sayfalama ayarları
+RAG_LIST_PAGE_SIZE = 200
+RAG_PREVIEW_LENGTH = 100
+RAG_SOURCE_ROLE = Qt.ItemDataRole.UserRole + 1
+RAG_DOC_ID_ROLE = Qt.ItemDataRole.UserRole + 2
+
+# Akış sırasında parçalar en fazla bu aralıkla ekrana basılır (~30 fps)
+STREAM_FLUSH_INTERVAL_MS = 33
+
+# Sohbet listesi kenar çubuğunda sayfa sayfa yüklenir
+CHAT_LIST_PAGE_SIZE = 100
+
+# Model listesi arka planda bu aralıkla yenilenir (sunucu sağlık kontrolü)
+MODEL_POLL_INTERVAL_MS = 15000
+
+# Performans sekmesinde özetlenen ölçümler: alan -> (etiket, birim)
+STATS_LABELS = {
+    "retrieval_ms": ("RAG araması", "ms"),
+    "vector_ms": ("↳ Vektör araması", "ms"),
+    "keyword_ms": ("↳ Anahtar kelime (BM25)", "ms"),
+    "rerank_ms": ("↳ Eşik + MMR seçimi", "ms"),
+    "retrieved_chunks": ("Bağlama giren parça", "parça"),
+    "prompt_tokens": ("İstem boyutu", "token"),
+    "ttft_ms": ("İlk token", "ms"),
+    "tokens_per_sec": ("Üretim hızı", "token/sn"),
+    "generation_ms": ("Üretim süresi", "ms"),
+    "render_ms": ("Son render", "ms"),
+    "total_ms": ("Toplam", "ms"),
+}
+
+def max_chunk_overlap(chunk_size):
+    return max(0, (chunk_size - 1) // 2)
+
+def iter_chunks(text, chunk_size=RAG_CHUNK_SIZE, overlap=RAG_CHUNK_OVERLAP):
+    """Metni örtüşen parçalara böler, (offset, parça) çiftleri üretir.
+
+    Örtüşme parça boyutunun yarısından küçük olmalıdır; her adım en az
+    chunk_size // 4 karakter ilerler, parça sayısı metin uzunluğuyla doğrusal kalır.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Parça boyutu pozitif olmalı")
+    if not 0 <= overlap <= max_chunk_overlap(chunk_size):
+        raise ValueError(f"Örtüşme 0 ile {max_chunk_overlap(chunk_size)} arasında olmalı "
+                         f"(parça boyutu {chunk_size})")
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + chunk_size, length)
+        # Kelime/paragraf ortasından bölmemek için en yakın ayraca geri çekil
+        if end < length:
+            for sep in ("\n\n", "\n", ". ", " "):
+                # Geri çekilme sonraki parçanın başlangıcını örtüşmenin gerisine itmesin
+                cut = text.rfind(sep, start + max(chunk_size // 2, overlap + chunk_size // 4), end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            yield start, chunk
+        if end >= length:
+            break
+        start = end - overlap
+
+class _HTMLTextExtractor(HTMLParser):
+    """HTML içinden görünen metni toplar (script/style hariç)."""
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "table"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+    def text(self):
+        return re.sub(r'\n\s*\n+', '\n\n', "".join(self.parts)).strip()
+
+def read_document(path):
+    """Desteklenen bir dosyayı düz metne çevirir."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise RuntimeError("PDF desteği için 'pypdf' kurulu olmalı")
+        reader = PdfReader(path)
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+    
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    if ext in (".html", ".htm"):
+        parser = _HTMLTextExtractor()
+        parser.feed(text)
+        parser.close()
+        return parser.text()
+    return text
+
+def parse_and_chunk_file(path, chunk_size, overlap):
+    """Süreç havuzunda çalışır: dosyayı okuyup parçalara ayırır."""
+    try:
+        return path, list(iter_chunks(read_document(path), chunk_size, overlap)), ""
+    except Exception as e:
+        return path, [], str(e)
+
+def iter_document_paths(paths):
+    """Dosya ve klasörlerden desteklenen dosya yollarını tembel olarak üretir."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(RAG_IMPORT_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(RAG_IMPORT_EXTENSIONS):
+            yield path
+
+class RagListModel(QAbstractListModel):
+    """Koleksiyondaki belgeleri kaydırıldıkça sayfa sayfa yükleyen liste modeli."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.collection = None
+        self.filter_text = ""
+        self.total = 0
+        self._ids = []
+        self._previews = []
+        self._metadatas = []
+        self._offset = 0
+        self._exhausted = True
+
+    def set_collection(self, collection):
+        self.collection = collection
+
+    def set_filter(self, text):
+        self.filter_text = text.strip()
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self._ids = []
+        self._previews = []
+        self._metadatas = []
+        self._offset = 0
+        self._exhausted = self.collection is None
+        try:
+            self.total = self.collection.count() if self.collection is not None else 0
+        except Exception as e:
+            print(f"RAG sayım hatası: {e}")
+            self.total = 0
+        self.endResetModel()
+        
+        if self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._ids):
+            return None
+        row = index.row()
+        doc_id = self._ids[row]
+        source = self._metadatas[row].get("source")
+        if role == Qt.ItemDataRole.DisplayRole:
+            prefix = f"📄 {os.path.basename(source)} · " if source else ""
+            return f"[{doc_id[:8]}] {prefix}{self._previews[row]}"
+        if role == Qt.ItemDataRole.UserRole:
+            return doc_id
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{doc_id}\n{source}" if source else doc_id
+        if role == RAG_SOURCE_ROLE:
+            return source
+        if role == RAG_DOC_ID_ROLE:
+            return self._metadatas[row].get("doc_id")
+        return None
+
+    def remove_rows_where(self, predicate):
+        """Yüklü satırlardan koşula uyanları yeniden sorgulamadan kaldırır."""
+        rows = [row for row in range(len(self._ids))
+                if predicate(self._ids[row], self._metadatas[row])]
+        # Ardışık satırları tek seferde, sondan başa doğru kaldır
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._ids[first:last + 1]
+            del self._previews[first:last + 1]
+            del self._metadatas[first:last + 1]
+            self.endRemoveRows()
+            self._offset -= last - first + 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        query = {"limit": RAG_LIST_PAGE_SIZE, "offset": self._offset,
+                 "include": ["documents", "metadatas"]}
+        if self.filter_text:
+            # Filtreleme koleksiyon tarafında yapılır, yalnızca eşleşen sayfa gelir
+            query["where_document"] = {"$contains": self.filter_text}
+        try:
+            page = self.collection.get(**query)
+        except Exception as e:
+            print(f"RAG yükleme hatası: {e}")
+            self._exhausted = True
+            return
+        
+        ids = page['ids']
+        self._offset += len(ids)
+        if len(ids) < RAG_LIST_PAGE_SIZE:
+            self._exhausted = True
+        if not ids:
+            return
+        
+        previews = []
+        for content in page['documents']:
+            content = (content or "").replace('\n', ' ')
+            previews.append(content[:RAG_PREVIEW_LENGTH] + "..."
+                            if len(content) > RAG_PREVIEW_LENGTH else content)
+        
+        first = len(self._ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(ids) - 1)
+        self._ids.extend(ids)
+        self._previews.extend(previews)
+        self._metadatas.extend(meta or {} for meta in (page.get('metadatas') or [None] * len(ids)))
+        self.endInsertRows()
+
+class IngestThread(QThread):
+    """Metni parçalayıp toplu halde bilgi tabanına (vektör + BM25 dizini) ekleyen arka plan iş parçacığı."""
+    progress = pyqtSignal(int, int)
+    ingest_finished = pyqtSignal(int, bool)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, engine, text, chunk_size=RAG_CHUNK_SIZE,
+                 overlap=RAG_CHUNK_OVERLAP, batch_size=RAG_BATCH_SIZE, base=None):
+        super().__init__()
+        self.engine = engine
+        # Aktarma sürerken etkin taban değişse de parçalar başlangıçtaki tabana gider
+        self.base = base or engine.active_base
+        self.text = text
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.doc_id = str(uuid.uuid4())
+        self.files_done = 0
+        self.failed_files = []
+        self._is_running = True
+
+    def stop(self):
+        """Dışarıdan çağrılarak içe aktarmayı iptal eder."""
+        self._is_running = False
+
+    def add_batch(self, documents, metadatas):
+        self.engine.add_chunks(documents, metadatas, base=self.base)
+
+    def run(self):
+        try:
+            self._is_running = True
+            chunks = list(iter_chunks(self.text, self.chunk_size, self.overlap))
+            total = len(chunks)
+            added = 0
+            self.progress.emit(0, total)
+
+            for batch_start in range(0, total, self.batch_size):
+                if not self._is_running:
+                    break
+                batch = chunks[batch_start:batch_start + self.batch_size]
+                self.add_batch(
+                    [chunk for _, chunk in batch],
+                    [{"timestamp": time.time(), "doc_id": self.doc_id,
+                      "chunk": batch_start + i, "offset": offset}
+                     for i, (offset, _) in enumerate(batch)]
+                )
+                added += len(batch)
+                self.progress.emit(added, total)
+
+            if not self._is_running:
+                # Yarım kalan belgeyi geri al
+                if added:
+                    self.engine.delete_chunks(where={"doc_id": self.doc_id}, base=self.base)
+                self.ingest_finished.emit(0, True)
+            else:
+                self.ingest_finished.emit(added, False)
+        except Exception as e:
+            self.error_occurred.emit(f"RAG'a eklenirken hata: {str(e)}")
+
+class FileImportThread(IngestThread):
+    """Dosya/klasörleri süreç havuzunda ayrıştırıp toplu halde ekler."""
+    import_progress = pyqtSignal(int, int, float, float)
+
+    def __init__(self, engine, paths, chunk_size=RAG_CHUNK_SIZE,
+                 overlap=RAG_CHUNK_OVERLAP, batch_size=RAG_BATCH_SIZE, workers=None, base=None):
+        super().__init__(engine, "", chunk_size, overlap, batch_size, base)
+        self.paths = paths
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+
+    def run(self):
+        try:
+            self._is_running = True
+            started = time.perf_counter()
+            added = 0
+            documents, metadatas = [], []
+            # Bellek sınırlı kalsın diye aynı anda yalnızca birkaç dosya bekletilir
+            max_in_flight = self.workers * 2
+            paths = iter_document_paths(self.paths)
+            exhausted = False
+            in_flight = set()
+
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                while self._is_running:
+                    while not exhausted and len(in_flight) < max_in_flight:
+                        path = next(paths, None)
+                        if path is None:
+                            exhausted = True
+                            break
+                        in_flight.add(pool.submit(parse_and_chunk_file, path,
+                                                  self.chunk_size, self.overlap))
+                    if not in_flight:
+                        break
+
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, chunks, error = future.result()
+                        self.files_done += 1
+                        if error:
+                            self.failed_files.append((path, error))
+                            continue
+                        doc_id = str(uuid.uuid4())
+                        for i, (offset, chunk) in enumerate(chunks):
+                            documents.append(chunk)
+                            metadatas.append({"timestamp": time.time(), "doc_id": doc_id,
+                                              "source": path, "chunk": i, "offset": offset})
+                            if len(documents) >= self.batch_size:
+                                self.add_batch(documents, metadatas)
+                                added += len(documents)
+                                documents, metadatas = [], []
+
+                    elapsed = max(time.perf_counter() - started, 1e-6)
+                    self.import_progress.emit(self.files_done, added,
+                                              self.files_done / elapsed, added / elapsed)
+
+                if not self._is_running:
+                    pool.shutdown(wait=True, cancel_futures=True)
+
+            # Tamamlanan dosyaların kalan parçaları da eklenir, dosyalar yarım kalmaz
+            if documents:
+                self.add_batch(documents, metadatas)
+                added += len(documents)
+            self.ingest_finished.emit(added, not self._is_running)
+        except Exception as e:
+            self.error_occurred.emit(f"Dosyalar içe aktarılırken hata: {str(e)}")
+
+class ChatIndex:
+    """Sohbet listesi için küçük SQLite dizini (başlık, zaman, mesaj sayısı, boyut).
+
+    Kenar çubuğu her dosyayı açmak yerine buradan son etkinliğe göre sıralı
+    sayfalar okur. Kayıt/silme işlemlerinde ChatStore tarafından güncellenir.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS chats (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                byte_size INTEGER NOT NULL DEFAULT 0
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS chats_updated ON chats(updated DESC)")
+        self.conn.commit()
+
+    def record_append(self, chat_id, title, ts, added_messages, byte_size):
+        """Yeni kaydı ekler ya da mevcut satırı artımlı olarak günceller."""
+        self.conn.execute("""
+            INSERT INTO chats (id, title, created, updated, message_count, byte_size)
+            VALUES (?, COALESCE(?, 'Adsız Sohbet'), ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title = COALESCE(?, chats.title),
+                updated = excluded.updated,
+                message_count = chats.message_count + excluded.message_count,
+                byte_size = excluded.byte_size
+        """, (chat_id, title, ts, ts, added_messages, byte_size, title))
+        self.conn.commit()
+
+    def upsert(self, chat_id, title, created, updated, message_count, byte_size):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO chats VALUES (?, ?, ?, ?, ?, ?)",
+            (chat_id, title, created, updated, message_count, byte_size)
+        )
+        self.conn.commit()
+
+    def delete(self, chat_id):
+        self.conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+        self.conn.commit()
+
+    def ids(self):
+        return {row[0] for row in self.conn.execute("SELECT id FROM chats")}
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM chats").fetchone()[0]
+
+    def page(self, offset, limit):
+        """Son etkinliğe göre sıralı (id, başlık, güncellenme, mesaj sayısı) satırları döner."""
+        return self.conn.execute(
+            "SELECT id, title, updated, message_count FROM chats "
+            "ORDER BY updated DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        ).fetchall()
+
+class ChatStore:
+    """Sohbetleri sohbet başına bir JSONL dosyasına yalnızca ekleyerek yazar.
+
+    Her satır tek bir kayıttır ({"type": "meta"} ya da {"type": "message"}).
+    Meta kaydı başlığı ve sohbete bağlı bilgi tabanlarını ("bases") taşır;
+    son meta kaydı geçerlidir. Kullanıcı mesajları soruyla gönderilen RAG
+    bağlamını ("context") da taşıyabilir.
+    Her tur tek bir write + fsync ile eklenir; çökme anında yarım kalan son
+    satır bir sonraki okumada kesilip atılır. Liste bilgileri ChatIndex'te tutulur.
+    """
+    EXTENSION = ".jsonl"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index = ChatIndex(os.path.join(directory, "index.sqlite3"))
+
+    def path(self, chat_id):
+        return os.path.join(self.directory, f"{chat_id}{self.EXTENSION}")
+
+    def list_ids(self):
+        return [name[:-len(self.EXTENSION)] for name in os.listdir(self.directory)
+                if name.endswith(self.EXTENSION)]
+
+    def append(self, chat_id, records):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(self.path(chat_id), 'ab') as f:
+            f.write(data.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            byte_size = f.tell()
+        self._index_records(chat_id, records, byte_size)
+
+    def _index_records(self, chat_id, records, byte_size):
+        titles = [record["title"] for record in records if record.get("type") == "meta"]
+        added = sum(1 for record in records if record.get("type") == "message")
+        self.index.record_append(chat_id, titles[-1] if titles else None,
+                                 records[-1]["ts"], added, byte_size)
+
+    def _read_records(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        records = []
+        offset = 0
+        valid_end = 0
+        while offset < len(raw):
+            newline = raw.find(b"\n", offset)
+            end = len(raw) if newline == -1 else newline + 1
+            try:
+                if newline == -1:
+                    raise ValueError("yarım satır")
+                records.append(json.loads(raw[offset:newline]))
+                valid_end = end
+            except ValueError:
+                # Ortadaki bozuk satırlar atlanır, sondaki yarım yazım kesilir
+                if end == len(raw):
+                    with open(path, 'r+b') as f:
+                        f.truncate(valid_end)
+                    break
+            offset = end
+        return records
+
+    def load(self, chat_id):
+        data = {"id": chat_id, "title": "Adsız Sohbet", "messages": [], "created": None, "updated": None,
+                "bases": None}
+        for record in self._read_records(self.path(chat_id)):
+            if record.get("type") == "meta":
+                data["title"] = record.get("title", data["title"])
+                data["bases"] = record.get("bases", data["bases"])
+                data["created"] = data["created"] or record.get("ts")
+            elif record.get("type") == "message":
+                message = {"role": record["role"], "content": record["content"]}
+                if record.get("context"):
+                    message["context"] = record["context"]
+                data["messages"].append(message)
+            data["updated"] = record.get("ts", data["updated"])
+        return data
+
+    def delete(self, chat_id):
+        path = self.path(chat_id)
+        if os.path.exists(path):
+            os.remove(path)
+        self.index.delete(chat_id)
+
+    def sync_index(self):
+        """Dizinde eksik ya da fazla olan sohbetleri dosyalarla eşitler.
+
+        Normalde yalnızca dizin silinmiş/eski olduğunda dosya okunur.
+        """
+        on_disk = set(self.list_ids())
+        indexed = self.index.ids()
+        for chat_id in indexed - on_disk:
+            self.index.delete(chat_id)
+        for chat_id in on_disk - indexed:
+            try:
+                data = self.load(chat_id)
+                path = self.path(chat_id)
+                mtime = os.path.getmtime(path)
+                self.index.upsert(chat_id, data["title"], data["created"] or mtime,
+                                  data["updated"] or mtime, len(data["messages"]),
+                                  os.path.getsize(path))
+            except Exception as e:
+                print(f"Sohbet dizinleme hatası {chat_id}: {e}")
+
+    def migrate_legacy(self):
+        """Eski tam JSON kayıtlarını bir kereliğine JSONL biçimine dönüştürür."""
+        migrated = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            legacy_path = os.path.join(self.directory, name)
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                chat_id = data["id"]
+                ts = os.path.getmtime(legacy_path)
+                records = [{"type": "meta", "id": chat_id, "title": data.get("title", "Adsız Sohbet"), "ts": ts}]
+                records.extend({"type": "message", "role": msg["role"], "content": msg["content"], "ts": ts}
+                               for msg in data.get("messages", []))
+                
+                # Önce geçici dosyaya yaz, sonra atomik olarak yerine koy
+                tmp_path = self.path(chat_id) + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path(chat_id))
+                os.replace(legacy_path, legacy_path + ".bak")
+                self.index.upsert(chat_id, records[0]["title"], ts, ts, len(records) - 1,
+                                  os.path.getsize(self.path(chat_id)))
+                migrated += 1
+            except Exception as e:
+                print(f"Sohbet dönüştürme hatası {name}: {e}")
+        return migrated
+
+class ChatListModel(QAbstractListModel):
+    """Sohbet dizinini son etkinliğe göre, yalnızca görünen sayfaları yükleyen model.
+
+    Sonraki sayfanın konumu (_offset) dizinden okunan satırlarla ilerler;
+    henüz kaydedilmemiş, yerelde eklenen sohbetler onu kaydırmaz. Kaydedilen
+    ya da silinen sohbetler dizindeki sırayı değiştirebildiğinden konum hiçbir
+    zaman fazla tahmin edilmez; yeniden gelen satırlar ayıklanır.
+    """
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.chat_index = index
+        self._rows = []
+        self._offset = 0
+        self._exhausted = False
+
+    def reload(self):
+        self.beginResetModel()
+        self._rows = []
+        self._offset = 0
+        self._exhausted = False
+        self.endResetModel()
+        if self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        chat_id, title, updated, message_count = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return title
+        if role == Qt.ItemDataRole.UserRole:
+            return chat_id
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{message_count} mesaj · {time.strftime('%d.%m.%Y %H:%M', time.localtime(updated))}"
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        rows = self.chat_index.page(self._offset, CHAT_LIST_PAGE_SIZE)
+        self._offset += len(rows)
+        if len(rows) < CHAT_LIST_PAGE_SIZE:
+            self._exhausted = True
+        loaded = {entry[0] for entry in self._rows}
+        rows = [row for row in rows if row[0] not in loaded]
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(tuple(row) for row in rows)
+        self.endInsertRows()
+
+    def row_of(self, chat_id):
+        for row, entry in enumerate(self._rows):
+            if entry[0] == chat_id:
+                return row
+        return -1
+
+    def touch(self, chat_id, title, message_count=0):
+        """Sohbeti en üste taşır (son etkinlik) ve başlığını günceller."""
+        row = self.row_of(chat_id)
+        entry = (chat_id, title, time.time(), message_count)
+        if row == -1:
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self._rows.insert(0, entry)
+            self.endInsertRows()
+            return
+        if row > 0:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), 0)
+            self._rows.insert(0, self._rows.pop(row))
+            self.endMoveRows()
+        self._rows[0] = entry
+        self.dataChanged.emit(self.index(0), self.index(0))
+
+    def remove(self, chat_id):
+        row = self.row_of(chat_id)
+        if row != -1:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+            self.endRemoveRows()
+            # Sohbet dizinde olmayabilir; eksik sayım yalnızca tekrar eden satır getirir
+            self._offset = max(0, self._offset - 1)
+
+# Mesaj balonlarındaki HTML için varsayılan stil (QTextDocument)
+MESSAGE_CSS = """
+    pre {
+        background-color: #161b22;
+        border: 1px solid #30363d;
+        border-radius: 6px;
+        padding: 12px;
+        margin: 10px 0;
+        font-family: 'Courier New', monospace;
+        font-size: 14px;
+    }
+    code {
+        background-color: #0d1117;
+        font-family: 'Courier New', monospace;
+    }
+    table {
+        border-collapse: collapse;
+        width: 100%;
+        margin: 15px 0;
+    }
+    th, td {
+        border: 1px solid #30363d;
+        padding: 8px;
+        text-align: left;
+    }
+    th {
+        background-color: #0d1117;
+    }
+    a {
+        color: #58a6ff;
+    }
+"""
+CHAT_MESSAGE_ROLE = Qt.ItemDataRole.UserRole + 1
+CHAT_DOCUMENT_CACHE_SIZE = 64
+
+def plain_text_to_html(text):
+    """Düz metni satır sonlarını koruyarak HTML'e çevirir."""
+    return html.escape(text, quote=False).replace('\n', '<br>')
+
+class ChatMessageModel(QAbstractListModel):
+    """Sohbet dökümünü mesaj listesi olarak tutan model.
+
+    Her satır bir mesajdır; HTML ilk çizildiğinde üretilir ve "rev" her
+    güncellemede artar, böylece görünüm yalnızca değişen satırı yeniden dizer.
+    Akan yanıtın satırında "html" yerine "stream_blocks" (yalnızca sona eklenen,
+    biçimlendirilmiş blokların listesi) ve "stream_tail" (henüz kapanmamış
+    bloğun düz metni) tutulur.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages = []
+        self._next_uid = 0
+
+    def _entry(self, role, content, html_text=None, footer="", stream_blocks=None):
+        self._next_uid += 1
+        return {"uid": self._next_uid, "rev": 0, "role": role, "content": content,
+                "html": html_text, "footer": footer, "stopped": False,
+                "stream_blocks": stream_blocks, "stream_tail": ""}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._messages):
+            return None
+        entry = self._messages[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return entry["content"]
+        if role == CHAT_MESSAGE_ROLE:
+            return entry
+        return None
+
+    def set_messages(self, messages):
+        """Ekranı kayıtlı sohbet geçmişinden kurar; biçimlendirme çizime ertelenir."""
+        self.beginResetModel()
+        self._messages = [
+            self._entry(msg["role"], msg["content"],
+                        footer="Siz" if msg["role"] == "user" else "✓ Yanıt tamamlandı")
+            for msg in messages if msg["role"] in ("user", "assistant")
+        ]
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._messages = []
+        self.endResetModel()
+
+    def append_message(self, role, content, html_text=None, footer="", stream_blocks=None):
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append(self._entry(role, content, html_text, footer, stream_blocks))
+        self.endInsertRows()
+        return row
+
+    def update_message(self, row, **fields):
+        entry = self._messages[row]
+        entry.update(fields)
+        entry["rev"] += 1
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_message(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._messages[row]
+        self.endRemoveRows()
+
+class ChatMessageDelegate(QStyledItemDelegate):
+    """Mesajları balon olarak çizer; yalnızca görünen satırlar dizilir.
+
+    Hiç çizilmemiş satırların yüksekliği metin uzunluğundan tahmin edilir,
+    gerçek yükseklik ilk çizimde ölçülüp görünüme bildirilir. Dizilmiş belgeler
+    (uid, genişlik) anahtarlı küçük bir LRU önbellekte, sürümüyle birlikte tutulur.
+    Akan yanıtın belgesi her karede yeniden kurulmaz; yeni bloklar sona eklenir,
+    yalnızca açık kuyruk değiştirilir.
+    """
+    MARGIN = 10
+    PADDING_H = 18
+    PADDING_V = 14
+    AVATAR = 40
+    FOOTER_HEIGHT = 22
+    LINE_HEIGHT = 25
+    CHAR_WIDTH = 8
+
+    def __init__(self, view, renderer):
+        super().__init__(view)
+        self.view = view
+        self.renderer = renderer
+        self.message_font = QFont("Segoe UI")
+        self.message_font.setPixelSize(15)
+        self.footer_font = QFont("Segoe UI")
+        self.footer_font.setPixelSize(11)
+        self._documents = OrderedDict()
+        self._heights = {}
+        # (uid, genişlik) -> (belgeye eklenmiş blok sayısı, kuyruğun başladığı konum)
+        self._stream_progress = {}
+
+    def reset_cache(self):
+        self._documents.clear()
+        self._heights.clear()
+        self._stream_progress.clear()
+
+    def _entry_html(self, entry):
+        if entry["html"] is None:
+            if entry["role"] == "assistant":
+                entry["html"] = self.renderer(entry["content"])
+            else:
+                entry["html"] = plain_text_to_html(entry["content"])
+        return entry["html"]
+
+    def _bubble_width(self, entry, width):
+        side_gap = min(120, int(width * 0.15))
+        if entry["role"] == "assistant":
+            return max(120, width - 2 * self.MARGIN - self.AVATAR - 12 - side_gap)
+        if entry["role"] == "user":
+            return max(120, min(int(width * 0.75), width - 2 * self.MARGIN - side_gap))
+        return max(120, width - 2 * self.MARGIN - 2 * side_gap)
+
+    def _document(self, entry, text_width):
+        key = (entry["uid"], text_width)
+        cached = self._documents.get(key)
+        if cached is not None and cached[0] == entry["rev"]:
+            self._documents.move_to_end(key)
+            return cached[1]
+        
+        if entry["stream_blocks"] is not None:
+            doc = cached[1] if cached is not None and key in self._stream_progress else None
+            doc = self._update_stream_document(key, entry, doc, text_width)
+        else:
+            doc = self._new_document()
+            doc.setHtml(self._entry_html(entry))
+            doc.setTextWidth(text_width)
+        self._documents[key] = (entry["rev"], doc)
+        self._documents.move_to_end(key)
+        while len(self._documents) > CHAT_DOCUMENT_CACHE_SIZE:
+            evicted, _ = self._documents.popitem(last=False)
+            self._stream_progress.pop(evicted, None)
+        return doc
+
+    def _new_document(self):
+        doc = QTextDocument()
+        doc.setDefaultFont(self.message_font)
+        doc.setDefaultStyleSheet(MESSAGE_CSS)
+        doc.setDocumentMargin(0)
+        return doc
+
+    def _update_stream_document(self, key, entry, doc, text_width):
+        """Akan yanıtın belgesine yalnızca yeni blokları ekler ve kuyruğu değiştirir.
+
+        Maliyet her karede toplam yanıtla değil, o karede gelen metinle orantılıdır.
+        """
+        if doc is None:
+            doc = self._new_document()
+            doc.setTextWidth(text_width)
+            self._stream_progress[key] = (0, 0)
+        committed, tail_start = self._stream_progress[key]
+        cursor = QTextCursor(doc)
+        cursor.setPosition(tail_start)
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+        blocks = entry["stream_blocks"]
+        if len(blocks) > committed:
+            cursor.insertHtml("".join(blocks[committed:]))
+            committed = len(blocks)
+            tail_start = cursor.position()
+        if entry["stream_tail"]:
+            if tail_start:
+                # Açık kuyruk, önceki bloğun (ör. kod bloğu) biçimini devralmasın
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertText(entry["stream_tail"])
+        self._stream_progress[key] = (committed, tail_start)
+        return doc
+
+    def _text_width(self, entry, width):
+        return max(60, self._bubble_width(entry, width) - 2 * self.PADDING_H)
+
+    def _height_for(self, doc_height, entry):
+        footer = self.FOOTER_HEIGHT if entry["footer"] else 0
+        return int(doc_height) + 2 * self.PADDING_V + footer + 2 * self.MARGIN
+
+    def _estimate_height(self, entry, width):
+        chars_per_line = max(10, self._text_width(entry, width) // self.CHAR_WIDTH)
+        lines = sum(len(line) // chars_per_line + 1 for line in entry["content"].split('\n'))
+        return self._height_for(lines * self.LINE_HEIGHT, entry)
+
+    def sizeHint(self, option, index):
+        entry = index.data(CHAT_MESSAGE_ROLE)
+        width = self.view.viewport().width()
+        key = (entry["uid"], width)
+        cached = self._heights.get(key)
+        if cached is None:
+            return QSize(width, self._estimate_height(entry, width))
+        if cached[0] != entry["rev"]:
+            # Daha önce çizilmiş (görünür) satır değişti: tahmin yerine gerçekten ölç
+            doc = self._document(entry, self._text_width(entry, width))
+            cached = (entry["rev"], self._height_for(doc.size().height(), entry))
+            self._heights[key] = cached
+        return QSize(width, cached[1])
+
+    def paint(self, painter, option, index):
+        entry = index.data(CHAT_MESSAGE_ROLE)
+        rect = option.rect
+        text_width = self._text_width(entry, rect.width())
+        doc = self._document(entry, text_width)
+        doc_height = doc.size().height()
+        
+        # Gerçek yükseklik tahminden farklıysa satır yeniden boyutlandırılır
+        key = (entry["uid"], rect.width())
+        height = self._height_for(doc_height, entry)
+        self._heights[key] = (entry["rev"], height)
+        if height != rect.height():
+            persistent = QPersistentModelIndex(index)
+            QTimer.singleShot(0, lambda: persistent.isValid()
+                              and self.sizeHintChanged.emit(QModelIndex(persistent)))
+        
+        # Asistan balonu tam genişliktedir; kod bloğu ve tablo arka planları taşmaz
+        bubble_width = self._bubble_width(entry, rect.width())
+        if entry["role"] != "assistant":
+            bubble_width = max(80, min(bubble_width, int(doc.idealWidth()) + 2 * self.PADDING_H + 1))
+        bubble_height = int(doc_height) + 2 * self.PADDING_V + (self.FOOTER_HEIGHT if entry["footer"] else 0)
+        top = rect.top() + self.MARGIN
+        
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        if entry["role"] == "user":
+            left = rect.right() - self.MARGIN - bubble_width
+            gradient = QLinearGradient(left, top, left + bubble_width, top + bubble_height)
+            gradient.setColorAt(0, QColor("#1f6feb"))
+            gradient.setColorAt(1, QColor("#58a6ff"))
+            painter.setBrush(gradient)
+            painter.setPen(QColor(88, 166, 255, 80))
+            text_color = QColor("#ffffff")
+            footer_color = QColor(255, 255, 255, 200)
+        elif entry["role"] == "assistant":
+            # Avatar
+            painter.setBrush(QColor("#238636"))
+            painter.setPen(QColor(63, 185, 80, 100))
+            avatar_rect = QRect(rect.left() + self.MARGIN, top, self.AVATAR, self.AVATAR)
+            painter.drawEllipse(avatar_rect)
+            painter.setFont(self.message_font)
+            painter.drawText(avatar_rect, Qt.AlignmentFlag.AlignCenter, "🤖")
+            
+            left = rect.left() + self.MARGIN + self.AVATAR + 12
+            painter.setBrush(QColor("#161b22"))
+            painter.setPen(QColor("#30363d"))
+            text_color = QColor("#e6edf3")
+            footer_color = QColor("#f85149") if entry["stopped"] else QColor("#8b949e")
+        else:
+            left = rect.left() + (rect.width() - bubble_width) // 2
+            painter.setBrush(QColor("#da3633"))
+            painter.setPen(QColor(255, 255, 255, 40))
+            text_color = QColor("#ffffff")
+            footer_color = QColor("#ffffff")
+        
+        painter.drawRoundedRect(QRect(left, top, bubble_width, bubble_height), 16, 16)
+        
+        painter.translate(left + self.PADDING_H, top + self.PADDING_V)
+        context = QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QPalette.ColorRole.Text, text_color)
+        doc.documentLayout().draw(painter, context)
+        
+        if entry["footer"]:
+            painter.setFont(self.footer_font)
+            painter.setPen(footer_color)
+            align = Qt.AlignmentFlag.AlignRight if entry["role"] == "user" else Qt.AlignmentFlag.AlignLeft
+            painter.drawText(QRect(0, int(doc_height) + 4, bubble_width - 2 * self.PADDING_H, self.FOOTER_HEIGHT),
+                             align | Qt.AlignmentFlag.AlignVCenter, entry["footer"])
+        painter.restore()
+
+class VectorStoreThread(QThread):
+    """Vektör deposunu (ve varsa yerel gömme modelini) arayüz açıldıktan sonra arka planda açar."""
+    store_ready = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, engine, settings):
+        super().__init__()
+        self.engine = engine
+        self.settings = settings
+
+    def run(self):
+        try:
+            if self.engine.embedding_function is None:
+                self.engine.embedding_function = LocalEmbeddingFunction.from_settings(
+                    self.settings, self.engine.data_dir)
+            self.engine.open_store()
+            self.store_ready.emit()
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+class ModelListThread(QThread):
+    """/v1/models isteğini arayüzü bekletmeden arka planda yapar."""
+    models_loaded = pyqtSignal(list)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def run(self):
+        try:
+            self.models_loaded.emit(self.client.list_models())
+        except Exception as e:
+            self.error_occurred.emit(str(e))
 
 class ChatThread(QThread):
+    """RagEngine üzerinden tek bir soruyu arka planda yanıtlar."""
     response_received = pyqtSignal(str)
     response_chunk = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
+    retrieval_finished = pyqtSignal(int, float)
+    context_built = pyqtSignal(int, int, int)
+    # Soruyla gönderilen RAG bağlamı; sonraki turlarda aynen yeniden gönderilir
+    rag_context_sent = pyqtSignal(str)
 
-    def __init__(self, url, model, messages, use_rag=False, rag_context=""):
+    def __init__(self, engine, model, messages, context_budget=CONTEXT_TOKEN_BUDGET, bases=None):
         super().__init__()
-        self.url = url
+        self.engine = engine
         self.model = model
-        self.messages = messages
-        self.use_rag = use_rag
-        self.rag_context = rag_context
+        # Yalnızca sohbete bağlı bilgi tabanları aranır
+        self.bases = list(bases) if bases is not None else None
+        # Kayıtlı geçmişin anlık görüntüsü; gönderilecek istem ayrıca oluşturulur
+        self.messages = list(messages)
+        self.context_budget = context_budget
+        # Aşama süreleri; sinyaller yayılmadan önce doldurulur, arayüz okur
+        self.metrics = {}
         self._is_running = True
 
     def stop(self):
         """Dışarıdan çağrılarak döngüyü durdurur."""
         self._is_running = False
 
+    def retrieve_context(self):
+        # RAG araması arayüzü kilitlememesi için isteğin ilk aşaması olarak burada yapılır
+        started = time.perf_counter()
+        documents, timings = self.engine.search_documents_timed(self.messages[-1]["content"], self.bases)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics.update(timings, retrieval_ms=round(elapsed_ms, 1), retrieved_chunks=len(documents))
+        self.retrieval_finished.emit(len(documents), elapsed_ms)
+        return "\n\n".join(documents)
+
     def run(self):
         try:
             self._is_running = True
-            if self.use_rag and self.rag_context:
-                enhanced_messages = self.messages.copy()
-                enhanced_messages[-1]["content"] = f"İlgili bilgiler:\n{self.rag_context}\n\nSoru: {self.messages[-1]['content']}"
-                messages_to_send = enhanced_messages
-            else:
-                messages_to_send = self.messages
-
-            response = requests.post(
-                f"{self.url}/v1/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": messages_to_send,
-                    "temperature": 0.7,
-                    "max_tokens": -1,
-                    "stream": True
-                },
-                timeout=120,
-                stream=True
-            )
-            
-            if response.status_code == 200:
-                full_response = ""
-                for line in response.iter_lines():
+            started = time.perf_counter()
+            rag_context = self.retrieve_context()
+            if not self._is_running:
+                return
+
+            messages_to_send, prompt_tokens, summarized, dropped = \
+                self.engine.build_prompt(self.messages, rag_context, self.context_budget)
+            self.metrics["prompt_tokens"] = prompt_tokens
+            self.context_built.emit(prompt_tokens, summarized, dropped)
+            if rag_context:
+                self.rag_context_sent.emit(rag_context)
+
+            # Parçalar listede toplanıp sonda birleştirilir (tekrarlı += kopyalamaz)
+            parts = []
+            first_token = None
+            stream = self.engine.stream_completion(self.model, messages_to_send,
+                                                   should_continue=lambda: self._is_running)
+            try:
+                for content in stream:
                     # Durdurma kontrolü
                     if not self._is_running:
                         break
-                        
-                    if line:
-                        line = line.decode('utf-8')
-                        if line.startswith('data: '):
-                            line = line[6:]
-                            if line.strip() == '[DONE]':
-                                break
-                            try:
-                                chunk_data = json.loads(line)
-                                if 'choices' in chunk_data and len(chunk_data['choices']) > 0:
-                                    delta = chunk_data['choices'][0].get('delta', {})
-                                    content = delta.get('content', '')
-                                    if content:
-                                        full_response += content
-                                        self.response_chunk.emit(content)
-                            except json.JSONDecodeError:
-                                continue
-                
-                # Eğer durdurulmadıysa tamamlanma sinyali gönder
-                if self._is_running:
-                    self.response_received.emit(full_response)
-            else:
-                self.error_occurred.emit(f"Hata: {response.status_code}")
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                        self.metrics["ttft_ms"] = round((first_token - started) * 1000, 1)
+                    parts.append(content)
+                    self.response_chunk.emit(content)
+            finally:
+                # Durdurulduysa bağlantı kapatılır (LM Studio üretimi keser),
+                # tamamlandıysa havuza geri bırakılır
+                stream.close()
+            full_response = "".join(parts)
+            
+            # Her SSE parçası yaklaşık bir token sayılır
+            if first_token is not None:
+                generation = time.perf_counter() - first_token
+                self.metrics.update(tokens=len(parts), generation_ms=round(generation * 1000, 1))
+                if generation > 0:
+                    self.metrics["tokens_per_sec"] = round(len(parts) / generation, 1)
+            
+            # Eğer durdurulmadıysa tamamlanma sinyali gönder
+            if self._is_running:
+                self.response_received.emit(full_response)
+        except LMStudioError as e:
+            self.error_occurred.emit(str(e))
         except Exception as e:
             self.error_occurred.emit(f"Bağlantı hatası: {str(e)}")
 
 class LMStudioRAGChat(QMainWindow):
-    def __init__(self):
+    def __init__(self, base_dir=None):
+        """base_dir ayarların, RAG verilerinin ve sohbetlerin tutulduğu klasördür.
+
+        Verilmezse app_base_dir() ile çözülür (kıyaslamalar geçici bir klasör verir).
+        """
         super().__init__()
         self.setWindowTitle("LM Studio RAG Chat")
         self.setGeometry(100, 100, 1300, 800)
         
+        self.base_dir = app_base_dir(base_dir)
+        
+        # Kullanıcı ayarları (sunucu adresi, zaman aşımları, bağlam bütçesi)
+        self.settings = AppSettings(os.path.join(self.base_dir, "settings.json"))
+        
         # Klasör tanımları
-        self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rag_data")
+        self.data_dir = os.path.join(self.base_dir, "rag_data")
         os.makedirs(self.data_dir, exist_ok=True)
         
-        self.chat_history_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_histories")
+        self.chat_history_dir = os.path.join(self.base_dir, "chat_histories")
         os.makedirs(self.chat_history_dir, exist_ok=True)
+        self.chat_store = ChatStore(self.chat_history_dir)
+        self.chat_store.migrate_legacy()
+        self.chat_store.sync_index()
         
         self.current_chat_id = None
+        self.saved_message_count = 0
+        self.saved_title = None
+        self.chat_bases = [self.settings.get("knowledge_base")]
+        self.saved_bases = None
         self.is_new_chat = True
         self.expecting_completion = False # Durdurma butonu için bayrak
+        self.ingest_thread = None
+        self.model_thread = None
+        self.stale_model_threads = []
         
         self.setup_dark_theme()
         
-        # ChromaDB Ayarları
-        self.chroma_client = chromadb.Client(Settings(
-            anonymized_telemetry=False,
-            allow_reset=True,
-            persist_directory=self.data_dir,
-            is_persistent=True
-        ))
-        
-        try:
-            self.collection = self.chroma_client.get_collection("rag_knowledge")
-        except:
-            self.collection = self.chroma_client.create_collection("rag_knowledge")
-        
-        self.lm_studio_url = "http://localhost:1234"
+        self.lm_studio_url = self.settings.get("lm_studio_url")
+        # Arama, istem ve akış Qt'den bağımsız motorda yapılır; ChromaDB pencere
+        # açıldıktan sonra arka planda yüklenir (bkz. open_rag_store)
+        self.engine = RagEngine(LMStudioClient.from_settings(self.settings), self.data_dir,
+                                top_k=self.settings.get("rag_top_k"),
+                                max_distance=self.settings.get("rag_max_distance"),
+                                mmr_lambda=self.settings.get("rag_mmr_lambda"),
+                                cache=RagQueryCache.from_settings(self.settings),
+                                system_prompt=self.settings.get("system_prompt"),
+                                active_base=self.settings.get("knowledge_base"))
+        self.store_thread = None
         self.current_model = ""
         self.chat_history = []
         self.current_response = ""
+        self.rag_cache = self.engine.cache
+        # İstek başına performans ölçümleri (bkz. record_request_metrics)
+        self.metrics_log = MetricsLog(os.path.join(self.base_dir, "metrics.jsonl"))
+        self.markdown_renderer = MarkdownRenderer()
+        
+        # Akış parçaları biriktirilip kare hızında ekrana basılır
+        self.pending_chunks = []
+        self.rendered_chunk_count = 0
+        self.stream_started_at = None
+        self.stream_splitter = MarkdownBlockSplitter()
+        self.prompt_tokens = None
+        self.request_started_at = None
+        self.render_timer = QTimer(self)
+        self.render_timer.setInterval(STREAM_FLUSH_INTERVAL_MS)
+        self.render_timer.timeout.connect(self.flush_pending_chunks)
         
         self.setup_ui()
+        # Pencere sunucuyu beklemeden açılır: önce önbellekteki liste gösterilir,
+        # gerçek liste arka planda alınır ve düzenli aralıklarla yenilenir
+        self.populate_models(self.settings.get("cached_models"))
+        self.model_poll_timer = QTimer(self)
+        self.model_poll_timer.setInterval(MODEL_POLL_INTERVAL_MS)
+        self.model_poll_timer.timeout.connect(self.load_models)
+        self.model_poll_timer.start()
         self.load_models()
         self.load_chat_list()
+        self.open_rag_store()
         
         # Başlangıçta yeni bir sohbet oluştur
         self.new_chat()
 
+    @property
+    def client(self):
+        return self.engine.client
+
+    @property
+    def collection(self):
+        return self.engine.collection
+
     def format_response(self, text):
         """Metni HTML'e formatlar (Markdown, kod blokları, tablolar)"""
-        # Markdown'dan HTML'e dönüştür
-        if HAVE_MARKDOWN:
-            html = markdown.markdown(text, extensions=['fenced_code', 'tables'])
-            # Kod blokları için stil ekle
-            def add_style_to_code(match):
-                code_block = match.group(0)
-                if '<pre><code>' in code_block or '<pre><code ' in code_block:
-                    code_block = re.sub(
-                        r'<pre>',
-                        r'<pre style="background-color: #161b22; border: 1px solid #30363d; border-radius: 6px; padding: 12px; overflow-x: auto; margin: 10px 0;">',
-                        code_block
-                    )
-                return code_block
-            html = re.sub(r'<pre>.*?</pre>', add_style_to_code, html, flags=re.DOTALL)
-            # Tablolar için stil ekle
-            html = html.replace('<table>', '<table style="border-collapse: collapse; width: 100%; margin: 15px 0;">')
-            html = html.replace('<th>', '<th style="border: 1px solid #30363d; padding: 8px; background-color: #0d1117;">')
-            html = html.replace('<td>', '<td style="border: 1px solid #30363d; padding: 8px;">')
-            return html
-        else:
-            # Basit dönüşüm - kod blokları ve satır içi kod
-            # Kod blokları
-            def replace_code_block(match):
-                lang = match.group(1) or ''
-                code = match.group(2)
-                return f'<pre style="background-color: #161b22; border: 1px solid #30363d; border-radius: 6px; padding: 12px; overflow-x: auto; margin: 10px 0;"><code class="language-{lang}">{code}</code></pre>'
-            
-            text = re.sub(r'```(\w*)\n(.*?)```', replace_code_block, text, flags=re.DOTALL)
-            
-            # Satır içi kod
-            text = re.sub(
-                r'`([^`]+)`',
-                r'<code style="background-color: #0d1117; border: 1px solid #30363d; border-radius: 3px; padding: 2px 6px; font-family: \'Courier New\', monospace;">\1</code>',
-                text
-            )
-            
-            # Satır sonlarını <br> ile değiştir
-            text = text.replace('\n', '<br>')
-            
-            # Basit tablo desteği (Markdown tabloları)
-            lines = text.split('<br>')
-            in_table = False
-            table_html = ''
-            for i, line in enumerate(lines):
-                if '|' in line and ('---' in line or i > 0 and '|' in lines[i-1]):
-                    if not in_table:
-                        in_table = True
-                        table_html = '<table style="border-collapse: collapse; width: 100%; margin: 15px 0;">'
-                    
-                    # Tablo satırı
-                    cells = [cell.strip() for cell in line.split('|') if cell.strip() != '']
-                    if '---' in line:
-                        # Header ayırıcı - bu satırı atla
-                        continue
-                    
-                    table_html += '<tr>'
-                    for cell in cells:
-                        if i == 0 or (i > 0 and '---' in lines[i-1]):
-                            # Header hücresi
-                            table_html += f'<th style="border: 1px solid #30363d; padding: 8px; background-color: #0d1117;">{cell}</th>'
-                        else:
-                            # Normal hücre
-                            table_html += f'<td style="border: 1px solid #30363d; padding: 8px;">{cell}</td>'
-                    table_html += '</tr>'
-                else:
-                    if in_table:
-                        in_table = False
-                        table_html += '</table>'
-                        text = text.replace(line, table_html + line)
-            
-            return text
+        return self.markdown_renderer.render(text)
 
     def setup_dark_theme(self):
         palette = QPalette()
@@ -251,22 +1251,22 @@ class LMStudioRAGChat(QMainWindow):
                 border: 1px solid #58a6ff;
                 background-color: #0d1117;
             }
-            QListWidget {
+            QListWidget, QListView {
                 background-color: #0d1117;
                 color: #e6edf3;
                 border: none;
                 outline: none;
                 font-size: 13px;
             }
-            QListWidget::item {
+            QListWidget::item, QListView::item {
                 padding: 10px;
                 border-bottom: 1px solid #21262d;
                 border-radius: 4px;
             }
-            QListWidget::item:hover {
+            QListWidget::item:hover, QListView::item:hover {
                 background-color: #161b22;
             }
-            QListWidget::item:selected {
+            QListWidget::item:selected, QListView::item:selected {
                 background-color: #1f6feb;
                 color: white;
             }
@@ -335,6 +1335,33 @@ class LMStudioRAGChat(QMainWindow):
                 color: #e6edf3;
                 font-size: 13px;
             }
+            QStatusBar {
+                background-color: #161b22;
+                color: #8b949e;
+                border-top: 1px solid #30363d;
+                font-size: 12px;
+            }
+            QSpinBox {
+                background-color: #161b22;
+                color: #e6edf3;
+                border: 1px solid #30363d;
+                border-radius: 6px;
+                padding: 6px 8px;
+                font-size: 13px;
+            }
+            QProgressBar {
+                background-color: #161b22;
+                color: #e6edf3;
+                border: 1px solid #30363d;
+                border-radius: 6px;
+                text-align: center;
+                font-size: 12px;
+                min-height: 20px;
+            }
+            QProgressBar::chunk {
+                background-color: #238636;
+                border-radius: 5px;
+            }
         """)
 
     def setup_ui(self):
@@ -372,8 +1399,11 @@ class LMStudioRAGChat(QMainWindow):
         sidebar_layout.addWidget(QLabel("Geçmiş Sohbetler:"))
         
         # Sohbet Listesi
-        self.chat_list = QListWidget()
-        self.chat_list.itemClicked.connect(self.load_chat)
+        self.chat_list_model = ChatListModel(self.chat_store.index, self)
+        self.chat_list = QListView()
+        self.chat_list.setUniformItemSizes(True)
+        self.chat_list.setModel(self.chat_list_model)
+        self.chat_list.clicked.connect(self.load_chat)
         sidebar_layout.addWidget(self.chat_list)
 
         # Sohbet Silme Butonu (Yeni Eklendi)
@@ -410,7 +1440,29 @@ class LMStudioRAGChat(QMainWindow):
         self.refresh_btn = QPushButton("🔄 Yenile")
         self.refresh_btn.clicked.connect(self.load_models)
         model_row.addWidget(self.refresh_btn)
+        
+        # Modele gönderilecek geçmişin token bütçesi
+        model_row.addWidget(QLabel("Bağlam:"))
+        self.context_budget_spin = QSpinBox()
+        self.context_budget_spin.setRange(512, 131072)
+        self.context_budget_spin.setSingleStep(512)
+        self.context_budget_spin.setSuffix(" token")
+        self.context_budget_spin.setValue(self.settings.get("context_token_budget"))
+        self.context_budget_spin.setToolTip("Son mesajlar aynen gönderilir; bütçeyi aşan eski mesajlar özetlenir veya atılır")
+        self.context_budget_spin.valueChanged.connect(
+            lambda value: self.settings.set("context_token_budget", value))
+        model_row.addWidget(self.context_budget_spin)
         top_left_layout.addLayout(model_row)
+        
+        # LM Studio sunucu adresi
+        server_row = QHBoxLayout()
+        server_row.addWidget(QLabel("Sunucu:"))
+        self.server_url_input = QLineEdit(self.lm_studio_url)
+        self.server_url_input.setPlaceholderText(LM_STUDIO_DEFAULT_URL)
+        self.server_url_input.setStyleSheet("padding: 6px 10px;")
+        self.server_url_input.editingFinished.connect(self.change_server_url)
+        server_row.addWidget(self.server_url_input)
+        top_left_layout.addLayout(server_row)
 
         # Sağ taraf - Sohbet işlemleri
         top_right_layout = QHBoxLayout()
@@ -446,11 +1498,26 @@ class LMStudioRAGChat(QMainWindow):
         rag_tab = self.create_rag_tab()
         self.tabs.addTab(rag_tab, "📚 RAG Yönetimi")
         
+        stats_tab = self.create_stats_tab()
+        self.tabs.addTab(stats_tab, "📊 Performans")
+        
         content_layout.addWidget(self.tabs)
         
         # Panelleri Ana Düzene Ekle
         main_layout.addWidget(sidebar)
         main_layout.addWidget(content_widget)
+        
+        self.render_rate_label = QLabel("")
+        self.render_rate_label.setStyleSheet("color: #8b949e; font-size: 12px; padding: 0 8px;")
+        self.statusBar().addPermanentWidget(self.render_rate_label)
+        
+        self.prompt_tokens_label = QLabel("")
+        self.prompt_tokens_label.setStyleSheet("color: #8b949e; font-size: 12px; padding: 0 8px;")
+        self.statusBar().addPermanentWidget(self.prompt_tokens_label)
+        
+        self.server_status_label = QLabel("⚪ LM Studio")
+        self.server_status_label.setStyleSheet("color: #8b949e; font-size: 12px; padding: 0 8px;")
+        self.statusBar().addPermanentWidget(self.server_status_label)
 
     def create_chat_tab(self):
         chat_widget = QWidget()
@@ -458,57 +1525,42 @@ class LMStudioRAGChat(QMainWindow):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
         
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
-        # Chat display'e CSS ekle
-        self.chat_display.setHtml("""
-        <style>
-            pre {
-                background-color: #161b22;
-                border: 1px solid #30363d;
-                border-radius: 6px;
-                padding: 12px;
-                overflow-x: auto;
-                margin: 10px 0;
-                font-family: 'Courier New', monospace;
-                font-size: 14px;
-            }
-            code {
+        # Döküm, yalnızca görünen mesajları dizen bir liste görünümüdür
+        self.chat_model = ChatMessageModel(self)
+        self.chat_display = QListView()
+        self.chat_display.setModel(self.chat_model)
+        self.chat_delegate = ChatMessageDelegate(self.chat_display, self.format_response)
+        self.chat_display.setItemDelegate(self.chat_delegate)
+        self.chat_model.modelReset.connect(self.chat_delegate.reset_cache)
+        self.chat_display.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.chat_display.setResizeMode(QListView.ResizeMode.Adjust)
+        self.chat_display.setUniformItemSizes(False)
+        self.chat_display.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.chat_display.setStyleSheet("""
+            QListView {
                 background-color: #0d1117;
-                border: 1px solid #30363d;
-                border-radius: 3px;
-                padding: 2px 6px;
-                font-family: 'Courier New', monospace;
-            }
-            table {
-                border-collapse: collapse;
-                width: 100%;
-                margin: 15px 0;
-            }
-            th, td {
-                border: 1px solid #30363d;
-                padding: 8px;
-                text-align: left;
-            }
-            th {
-                background-color: #0d1117;
-            }
-            .user-message {
-                margin: 15px 40px 8px 120px;
-                animation: slideInRight 0.3s ease-out;
-            }
-            .assistant-message {
-                margin: 8px 120px 15px 40px;
-                animation: slideInLeft 0.3s ease-out;
+                border: none;
+                padding: 10px;
             }
-            .message-divider {
-                margin: 8px 80px;
-                display: flex;
-                align-items: center;
-                gap: 10px;
+            QListView::item, QListView::item:hover, QListView::item:selected {
+                background: transparent;
+                border: none;
+                padding: 0;
             }
-        </style>
         """)
+        
+        # Seçili mesajı kopyalama (sağ tık ve Ctrl+C)
+        self.chat_display.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.chat_display.customContextMenuRequested.connect(self.show_message_menu)
+        copy_shortcut = QShortcut(QKeySequence.StandardKey.Copy, self.chat_display)
+        copy_shortcut.setContext(Qt.ShortcutContext.WidgetShortcut)
+        copy_shortcut.activated.connect(self.copy_selected_message)
+        
+        # Kullanıcı en alttayken yeni içerik gelince aşağıda kal
+        self.chat_pinned_bottom = True
+        scrollbar = self.chat_display.verticalScrollBar()
+        scrollbar.valueChanged.connect(self.on_chat_scrolled)
+        scrollbar.rangeChanged.connect(self.on_chat_range_changed)
         layout.addWidget(self.chat_display)
         
         input_container = QWidget()
@@ -522,6 +1574,16 @@ class LMStudioRAGChat(QMainWindow):
         input_layout = QVBoxLayout(input_container)
         
         message_layout = QHBoxLayout()
+        # Bu sohbette aranacak bilgi tabanları; menü her açılışta yeniden kurulur
+        self.chat_bases_btn = QToolButton()
+        self.chat_bases_btn.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
+        self.chat_bases_btn.setMinimumHeight(45)
+        self.chat_bases_menu = QMenu(self.chat_bases_btn)
+        self.chat_bases_menu.aboutToShow.connect(self.populate_chat_bases_menu)
+        self.chat_bases_btn.setMenu(self.chat_bases_menu)
+        message_layout.addWidget(self.chat_bases_btn)
+        self.update_chat_bases_button()
+        
         self.message_input = QLineEdit()
         self.message_input.setPlaceholderText("Mesajınızı yazın...")
         self.message_input.returnPressed.connect(self.send_message)
@@ -561,6 +1623,22 @@ class LMStudioRAGChat(QMainWindow):
         rag_widget = QWidget()
         layout = QVBoxLayout(rag_widget)
         
+        # Düzenlenen bilgi tabanı; eklenenler, liste ve silme işlemleri bu tabana uygulanır
+        base_layout = QHBoxLayout()
+        base_layout.addWidget(QLabel("📚 Bilgi tabanı:"))
+        self.base_combo = QComboBox()
+        self.base_combo.setMinimumWidth(200)
+        self.base_combo.currentTextChanged.connect(self.on_base_selected)
+        base_layout.addWidget(self.base_combo)
+        self.new_base_btn = QPushButton("➕ Yeni")
+        self.new_base_btn.clicked.connect(self.create_knowledge_base)
+        base_layout.addWidget(self.new_base_btn)
+        self.delete_base_btn = QPushButton("🗑️ Tabanı Sil")
+        self.delete_base_btn.clicked.connect(self.delete_knowledge_base)
+        base_layout.addWidget(self.delete_base_btn)
+        base_layout.addStretch()
+        layout.addLayout(base_layout)
+        
         layout.addWidget(QLabel("📝 Yeni Bilgi Ekle:"))
         self.rag_input = QTextEdit()
         self.rag_input.setPlaceholderText("Öğretmek istediğiniz bilgileri buraya yazın...")
@@ -571,18 +1649,120 @@ class LMStudioRAGChat(QMainWindow):
         self.add_rag_btn = QPushButton("✅ RAG'a Ekle")
         self.add_rag_btn.clicked.connect(self.add_to_rag)
         rag_btn_layout.addWidget(self.add_rag_btn)
+        
+        self.import_files_btn = QPushButton("📄 Dosya İçe Aktar")
+        self.import_files_btn.clicked.connect(self.import_files)
+        rag_btn_layout.addWidget(self.import_files_btn)
+        
+        self.import_folder_btn = QPushButton("📁 Klasör İçe Aktar")
+        self.import_folder_btn.clicked.connect(self.import_folder)
+        rag_btn_layout.addWidget(self.import_folder_btn)
+        
+        self.cancel_ingest_btn = QPushButton("✖ İptal")
+        self.cancel_ingest_btn.clicked.connect(self.cancel_ingest)
+        self.cancel_ingest_btn.setEnabled(False)
+        rag_btn_layout.addWidget(self.cancel_ingest_btn)
+        
+        self.ingest_progress = QProgressBar()
+        self.ingest_progress.setVisible(False)
+        rag_btn_layout.addWidget(self.ingest_progress)
         rag_btn_layout.addStretch()
+        
+        # Parçalama ayarları
+        rag_btn_layout.addWidget(QLabel("Parça boyutu:"))
+        self.chunk_size_spin = QSpinBox()
+        self.chunk_size_spin.setRange(100, 20000)
+        self.chunk_size_spin.setSingleStep(100)
+        self.chunk_size_spin.setValue(RAG_CHUNK_SIZE)
+        rag_btn_layout.addWidget(self.chunk_size_spin)
+        
+        rag_btn_layout.addWidget(QLabel("Örtüşme:"))
+        self.chunk_overlap_spin = QSpinBox()
+        self.chunk_overlap_spin.setRange(0, max_chunk_overlap(RAG_CHUNK_SIZE))
+        self.chunk_overlap_spin.setSingleStep(50)
+        self.chunk_overlap_spin.setValue(RAG_CHUNK_OVERLAP)
+        rag_btn_layout.addWidget(self.chunk_overlap_spin)
+        # Örtüşme parça boyutunun yarısına ulaşamaz; aşan değer otomatik düşürülür
+        self.chunk_size_spin.valueChanged.connect(
+            lambda size: self.chunk_overlap_spin.setMaximum(max_chunk_overlap(size)))
         layout.addLayout(rag_btn_layout)
         
-        layout.addWidget(QLabel("📚 Kayıtlı Bilgiler:"))
-        self.rag_list = QListWidget()
+        # Arama ayarları: kaç parça, ne kadar alakalı ve ne kadar çeşitli
+        retrieval_layout = QHBoxLayout()
+        retrieval_layout.addWidget(QLabel("En fazla parça:"))
+        self.rag_top_k_spin = QSpinBox()
+        self.rag_top_k_spin.setRange(1, 20)
+        self.rag_top_k_spin.setValue(self.settings.get("rag_top_k"))
+        self.rag_top_k_spin.setToolTip("Her soruda bağlama eklenebilecek en fazla parça sayısı")
+        retrieval_layout.addWidget(self.rag_top_k_spin)
+        
+        retrieval_layout.addWidget(QLabel("Uzaklık eşiği:"))
+        self.rag_distance_spin = QDoubleSpinBox()
+        self.rag_distance_spin.setRange(0.05, 2.0)
+        self.rag_distance_spin.setSingleStep(0.05)
+        self.rag_distance_spin.setDecimals(2)
+        self.rag_distance_spin.setValue(self.settings.get("rag_max_distance"))
+        self.rag_distance_spin.setToolTip("Soruya kosinüs uzaklığı bundan büyük parçalar eklenmez; "
+                                          "hiçbiri geçemezse soru bağlamsız sorulur")
+        retrieval_layout.addWidget(self.rag_distance_spin)
+        
+        retrieval_layout.addWidget(QLabel("MMR λ:"))
+        self.rag_mmr_spin = QDoubleSpinBox()
+        self.rag_mmr_spin.setRange(0.0, 1.0)
+        self.rag_mmr_spin.setSingleStep(0.1)
+        self.rag_mmr_spin.setDecimals(2)
+        self.rag_mmr_spin.setValue(self.settings.get("rag_mmr_lambda"))
+        self.rag_mmr_spin.setToolTip("1 = yalnızca alaka; küçüldükçe birbirine benzeyen parçalar elenir")
+        retrieval_layout.addWidget(self.rag_mmr_spin)
+        retrieval_layout.addStretch()
+        for spin in (self.rag_top_k_spin, self.rag_distance_spin, self.rag_mmr_spin):
+            spin.valueChanged.connect(self.on_retrieval_settings_changed)
+        layout.addLayout(retrieval_layout)
+        
+        self.import_stats_label = QLabel("")
+        self.import_stats_label.setStyleSheet("color: #8b949e; font-size: 12px;")
+        self.import_stats_label.setVisible(False)
+        layout.addWidget(self.import_stats_label)
+        
+        list_header = QHBoxLayout()
+        list_header.addWidget(QLabel("📚 Kayıtlı Bilgiler:"))
+        self.rag_count_label = QLabel("")
+        self.rag_count_label.setStyleSheet("color: #8b949e; font-size: 12px;")
+        list_header.addWidget(self.rag_count_label)
+        list_header.addStretch()
+        
+        self.rag_filter_input = QLineEdit()
+        self.rag_filter_input.setPlaceholderText("🔍 İçerikte ara...")
+        self.rag_filter_input.setMaximumWidth(300)
+        list_header.addWidget(self.rag_filter_input)
+        layout.addLayout(list_header)
+        
+        # Filtre her tuşta değil, yazma durunca uygulanır
+        self.rag_filter_timer = QTimer(self)
+        self.rag_filter_timer.setSingleShot(True)
+        self.rag_filter_timer.setInterval(300)
+        self.rag_filter_timer.timeout.connect(self.apply_rag_filter)
+        self.rag_filter_input.textChanged.connect(lambda _: self.rag_filter_timer.start())
+        
+        self.rag_model = RagListModel(self)
+        self.rag_model.rowsInserted.connect(lambda *_: self.update_rag_count_label())
+        self.rag_model.modelReset.connect(self.update_rag_count_label)
+        self.rag_list = QListView()
+        self.rag_list.setUniformItemSizes(True)
+        self.rag_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.rag_list.setModel(self.rag_model)
         layout.addWidget(self.rag_list)
         
         delete_layout = QHBoxLayout()
-        self.delete_rag_btn = QPushButton("🗑️ Seçili Bilgiyi Sil")
+        self.delete_rag_btn = QPushButton("🗑️ Seçilenleri Sil")
         self.delete_rag_btn.clicked.connect(self.delete_rag)
         delete_layout.addWidget(self.delete_rag_btn)
         
+        self.delete_source_btn = QPushButton("🗂️ Seçili Kaynağı Sil")
+        self.delete_source_btn.setToolTip("Seçili parçaların geldiği dosya/metinden eklenen tüm parçaları siler")
+        self.delete_source_btn.clicked.connect(self.delete_rag_by_source)
+        delete_layout.addWidget(self.delete_source_btn)
+        
         self.clear_all_rag_btn = QPushButton("⚠️ Tüm RAG'ı Temizle")
         self.clear_all_rag_btn.clicked.connect(self.clear_all_rag)
         delete_layout.addWidget(self.clear_all_rag_btn)
@@ -590,34 +1770,65 @@ class LMStudioRAGChat(QMainWindow):
         delete_layout.addStretch()
         layout.addLayout(delete_layout)
         
-        self.load_rag_list()
+        # Vektör deposu hazır olana kadar RAG işlemleri kapalıdır
+        self.set_rag_enabled(False)
+        self.rag_count_label.setText("Vektör deposu açılıyor...")
         
         return rag_widget
 
-    # --- SOHBET YÖNETİM FONKSİYONLARI ---
+    def create_stats_tab(self):
+        stats_widget = QWidget()
+        layout = QVBoxLayout(stats_widget)
+        
+        header = QHBoxLayout()
+        header.addWidget(QLabel("📊 Son isteklerin performansı (p50 / p95):"))
+        header.addStretch()
+        refresh_btn = QPushButton("🔄 Yenile")
+        refresh_btn.clicked.connect(self.update_stats_panel)
+        header.addWidget(refresh_btn)
+        layout.addLayout(header)
+        
+        self.stats_label = QLabel("")
+        self.stats_label.setTextFormat(Qt.TextFormat.RichText)
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        layout.addWidget(self.stats_label)
+        
+        path_label = QLabel(f"Ayrıntılı kayıtlar: {self.metrics_log.path}")
+        path_label.setStyleSheet("color: #8b949e; font-size: 12px;")
+        path_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(path_label)
+        layout.addStretch()
+        
+        self.update_stats_panel()
+        return stats_widget
 
-    def get_chat_file_path(self, chat_id):
-        return os.path.join(self.chat_history_dir, f"{chat_id}.json")
+    # --- SOHBET YÖNETİM FONKSİYONLARI ---
 
     def save_chat(self):
-        if not self.current_chat_id:
+        """Yalnızca son kayıttan bu yana eklenen mesajları dosyanın sonuna yazar."""
+        if not self.current_chat_id or not self.chat_history:
             return
         
-        data = {
-            "id": self.current_chat_id,
-            "title": self.get_current_chat_title(),
-            "messages": self.chat_history,
-            "html": self.chat_display.toHtml(),
-            "timestamp": str(uuid.uuid4())
-        }
+        now = time.time()
+        records = []
+        title = self.get_current_chat_title()
+        if title != self.saved_title or self.chat_bases != self.saved_bases:
+            records.append({"type": "meta", "id": self.current_chat_id, "title": title,
+                            "bases": self.chat_bases, "ts": now})
+        # Gönderilen RAG bağlamı da saklanır; yeniden açılan sohbette istem aynı kalır
+        records.extend({"type": "message", "role": msg["role"], "content": msg["content"], "ts": now,
+                        **({"context": msg["context"]} if msg.get("context") else {})}
+                       for msg in self.chat_history[self.saved_message_count:])
+        if not records:
+            return
         
         try:
-            with open(self.get_chat_file_path(self.current_chat_id), 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            self.chat_store.append(self.current_chat_id, records)
+            self.saved_message_count = len(self.chat_history)
+            self.saved_title = title
+            self.saved_bases = list(self.chat_bases)
             
-            current_item = self.chat_list.currentItem()
-            if current_item and current_item.data(Qt.ItemDataRole.UserRole) == self.current_chat_id:
-                current_item.setText(data["title"])
+            self.chat_list_model.touch(self.current_chat_id, title, self.saved_message_count)
         except Exception as e:
             print(f"Kayıt hatası: {e}")
 
@@ -631,73 +1842,75 @@ class LMStudioRAGChat(QMainWindow):
         return "Yeni Sohbet"
 
     def load_chat_list(self):
-        self.chat_list.clear()
-        files = sorted([f for f in os.listdir(self.chat_history_dir) if f.endswith('.json')], reverse=True)
-        
-        for file in files:
-            try:
-                with open(os.path.join(self.chat_history_dir, file), 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    item = QListWidgetItem(data.get("title", "Adsız Sohbet"))
-                    item.setData(Qt.ItemDataRole.UserRole, data["id"])
-                    self.chat_list.addItem(item)
-            except Exception as e:
-                print(f"Dosya okuma hatası {file}: {e}")
+        """Listeyi dizinden, yalnızca ilk sayfayı okuyarak yeniler."""
+        self.chat_list_model.reload()
 
     def new_chat(self):
+        # Akış sürerken döküm değişirse yanıt yarıda kesilmiş sayılır
+        self.stop_generation()
         if not self.is_new_chat:
             self.save_chat()
             
         self.current_chat_id = str(uuid.uuid4())
         self.chat_history = []
-        self.chat_display.clear()
+        self.saved_message_count = 0
+        self.saved_title = None
+        # Yeni sohbet RAG sekmesinde seçili tabana bağlanır
+        self.chat_bases = [self.engine.active_base]
+        self.saved_bases = None
+        self.update_chat_bases_button()
+        self.chat_model.clear()
         self.message_input.clear()
         self.is_new_chat = True
         self.chat_list.clearSelection()
 
-    def load_chat(self, item):
-        chat_id = item.data(Qt.ItemDataRole.UserRole)
+    def load_chat(self, index):
+        chat_id = index.data(Qt.ItemDataRole.UserRole)
+        self.stop_generation()
         
         if self.current_chat_id and self.current_chat_id != chat_id:
             self.save_chat()
             
-        file_path = self.get_chat_file_path(chat_id)
-        if os.path.exists(file_path):
+        if os.path.exists(self.chat_store.path(chat_id)):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
+                data = self.chat_store.load(chat_id)
+                
                 self.current_chat_id = data["id"]
                 self.chat_history = data["messages"]
-                self.chat_display.setHtml(data["html"])
+                self.saved_message_count = len(self.chat_history)
+                self.saved_title = data["title"]
+                # Bilgi tabanlarından önceki sohbetler varsayılan tabanı arar
+                self.chat_bases = data["bases"] if data["bases"] is not None else [DEFAULT_KNOWLEDGE_BASE]
+                self.saved_bases = data["bases"]
+                self.update_chat_bases_button()
                 self.is_new_chat = False
                 
-                cursor = self.chat_display.textCursor()
-                cursor.movePosition(QTextCursor.MoveOperation.End)
-                self.chat_display.setTextCursor(cursor)
+                # Ekran, kayıtlı HTML yerine mesajlardan yeniden oluşturulur
+                self.render_chat_history()
                 
             except Exception as e:
                 QMessageBox.critical(self, "Hata", f"Sohbet yüklenirken hata oluştu: {e}")
 
     def clear_current_chat(self):
         """Sadece görüntüyü temizler, geçmiş dosyasını silmez."""
+        self.stop_generation()
         if not self.is_new_chat:
             reply = QMessageBox.question(self, "Onay", 
                                          "Mevcut sohbetin içeriğini ekrandan temizlemek istiyor musunuz? (Dosya silinmeyecek)",
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
-                self.chat_display.clear()
+                self.chat_model.clear()
         else:
-            self.chat_display.clear()
+            self.chat_model.clear()
 
     def delete_selected_chat(self):
         """Seçili sohbeti diskten ve listeden siler."""
-        current_item = self.chat_list.currentItem()
-        if not current_item:
+        current_index = self.chat_list.currentIndex()
+        if not current_index.isValid():
             QMessageBox.warning(self, "Uyarı", "Lütfen silmek için bir sohbet seçin.")
             return
         
-        chat_id = current_item.data(Qt.ItemDataRole.UserRole)
+        chat_id = current_index.data(Qt.ItemDataRole.UserRole)
         
         reply = QMessageBox.question(self, "Onay", 
                                      "Bu sohbeti tamamen silmek istiyor musunuz? Bu işlem geri alınamaz.",
@@ -706,15 +1919,15 @@ class LMStudioRAGChat(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 # Dosyayı sil
-                file_path = self.get_chat_file_path(chat_id)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                self.chat_store.delete(chat_id)
                 
                 # Listeden sil
-                self.chat_list.takeItem(self.chat_list.row(current_item))
+                self.chat_list_model.remove(chat_id)
                 
                 # Eğer silinen sohbet şu an açıksa, yeni sohbete geç
                 if self.current_chat_id == chat_id:
+                    # Silinen dosya yeniden yazılmasın
+                    self.current_chat_id = None
                     self.new_chat()
                     
                 QMessageBox.information(self, "Başarılı", "Sohbet silindi.")
@@ -724,21 +1937,74 @@ class LMStudioRAGChat(QMainWindow):
     # --- MEVCUT FONKSİYONLAR ---
 
     def load_models(self):
-        try:
-            response = requests.get(f"{self.lm_studio_url}/v1/models", timeout=5)
-            if response.status_code == 200:
-                models = response.json()
-                self.model_combo.clear()
-                for model in models['data']:
-                    self.model_combo.addItem(model['id'])
-                if self.model_combo.count() > 0:
-                    self.current_model = self.model_combo.currentText()
-        except Exception as e:
-            QMessageBox.warning(self, "Bağlantı Hatası", 
-                              f"LM Studio'ya bağlanılamadı.\nURL: {self.lm_studio_url}\nHata: {str(e)}")
+        """Model listesini arka planda ister; önceki istek sürüyorsa yenisi açılmaz."""
+        if self.model_thread is not None and self.model_thread.isRunning():
+            return
+        self.model_thread = ModelListThread(self.client)
+        self.model_thread.models_loaded.connect(self.on_models_loaded)
+        self.model_thread.error_occurred.connect(self.on_models_error)
+        self.model_thread.start()
+
+    def populate_models(self, models):
+        """Açılır listeyi doldurur; son seçilen model varsa seçili kalır."""
+        selected = self.current_model or self.settings.get("last_model")
+        self.model_combo.blockSignals(True)
+        self.model_combo.clear()
+        self.model_combo.addItems(models)
+        index = self.model_combo.findText(selected) if selected else -1
+        self.model_combo.setCurrentIndex(index if index >= 0 else 0 if models else -1)
+        self.model_combo.blockSignals(False)
+        self.on_model_changed(self.model_combo.currentText())
+
+    def on_models_loaded(self, models):
+        # Aynı sunucuya ait olmayan (adres değişmeden önce başlamış) yanıt yok sayılır
+        if self.sender() is not self.model_thread:
+            return
+        self.server_status_label.setText("🟢 LM Studio")
+        self.server_status_label.setToolTip(f"{self.lm_studio_url} — {len(models)} model")
+        existing = [self.model_combo.itemText(i) for i in range(self.model_combo.count())]
+        if models != existing:
+            self.populate_models(models)
+        if models != self.settings.get("cached_models"):
+            self.settings.set("cached_models", models)
+            self.settings.save()
+
+    def on_models_error(self, error_msg):
+        if self.sender() is not self.model_thread:
+            return
+        # Bağlantı hatası kalıcı bir simgeyle gösterilir; önbellekteki liste korunur
+        self.server_status_label.setText("🔴 LM Studio")
+        self.server_status_label.setToolTip(
+            f"LM Studio'ya bağlanılamadı.\nURL: {self.lm_studio_url}\nHata: {error_msg}")
+
+    def change_server_url(self):
+        url = self.server_url_input.text().strip().rstrip("/") or LM_STUDIO_DEFAULT_URL
+        if url == self.lm_studio_url:
+            return
+        if not url.startswith(("http://", "https://")):
+            self.statusBar().showMessage("⚠️ Sunucu adresi http:// veya https:// ile başlamalı", 5000)
+            self.server_url_input.setText(self.lm_studio_url)
+            return
+        
+        self.lm_studio_url = url
+        self.server_url_input.setText(url)
+        self.settings.set("lm_studio_url", url)
+        self.settings.save()
+        # Süren istek eski istemciyle tamamlanır, yenileri yeni havuzu kullanır
+        self.engine.client = LMStudioClient.from_settings(self.settings)
+        self.server_status_label.setText("⚪ LM Studio")
+        # Eski sunucuya giden istek bitene kadar saklanır, sonucu yok sayılır
+        if self.model_thread is not None and self.model_thread.isRunning():
+            stale = self.model_thread
+            self.stale_model_threads.append(stale)
+            stale.finished.connect(lambda: self.stale_model_threads.remove(stale))
+        self.model_thread = None
+        self.load_models()
 
     def on_model_changed(self, model_name):
         self.current_model = model_name
+        if model_name:
+            self.settings.set("last_model", model_name)
 
     def send_message(self):
         message = self.message_input.text().strip()
@@ -748,10 +2014,8 @@ class LMStudioRAGChat(QMainWindow):
         if self.is_new_chat:
             self.is_new_chat = False
             title = (message[:30] + '...') if len(message) > 30 else message
-            item = QListWidgetItem(title)
-            item.setData(Qt.ItemDataRole.UserRole, self.current_chat_id)
-            self.chat_list.insertItem(0, item)
-            self.chat_list.setCurrentItem(item)
+            self.chat_list_model.touch(self.current_chat_id, title)
+            self.chat_list.setCurrentIndex(self.chat_list_model.index(0))
         
         self.message_input.clear()
         
@@ -762,118 +2026,211 @@ class LMStudioRAGChat(QMainWindow):
         self.expecting_completion = True
         
         # Kullanıcı mesajı
-        escaped_message = message.replace('<', '&lt;').replace('>', '&gt;').replace('\n', '<br>')
-        self.chat_display.append(f"""
-        <div class="user-message">
-            <div style='display: flex; justify-content: flex-end; align-items: flex-start;'>
-                <div style='max-width: 75%; background: linear-gradient(135deg, #1f6feb 0%, #388bfd 50%, #58a6ff 100%); 
-                            padding: 14px 18px; border-radius: 18px 18px 4px 18px; 
-                            box-shadow: 0 4px 12px rgba(31, 111, 235, 0.25), 0 2px 4px rgba(31, 111, 235, 0.15);
-                            position: relative;
-                            backdrop-filter: blur(10px);
-                            border: 1px solid rgba(88, 166, 255, 0.3);'>
-                    <div style='color: #ffffff; font-size: 15px; line-height: 1.7; word-wrap: break-word; 
-                                font-family: "Segoe UI", "SF Pro Display", -apple-system, BlinkMacSystemFont, sans-serif; 
-                                font-weight: 500; letter-spacing: 0.3px;'>
-                        {escaped_message}
-                    </div>
-                    <div style='text-align: right; margin-top: 6px; opacity: 0.75;'>
-                        <span style='font-size: 11px; color: rgba(255, 255, 255, 0.8);'>Siz</span>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="message-divider">
-            <div style='flex: 1; height: 1px; background: linear-gradient(90deg, transparent 0%, #30363d 20%, #30363d 80%, transparent 100%);'></div>
-            <div style='padding: 4px 12px; background: #161b22; border: 1px solid #30363d; border-radius: 12px;'>
-                <span style='font-size: 10px; color: #8b949e; letter-spacing: 1px; font-weight: 600;'>YANIT</span>
-            </div>
-            <div style='flex: 1; height: 1px; background: linear-gradient(90deg, transparent 0%, #30363d 20%, #30363d 80%, transparent 100%);'></div>
-        </div>
-        """)
+        self.chat_pinned_bottom = True
+        self.chat_model.append_message("user", message, footer="Siz")
         self.chat_history.append({"role": "user", "content": message})
         
-        rag_context = self.search_rag(message)
-        
-        self.chat_display.append("""
-        <div class="assistant-message">
-            <div style='display: flex; align-items: flex-start;'>
-                <div style='width: 40px; height: 40px; 
-                            background: linear-gradient(135deg, #238636 0%, #2ea043 50%, #3fb950 100%); 
-                            border-radius: 50%; display: flex; align-items: center; justify-content: center; 
-                            margin-right: 12px; flex-shrink: 0; 
-                            box-shadow: 0 4px 12px rgba(35, 134, 54, 0.3), 0 2px 4px rgba(35, 134, 54, 0.2);
-                            border: 2px solid rgba(63, 185, 80, 0.4);'>
-                    <span style='font-size: 20px;'>🤖</span>
-                </div>
-                <div style='flex: 1; max-width: calc(100% - 52px);'>
-                    <div style='background: linear-gradient(135deg, #161b22 0%, #1c2128 100%); 
-                                padding: 14px 18px; border-radius: 18px 18px 18px 4px; 
-                                border: 1px solid #30363d; 
-                                box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3), 0 2px 4px rgba(0, 0, 0, 0.2);
-                                position: relative;'>
-                        <div style='color: #e6edf3; font-size: 15px; line-height: 1.8; word-wrap: break-word; 
-                                    font-family: "Segoe UI", "SF Pro Display", -apple-system, BlinkMacSystemFont, sans-serif; 
-                                    font-weight: 400; letter-spacing: 0.2px;'>""")
-        
         self.current_response = ""
-        self.response_start_pos = self.chat_display.textCursor().position()
+        # Biçimlendirilmiş bloklar yalnızca sona eklenir; görünüm belgeyi artımlı günceller
+        self.stream_blocks = []
+        self.stream_row = self.chat_model.append_message("assistant", "", stream_blocks=self.stream_blocks)
+        self.pending_chunks = []
+        self.rendered_chunk_count = 0
+        self.stream_started_at = None
+        self.stream_splitter = MarkdownBlockSplitter()
+        self.prompt_tokens = None
+        self.request_started_at = time.perf_counter()
         
+        self.statusBar().showMessage("🔎 RAG'da aranıyor...")
         self.chat_thread = ChatThread(
-            self.lm_studio_url, 
+            self.engine, 
             self.current_model, 
             self.chat_history,
-            use_rag=bool(rag_context),
-            rag_context=rag_context
+            context_budget=self.context_budget_spin.value(),
+            bases=self.chat_bases
         )
+        self.chat_thread.retrieval_finished.connect(self.on_retrieval_finished)
+        self.chat_thread.context_built.connect(self.on_context_built)
+        self.chat_thread.rag_context_sent.connect(self.on_rag_context_sent)
         self.chat_thread.response_chunk.connect(self.on_response_chunk)
         self.chat_thread.response_received.connect(self.on_response_complete)
         self.chat_thread.error_occurred.connect(self.on_error)
         self.chat_thread.start()
 
+    def render_chat_history(self):
+        """Ekranı kayıtlı mesajlardan yeniden oluşturur."""
+        self.chat_pinned_bottom = True
+        self.chat_model.set_messages(self.chat_history)
+        self.chat_display.scrollToBottom()
+
+    def on_chat_scrolled(self, value):
+        self.chat_pinned_bottom = value >= self.chat_display.verticalScrollBar().maximum() - 4
+
+    def on_chat_range_changed(self, minimum, maximum):
+        if self.chat_pinned_bottom:
+            self.chat_display.verticalScrollBar().setValue(maximum)
+
+    def selected_message_text(self):
+        index = self.chat_display.currentIndex()
+        return index.data(Qt.ItemDataRole.DisplayRole) if index.isValid() else ""
+
+    def copy_selected_message(self):
+        text = self.selected_message_text()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def show_message_menu(self, pos):
+        index = self.chat_display.indexAt(pos)
+        if not index.isValid():
+            return
+        self.chat_display.setCurrentIndex(index)
+        menu = QMenu(self)
+        copy_action = menu.addAction("📋 Mesajı Kopyala")
+        copy_action.triggered.connect(self.copy_selected_message)
+        menu.exec(self.chat_display.viewport().mapToGlobal(pos))
+
+    def on_retrieval_finished(self, chunk_count, elapsed_ms):
+        self.statusBar().showMessage(
+            f"🔎 RAG araması: {elapsed_ms:.0f} ms · {chunk_count} parça · "
+            f"önbellek {self.rag_cache.hits} isabet / {self.rag_cache.misses} ıska · "
+            f"sorgu vektörü {self.rag_cache.embedding_hits} isabet"
+        )
+
+    def on_rag_context_sent(self, rag_context):
+        # Asistan yanıtı henüz eklenmediği için son mesaj bu isteğin sorusudur
+        if self.expecting_completion and self.chat_history and self.chat_history[-1]["role"] == "user":
+            self.chat_history[-1]["context"] = rag_context
+
+    def on_context_built(self, prompt_tokens, summarized, dropped):
+        if not self.expecting_completion:
+            return
+        self.prompt_tokens = prompt_tokens
+        text = f"📝 İstem ~{prompt_tokens} token"
+        if summarized or dropped:
+            text += f" · {summarized} özetlendi · {dropped} atıldı"
+        self.prompt_tokens_label.setText(text)
+
     def on_response_chunk(self, chunk):
-        self.current_response += chunk
-        cursor = self.chat_display.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        cursor.insertText(chunk)
-        self.chat_display.setTextCursor(cursor)
-        self.chat_display.ensureCursorVisible()
+        # Durdurulduktan sonra kuyrukta kalan parçaları yok say
+        if not self.expecting_completion:
+            return
+        if self.stream_started_at is None:
+            self.stream_started_at = time.perf_counter()
+        self.pending_chunks.append(chunk)
+        if not self.render_timer.isActive():
+            self.render_timer.start()
+
+    def flush_pending_chunks(self):
+        """Biriken parçaları tek seferde ekler; yerleşim kare başına bir kez yapılır."""
+        if not self.pending_chunks:
+            self.render_timer.stop()
+            return
+        
+        text = "".join(self.pending_chunks)
+        self.rendered_chunk_count += len(self.pending_chunks)
+        self.pending_chunks = []
+        self.current_response += text
+        
+        # Yalnızca yeni tamamlanan bloklar biçimlendirilir, öncekilere dokunulmaz
+        blocks = self.stream_splitter.feed(text)
+        if blocks:
+            self.stream_blocks.append(self.format_response("".join(blocks)))
+        self.chat_model.update_message(
+            self.stream_row,
+            content=self.current_response,
+            stream_tail=self.stream_splitter.tail
+        )
+        
+        elapsed = time.perf_counter() - self.stream_started_at
+        if elapsed > 0:
+            self.render_rate_label.setText(f"⚡ {self.rendered_chunk_count / elapsed:.0f} token/sn işlendi")
+
+    def finish_stream_message(self, content, stopped=False):
+        """Açık kalan son bloğu biçimlendirir; maliyet yalnızca son blokla orantılıdır."""
+        render_started = time.perf_counter()
+        tail = self.stream_splitter.flush()
+        if tail.strip():
+            self.stream_blocks.append(self.format_response(tail))
+        metrics = self.record_request_metrics(stopped, (time.perf_counter() - render_started) * 1000)
+        
+        footer = "⚠️ Yanıt durduruldu" if stopped else "✓ Yanıt tamamlandı"
+        if self.prompt_tokens is not None:
+            footer += f" · istem ~{self.prompt_tokens} token"
+        if metrics.get("ttft_ms") is not None:
+            footer += f" · ilk token {metrics['ttft_ms']:.0f} ms"
+        if metrics.get("tokens_per_sec") is not None:
+            footer += f" · {metrics['tokens_per_sec']:.0f} token/sn"
+        self.chat_model.update_message(
+            self.stream_row,
+            content=content,
+            html="".join(self.stream_blocks),
+            stream_tail="",
+            stopped=stopped,
+            footer=footer
+        )
+
+    def record_request_metrics(self, stopped, render_ms):
+        """İsteğin aşama sürelerini ölçüm dosyasına ekler ve durum çubuğunda gösterir."""
+        thread = getattr(self, 'chat_thread', None)
+        metrics = {"ts": time.time(), "model": self.current_model, "stopped": stopped}
+        if thread is not None:
+            metrics.update(thread.metrics)
+        metrics["render_ms"] = round(render_ms, 1)
+        if self.request_started_at is not None:
+            metrics["total_ms"] = round((time.perf_counter() - self.request_started_at) * 1000, 1)
+        self.metrics_log.append(metrics)
+        
+        parts = []
+        if "retrieval_ms" in metrics:
+            detail = f"{metrics['retrieved_chunks']} parça"
+            if "candidates" in metrics:
+                detail += f" / {metrics['candidates']} aday"
+            if metrics.get("bases", 1) > 1:
+                detail += f", {metrics['bases']} taban"
+            if "keyword_ms" in metrics:
+                detail += f", vektör {metrics['vector_ms']:.0f} ms, BM25 {metrics['keyword_ms']:.1f} ms"
+            parts.append(f"RAG {metrics['retrieval_ms']:.0f} ms ({detail})")
+        if "ttft_ms" in metrics:
+            parts.append(f"ilk token {metrics['ttft_ms']:.0f} ms")
+        if "tokens_per_sec" in metrics:
+            parts.append(f"{metrics['tokens']} token · {metrics['tokens_per_sec']:.0f} token/sn")
+        if "generation_ms" in metrics:
+            parts.append(f"üretim {metrics['generation_ms'] / 1000:.1f} sn")
+        parts.append(f"render {metrics['render_ms']:.0f} ms")
+        if "total_ms" in metrics:
+            parts.append(f"toplam {metrics['total_ms'] / 1000:.1f} sn")
+        self.statusBar().showMessage("⏱ " + " · ".join(parts))
+        self.update_stats_panel()
+        return metrics
+
+    def update_stats_panel(self):
+        summary = self.metrics_log.summary(tuple(STATS_LABELS))
+        if not summary:
+            self.stats_label.setText("Henüz ölçülmüş bir istek yok.")
+            return
+        rows = "".join(
+            f"<tr><td style='{TD_STYLE}'>{label}</td><td style='{TD_STYLE}' align='right'>{count}</td>"
+            f"<td style='{TD_STYLE}' align='right'>{p50:g} {unit}</td>"
+            f"<td style='{TD_STYLE}' align='right'>{p95:g} {unit}</td></tr>"
+            for field, (label, unit) in STATS_LABELS.items() if field in summary
+            for count, p50, p95 in [summary[field]]
+        )
+        self.stats_label.setText(
+            f"<table style='{TABLE_STYLE}'><tr><th style='{TH_STYLE}'>Aşama</th>"
+            f"<th style='{TH_STYLE}'>İstek</th><th style='{TH_STYLE}'>p50</th>"
+            f"<th style='{TH_STYLE}'>p95</th></tr>{rows}</table>"
+        )
 
     def on_response_complete(self, full_response):
         # Eğer durdurma butonuna basıldıysa ve bu fonksiyon sonradan çağrılıyorsa engelle
         if not self.expecting_completion:
             return
+        
+        self.flush_pending_chunks()
+        self.render_timer.stop()
 
-        # Akış sırasında eklenen metni seç ve sil
-        cursor = self.chat_display.textCursor()
-        cursor.setPosition(self.response_start_pos)
-        # Seçimi yap: self.current_response uzunluğu kadar karakter
-        cursor.movePosition(QTextCursor.MoveOperation.Right, 
-                            QTextCursor.MoveMode.KeepAnchor, 
-                            len(self.current_response))
-        # Seçili metni sil
-        cursor.removeSelectedText()
-
-        # Formatlanmış metni ekle
-        formatted_html = self.format_response(full_response)
-        cursor.insertHtml(formatted_html)
-        
-        # Kapanış HTML'ini ekle
-        cursor.insertHtml("""
-                        </div>
-                        <div style='text-align: left; margin-top: 8px; padding-top: 8px; 
-                                    border-top: 1px solid rgba(48, 54, 61, 0.5);'>
-                            <span style='font-size: 11px; color: #8b949e; opacity: 0.8;'>
-                                ✓ Yanıt tamamlandı
-                            </span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        <br>
-        """)
+        # Önceki bloklar akış sırasında biçimlendirildi, yalnızca son blok kaldı
+        self.finish_stream_message(full_response)
         
         self.chat_history.append({"role": "assistant", "content": full_response})
         self.send_btn.setEnabled(True)
@@ -882,156 +2239,379 @@ class LMStudioRAGChat(QMainWindow):
         self.current_response = ""
         self.expecting_completion = False
         
-        cursor = self.chat_display.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.chat_display.setTextCursor(cursor)
-        
         self.save_chat()
 
     def stop_generation(self):
+        # Yanıt bekleniyorsa (iş parçacığı bitmiş ama sinyali işlenmemiş olsa bile) durdur
+        if not self.expecting_completion:
+            return
         if hasattr(self, 'chat_thread') and self.chat_thread.isRunning():
             self.chat_thread.stop()
-            self.expecting_completion = False
-            
-            # UI Durumu güncelle
-            self.send_btn.setEnabled(True)
-            self.stop_btn.setEnabled(False)
-            self.message_input.setEnabled(True)
-            self.message_input.setFocus()
-            
-            # Akış sırasında eklenen metni seç ve sil, formatlanmış halini ekle
-            if self.current_response:
-                cursor = self.chat_display.textCursor()
-                cursor.setPosition(self.response_start_pos)
-                cursor.movePosition(QTextCursor.MoveOperation.Right, 
-                                    QTextCursor.MoveMode.KeepAnchor, 
-                                    len(self.current_response))
-                cursor.removeSelectedText()
-                formatted_html = self.format_response(self.current_response)
-                cursor.insertHtml(formatted_html)
-            
-            # Görsel olarak durdurulduğunu belirt
-            cursor.insertHtml("""
-                        </div>
-                        <div style='text-align: left; margin-top: 8px; padding-top: 8px; 
-                                    border-top: 1px solid rgba(218, 54, 51, 0.5);'>
-                            <span style='font-size: 11px; color: #f85149; opacity: 0.9;'>
-                                ⚠️ Yanıt durduruldu
-                            </span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            <br>
-            """)
-            self.chat_display.setTextCursor(cursor)
-            
-            if self.current_response:
-                self.chat_history.append({"role": "assistant", "content": self.current_response})
-                self.save_chat()
-                self.current_response = ""
+        self.flush_pending_chunks()
+        self.render_timer.stop()
+        self.expecting_completion = False
+        
+        # UI Durumu güncelle
+        self.send_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.message_input.setEnabled(True)
+        self.message_input.setFocus()
+        
+        # Akış sırasında kalan son bloğu biçimlendir ve durdurulduğunu belirt
+        self.finish_stream_message(self.current_response, stopped=True)
+        
+        if self.current_response:
+            self.chat_history.append({"role": "assistant", "content": self.current_response})
+            self.save_chat()
+            self.current_response = ""
 
     def on_error(self, error_msg):
+        was_streaming = self.expecting_completion
+        self.flush_pending_chunks()
+        self.render_timer.stop()
         self.expecting_completion = False
         self.send_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.message_input.setEnabled(True)
 
-        escaped_error = error_msg.replace('<', '&lt;').replace('>', '&gt;')
-        self.chat_display.append(f"""
-        <div style='margin: 20px 60px; text-align: center;'>
-            <div style='display: inline-block; 
-                        background: linear-gradient(135deg, #da3633 0%, #f85149 100%); 
-                        padding: 12px 20px; border-radius: 20px; 
-                        box-shadow: 0 4px 12px rgba(248, 81, 73, 0.3), 0 2px 4px rgba(248, 81, 73, 0.2);
-                        border: 1px solid rgba(255, 255, 255, 0.15);
-                        animation: shake 0.5s ease-in-out;'>
-                <span style='color: #ffffff; font-size: 14px; font-weight: 500;
-                            font-family: "Segoe UI", Arial, sans-serif;'>
-                    ⚠️ {escaped_error}
-                </span>
-            </div>
-        </div>
-        <br>
-        """)
+        # Hiç yanıt gelmediyse boş balonu kaldır, kısmi yanıt varsa durdurulmuş say
+        if was_streaming:
+            if self.current_response:
+                self.finish_stream_message(self.current_response, stopped=True)
+            else:
+                self.chat_model.remove_message(self.stream_row)
+        self.chat_model.append_message("error", f"⚠️ {error_msg}")
+        # Soru kaydedilir; yeni sohbetin listedeki satırı dizinde karşılıksız kalmaz
+        self.save_chat()
+
+    def open_rag_store(self):
+        self.store_thread = VectorStoreThread(self.engine, self.settings)
+        self.store_thread.store_ready.connect(self.on_rag_store_ready)
+        self.store_thread.error_occurred.connect(self.on_rag_store_error)
+        self.store_thread.start()
+
+    def on_rag_store_ready(self):
+        self.populate_base_combo()
+        self.set_rag_enabled(True)
+        self.load_rag_list()
+
+    def on_rag_store_error(self, error_msg):
+        self.rag_count_label.setText("Vektör deposu açılamadı")
+        self.rag_count_label.setToolTip(error_msg)
+        self.statusBar().showMessage(f"⚠️ RAG kullanılamıyor: {error_msg}", 10000)
+
+    def set_rag_enabled(self, enabled):
+        for widget in (self.add_rag_btn, self.import_files_btn, self.import_folder_btn,
+                       self.delete_rag_btn, self.delete_source_btn, self.clear_all_rag_btn,
+                       self.rag_filter_input, self.base_combo, self.new_base_btn, self.delete_base_btn):
+            widget.setEnabled(enabled)
+
+    def is_ingesting(self):
+        return self.ingest_thread is not None and self.ingest_thread.isRunning()
 
     def add_to_rag(self):
         content = self.rag_input.toPlainText().strip()
         if not content:
             QMessageBox.warning(self, "Uyarı", "Lütfen eklemek için bir bilgi yazın.")
             return
+        if self.is_ingesting():
+            return
         
-        try:
-            doc_id = str(uuid.uuid4())
-            self.collection.add(
-                documents=[content],
-                ids=[doc_id],
-                metadatas=[{"timestamp": str(uuid.uuid4())}]
-            )
+        self.set_ingest_busy(True)
+        
+        # Parçalama ve gömme işlemi arayüzü kilitlememesi için arka planda yapılır
+        self.ingest_thread = IngestThread(
+            self.engine,
+            content,
+            chunk_size=self.chunk_size_spin.value(),
+            overlap=self.chunk_overlap_spin.value()
+        )
+        self.ingest_thread.progress.connect(self.on_ingest_progress)
+        self.ingest_thread.ingest_finished.connect(self.on_ingest_finished)
+        self.ingest_thread.error_occurred.connect(self.on_ingest_error)
+        self.ingest_thread.start()
+
+    def import_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "İçe Aktarılacak Dosyalar", "",
+            "Belgeler (*.txt *.md *.markdown *.html *.htm *.pdf)"
+        )
+        if paths:
+            self.start_file_import(paths)
+
+    def import_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "İçe Aktarılacak Klasör")
+        if folder:
+            self.start_file_import([folder])
+
+    def start_file_import(self, paths):
+        if self.is_ingesting():
+            return
+        
+        self.set_ingest_busy(True)
+        self.import_stats_label.setText("Dosyalar taranıyor...")
+        self.import_stats_label.setVisible(True)
+        
+        self.ingest_thread = FileImportThread(
+            self.engine,
+            paths,
+            chunk_size=self.chunk_size_spin.value(),
+            overlap=self.chunk_overlap_spin.value()
+        )
+        self.ingest_thread.import_progress.connect(self.on_import_progress)
+        self.ingest_thread.ingest_finished.connect(self.on_ingest_finished)
+        self.ingest_thread.error_occurred.connect(self.on_ingest_error)
+        self.ingest_thread.start()
+
+    def cancel_ingest(self):
+        if self.is_ingesting():
+            self.ingest_thread.stop()
+            self.cancel_ingest_btn.setEnabled(False)
+
+    def set_ingest_busy(self, busy):
+        self.add_rag_btn.setEnabled(not busy)
+        self.import_files_btn.setEnabled(not busy)
+        self.import_folder_btn.setEnabled(not busy)
+        # Aktarılan taban silinmesin, liste başka tabana geçmesin
+        self.base_combo.setEnabled(not busy)
+        self.new_base_btn.setEnabled(not busy)
+        self.delete_base_btn.setEnabled(not busy)
+        self.cancel_ingest_btn.setEnabled(busy)
+        # Toplam bilinene kadar belirsiz ilerleme göster
+        self.ingest_progress.setRange(0, 0)
+        self.ingest_progress.setVisible(busy)
+
+    def reset_ingest_ui(self):
+        self.set_ingest_busy(False)
+        self.import_stats_label.setVisible(False)
+
+    def on_import_progress(self, files_done, chunks_done, files_per_sec, chunks_per_sec):
+        self.import_stats_label.setText(
+            f"{files_done} dosya · {chunks_done} parça · "
+            f"{files_per_sec:.1f} dosya/sn · {chunks_per_sec:.0f} parça/sn"
+        )
+
+    def on_ingest_progress(self, done, total):
+        self.ingest_progress.setMaximum(max(total, 1))
+        self.ingest_progress.setValue(done)
+        self.ingest_progress.setFormat(f"{done} / {total} parça")
+
+    def on_ingest_finished(self, added, cancelled):
+        thread = self.ingest_thread
+        self.reset_ingest_ui()
+        self.load_rag_list()
+        
+        if isinstance(thread, FileImportThread):
+            summary = f"{thread.files_done} dosyadan {added} parça eklendi."
+            if thread.failed_files:
+                failed = "\n".join(f"{os.path.basename(path)}: {error}"
+                                   for path, error in thread.failed_files[:10])
+                summary += f"\n\n{len(thread.failed_files)} dosya okunamadı:\n{failed}"
+            title = "İptal" if cancelled else "Başarılı"
+            QMessageBox.information(self, title, summary)
+        elif cancelled:
+            QMessageBox.information(self, "İptal", "İçe aktarma iptal edildi.")
+        else:
             self.rag_input.clear()
-            self.load_rag_list()
-            QMessageBox.information(self, "Başarılı", "Bilgi RAG'a eklendi!")
+            QMessageBox.information(self, "Başarılı", f"Bilgi RAG'a eklendi! ({added} parça)")
+
+    def on_ingest_error(self, error_msg):
+        self.reset_ingest_ui()
+        self.load_rag_list()
+        QMessageBox.critical(self, "Hata", error_msg)
+
+    def on_retrieval_settings_changed(self):
+        # Önbellek anahtarı bu ayarları içerdiği için eski sonuçlar kullanılmaz
+        self.engine.top_k = self.rag_top_k_spin.value()
+        self.engine.max_distance = self.rag_distance_spin.value()
+        self.engine.mmr_lambda = self.rag_mmr_spin.value()
+        self.settings.set("rag_top_k", self.engine.top_k)
+        self.settings.set("rag_max_distance", self.engine.max_distance)
+        self.settings.set("rag_mmr_lambda", self.engine.mmr_lambda)
+
+    def populate_base_combo(self):
+        self.base_combo.blockSignals(True)
+        self.base_combo.clear()
+        self.base_combo.addItems(self.engine.base_names())
+        self.base_combo.setCurrentText(self.engine.active_base)
+        self.base_combo.blockSignals(False)
+
+    def on_base_selected(self, name):
+        if not name or name == self.engine.active_base:
+            return
+        self.engine.set_active_base(name)
+        self.settings.set("knowledge_base", name)
+        self.load_rag_list()
+
+    def create_knowledge_base(self):
+        name, ok = QInputDialog.getText(self, "Yeni Bilgi Tabanı", "Bilgi tabanının adı:")
+        if not ok:
+            return
+        try:
+            base = self.engine.create_base(name)
         except Exception as e:
-            QMessageBox.critical(self, "Hata", f"RAG'a eklenirken hata: {str(e)}")
+            QMessageBox.warning(self, "Uyarı", str(e))
+            return
+        self.populate_base_combo()
+        self.base_combo.setCurrentText(base.name)
 
-    def search_rag(self, query):
+    def delete_knowledge_base(self):
+        name = self.engine.active_base
+        reply = QMessageBox.question(self, "Onay",
+                                     f"\"{name}\" bilgi tabanı tüm bilgileriyle birlikte silinsin mi?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=3
-            )
-            if results['documents'] and results['documents'][0]:
-                return "\n\n".join(results['documents'][0])
-            return ""
+            self.engine.delete_base(name)
         except Exception as e:
-            print(f"RAG arama hatası: {e}")
-            return ""
+            QMessageBox.warning(self, "Uyarı", str(e))
+            return
+        self.settings.set("knowledge_base", self.engine.active_base)
+        if name in self.chat_bases:
+            self.chat_bases = [base for base in self.chat_bases if base != name]
+            self.update_chat_bases_button()
+        self.populate_base_combo()
+        self.load_rag_list()
+
+    def populate_chat_bases_menu(self):
+        self.chat_bases_menu.clear()
+        names = self.engine.base_names()
+        if not names:
+            action = self.chat_bases_menu.addAction("Vektör deposu henüz açılmadı")
+            action.setEnabled(False)
+            return
+        for name in names:
+            action = QAction(name, self.chat_bases_menu, checkable=True)
+            action.setChecked(name in self.chat_bases)
+            action.toggled.connect(lambda checked, name=name: self.toggle_chat_base(name, checked))
+            self.chat_bases_menu.addAction(action)
+
+    def toggle_chat_base(self, name, checked):
+        bases = [base for base in self.chat_bases if base != name]
+        if checked:
+            bases.append(name)
+        self.chat_bases = bases
+        self.update_chat_bases_button()
+
+    def update_chat_bases_button(self):
+        if not self.chat_bases:
+            self.chat_bases_btn.setText("📚 RAG kapalı")
+        elif len(self.chat_bases) == 1:
+            self.chat_bases_btn.setText(f"📚 {self.chat_bases[0]}")
+        else:
+            self.chat_bases_btn.setText(f"📚 {len(self.chat_bases)} taban")
+        self.chat_bases_btn.setToolTip("Bu sohbette aranacak bilgi tabanları:\n" +
+                                       ("\n".join(self.chat_bases) or "yok"))
 
     def load_rag_list(self):
-        self.rag_list.clear()
+        """Listeyi sıfırlar; belgeler kaydırıldıkça sayfa sayfa yüklenir."""
+        self.rag_model.set_collection(self.collection)
+        self.rag_model.reload()
+
+    def apply_rag_filter(self):
+        self.rag_model.set_filter(self.rag_filter_input.text())
+
+    def update_rag_count_label(self):
+        loaded = self.rag_model.rowCount()
+        if self.rag_model.filter_text:
+            more = "+" if self.rag_model.canFetchMore() else ""
+            self.rag_count_label.setText(f"Toplam {self.rag_model.total} kayıt · {loaded}{more} eşleşme")
+        else:
+            self.rag_count_label.setText(f"Toplam {self.rag_model.total} kayıt · {loaded} gösteriliyor")
+
+    def selected_rag_indexes(self):
+        return self.rag_list.selectionModel().selectedIndexes()
+
+    def delete_rag(self):
+        indexes = self.selected_rag_indexes()
+        if not indexes:
+            QMessageBox.warning(self, "Uyarı", "Lütfen silmek için bir bilgi seçin.")
+            return
+        
+        doc_ids = {index.data(Qt.ItemDataRole.UserRole) for index in indexes}
+        
         try:
-            all_docs = self.collection.get()
-            for doc_id, content in zip(all_docs['ids'], all_docs['documents']):
-                preview = content[:100] + "..." if len(content) > 100 else content
-                self.rag_list.addItem(f"[{doc_id[:8]}] {preview}")
+            # Tam kimliklerle tek seferde sil, koleksiyonu yeniden okuma
+            self.engine.delete_chunks(ids=list(doc_ids))
+            self.rag_model.total = max(0, self.rag_model.total - len(doc_ids))
+            self.rag_model.remove_rows_where(lambda doc_id, meta: doc_id in doc_ids)
+            self.update_rag_count_label()
+            QMessageBox.information(self, "Başarılı", f"{len(doc_ids)} bilgi silindi!")
         except Exception as e:
-            print(f"RAG yükleme hatası: {e}")
+            QMessageBox.critical(self, "Hata", f"Silme hatası: {str(e)}")
 
-    def delete_rag(self):
-        current_item = self.rag_list.currentItem()
-        if not current_item:
+    def delete_rag_by_source(self):
+        indexes = self.selected_rag_indexes()
+        if not indexes:
             QMessageBox.warning(self, "Uyarı", "Lütfen silmek için bir bilgi seçin.")
             return
         
-        text = current_item.text()
-        doc_id_short = text.split("]")[0].strip("[")
+        # Dosyadan gelenler kaynak yoluna, elle eklenenler belge kimliğine göre gruplanır
+        sources = sorted({index.data(RAG_SOURCE_ROLE) for index in indexes} - {None})
+        doc_groups = sorted({index.data(RAG_DOC_ID_ROLE) for index in indexes
+                             if index.data(RAG_SOURCE_ROLE) is None} - {None})
+        if not sources and not doc_groups:
+            QMessageBox.warning(self, "Uyarı", "Seçili bilgilerin kaynak bilgisi yok.")
+            return
+        
+        names = [os.path.basename(source) for source in sources[:10]]
+        names += [f"Metin [{doc_id[:8]}]" for doc_id in doc_groups[:10]]
+        reply = QMessageBox.question(self, "Onay",
+                                     "Şu kaynaklardan eklenen tüm parçalar silinsin mi?\n\n" + "\n".join(names),
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        clauses = []
+        if sources:
+            clauses.append({"source": {"$in": sources}})
+        if doc_groups:
+            clauses.append({"doc_id": {"$in": doc_groups}})
+        where = clauses[0] if len(clauses) == 1 else {"$or": clauses}
         
         try:
-            all_docs = self.collection.get()
-            for full_id in all_docs['ids']:
-                if full_id.startswith(doc_id_short):
-                    self.collection.delete(ids=[full_id])
-                    self.load_rag_list()
-                    QMessageBox.information(self, "Başarılı", "Bilgi silindi!")
-                    return
+            deleted = self.engine.delete_chunks(where=where)
+            self.rag_model.total = max(0, self.rag_model.total - deleted)
+            source_set, doc_set = set(sources), set(doc_groups)
+            self.rag_model.remove_rows_where(
+                lambda doc_id, meta: meta.get("source") in source_set
+                or (meta.get("source") is None and meta.get("doc_id") in doc_set)
+            )
+            self.update_rag_count_label()
+            QMessageBox.information(self, "Başarılı", f"{deleted} parça silindi!")
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Silme hatası: {str(e)}")
 
     def clear_all_rag(self):
+        if self.is_ingesting():
+            QMessageBox.warning(self, "Uyarı", "İçe aktarma sürerken RAG temizlenemez.")
+            return
+        name = self.engine.active_base
         reply = QMessageBox.question(self, "Onay", 
-                                     "Tüm RAG bilgilerini silmek istediğinizden emin misiniz?",
+                                     f"\"{name}\" bilgi tabanındaki tüm bilgileri silmek istediğinizden emin misiniz?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                self.chroma_client.delete_collection("rag_knowledge")
-                self.collection = self.chroma_client.create_collection("rag_knowledge")
+                self.engine.reset_store()
                 self.load_rag_list()
-                QMessageBox.information(self, "Başarılı", "Tüm RAG bilgileri temizlendi!")
+                QMessageBox.information(self, "Başarılı", f"\"{name}\" bilgi tabanı temizlendi!")
             except Exception as e:
                 QMessageBox.critical(self, "Hata", f"Temizleme hatası: {str(e)}")
     
     def closeEvent(self, event):
+        self.model_poll_timer.stop()
+        self.stop_generation()
+        if hasattr(self, 'chat_thread'):
+            self.chat_thread.wait(2000)
+        for thread in [self.model_thread, self.store_thread, *self.stale_model_threads]:
+            if thread is not None:
+                thread.wait(2000)
+        if self.is_ingesting():
+            self.ingest_thread.stop()
+            self.ingest_thread.wait()
         self.save_chat()
+        self.settings.save()
         event.accept()
 
 if __name__ == "__main__":
@@ -0,0 +1,387 @@
+"""Sohbet yanıtları için Qt'den bağımsız markdown -> HTML dönüştürücü.
+
+MarkdownRenderer yanıtı stilleri gömülü HTML'e çevirir; MarkdownBlockSplitter
+akan yanıtı tamamlanmış bloklara ayırır. Arayüz (lmRagStudio.py) ikisini de
+buradan kullanır; ekran gerektirmedikleri için testlerde ve kıyaslamalarda
+PyQt6 olmadan çalışırlar.
+"""
+import hashlib
+import html
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Biçimlendirme stilleri (sohbet temasıyla uyumlu)
+CODE_BLOCK_STYLE = "background-color: #161b22; border: 1px solid #30363d; border-radius: 6px; padding: 12px; overflow-x: auto; margin: 10px 0;"
+INLINE_CODE_STYLE = "background-color: #0d1117; border: 1px solid #30363d; border-radius: 3px; padding: 2px 6px; font-family: 'Courier New', monospace;"
+TABLE_STYLE = "border-collapse: collapse; width: 100%; margin: 15px 0;"
+TH_STYLE = "border: 1px solid #30363d; padding: 8px; background-color: #0d1117;"
+TD_STYLE = "border: 1px solid #30363d; padding: 8px;"
+BLOCKQUOTE_STYLE = "border-left: 3px solid #30363d; margin: 10px 0; padding-left: 12px; color: #8b949e;"
+RENDER_CACHE_SIZE = 512
+
+class MarkdownRenderer:
+    """Markdown'ı tek geçişte, stilleri gömülü HTML'e çeviren önbellekli dönüştürücü.
+
+    Satırlar bir kez dolaşılır ve çıktı listede biriktirilir; kapanmayan
+    biçim işaretleri de dahil maliyet metin uzunluğuyla doğrusaldır. Aynı
+    metin tekrar istenirse içerik özetine göre önbellekten döner.
+    """
+    _FENCE = re.compile(r'^\s*(`{3,}|~{3,})\s*([\w+#.-]*)')
+    _HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+    _HR = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+    _TABLE_SEP = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+    _LIST_ITEM = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)$')
+    _QUOTE = re.compile(r'^\s*>\s?(.*)$')
+    # Satır içi öğeler bu karakterlerden biriyle başlar
+    _MARKER = re.compile(r'[`*_~\[]')
+    _TICKS = re.compile(r'`+')
+    _PAIRS = {'**': 'b', '__': 'b', '~~': 's'}
+    # URL içinde bir düzey dengeli parantez olabilir (ör. Vikipedi bağlantıları)
+    _LINK_URL = re.compile(r'\((?P<url>(?:[^()\s]|\([^()\s]*\))+)\)')
+    # Tek '*' / '_' vurgusu: açılış sözcük içinde olmamalı ve ardından boşluk
+    # gelmemeli, kapanış boşluktan sonra gelmemeli ve sözcüğe bitişik olmamalı
+    _EM_OPEN = {'*': re.compile(r'(?<![\w*])\*(?![\s*])'), '_': re.compile(r'(?<!\w)_(?![\s_])')}
+    _EM_CLOSE = {'*': re.compile(r'(?<![\s*])\*(?![\w*])'), '_': re.compile(r'(?<![\s_])_(?!\w)')}
+    _SAFE_URL = re.compile(r'^(https?://|mailto:)', re.IGNORECASE)
+
+    def __init__(self, cache_size=RENDER_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def render(self, text):
+        """Metni HTML'e çevirir; aynı içerik için önbellekteki sonucu döner."""
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        
+        self.misses += 1
+        html_text = "".join(self._render_blocks(text.replace('\r\n', '\n').split('\n')))
+        if self.cache_size > 0:
+            self._cache[key] = html_text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return html_text
+
+    # --- Satır içi öğeler ---
+
+    def _inline(self, text):
+        """Tek satırlık metnin satır içi biçimlerini HTML'e çevirir.
+
+        Metin soldan sağa bir kez taranır. Her işaret için kapanış ya bir kez
+        aranıp hatırlanır ya da önceden bulunan kapanış konumlarından ikili
+        aramayla seçilir; böylece kapanmayan işaretler ('*a ' * 4000 gibi)
+        satırın geri kalanını tekrar tekrar taramaz.
+        """
+        out = []
+        pos = 0
+        found = {}
+        closers = {}
+
+        def find(marker, start):
+            # Aramalar her işaret için soldan sağa ilerler; önceki sonuç
+            # start'tan sonraysa (ya da hiç yoksa) yeniden aramaya gerek yok
+            index = found.get(marker)
+            if index is None or -1 < index < start:
+                index = found[marker] = text.find(marker, start)
+            return index
+
+        def em_closer(marker, start):
+            positions = closers.get(marker)
+            if positions is None:
+                positions = closers[marker] = [m.start() for m in self._EM_CLOSE[marker].finditer(text)]
+            k = bisect_left(positions, start)
+            return positions[k] if k < len(positions) else -1
+
+        i = 0
+        while True:
+            marker = self._MARKER.search(text, i)
+            if marker is None:
+                break
+            i = marker.start()
+            char = text[i]
+            piece, end = None, -1
+            if char == '`':
+                # Açılış dizisi kapanmazsa daha kısa bir diziyle denenir (``a` gibi)
+                run = len(self._TICKS.match(text, i).group())
+                for size in range(run, 0, -1):
+                    close = find('`' * size, i + size + 1)
+                    if close != -1:
+                        code = html.escape(text[i + size:close].strip(), quote=False)
+                        piece = f'<code style="{INLINE_CODE_STYLE}">{code}</code>'
+                        end = close + size
+                        break
+                else:
+                    i += run
+                    continue
+            elif char == '[':
+                close = find(']', i + 1)
+                link = self._LINK_URL.match(text, close + 1) if close > i + 1 else None
+                if link is not None:
+                    label = self._inline(text[i + 1:close])
+                    url = link.group('url')
+                    if self._SAFE_URL.match(url):
+                        piece = f'<a href="{html.escape(url)}" style="color: #58a6ff;">{label}</a>'
+                    else:
+                        piece = label
+                    end = link.end()
+            else:
+                pair = text[i:i + 2]
+                if pair in self._PAIRS:
+                    close = find(pair, i + 3)
+                    if close != -1:
+                        tag = self._PAIRS[pair]
+                        piece = f'<{tag}>{self._inline(text[i + 2:close])}</{tag}>'
+                        end = close + 2
+                if end == -1 and char in self._EM_OPEN and self._EM_OPEN[char].match(text, i):
+                    close = em_closer(char, i + 2)
+                    if close != -1:
+                        piece = f'<i>{self._inline(text[i + 1:close])}</i>'
+                        end = close + 1
+            if end == -1:
+                i += 1
+                continue
+            out.append(html.escape(text[pos:i], quote=False))
+            out.append(piece)
+            pos = i = end
+        out.append(html.escape(text[pos:], quote=False))
+        return "".join(out)
+
+    # --- Blok öğeler ---
+
+    @staticmethod
+    def _split_row(line):
+        line = line.strip()
+        if line.startswith('|'):
+            line = line[1:]
+        if line.endswith('|'):
+            line = line[:-1]
+        return [cell.strip() for cell in line.split('|')]
+
+    def _render_blocks(self, lines):
+        out = []
+        paragraph = []
+        n = len(lines)
+        i = 0
+
+        def flush_paragraph():
+            if paragraph:
+                out.append(f'<p>{"<br>".join(self._inline(line) for line in paragraph)}</p>')
+                paragraph.clear()
+
+        while i < n:
+            line = lines[i]
+            stripped = line.strip()
+            
+            fence = self._FENCE.match(line)
+            if fence:
+                flush_paragraph()
+                marker = fence.group(1)
+                lang = fence.group(2)
+                code = []
+                i += 1
+                while i < n and not lines[i].strip().startswith(marker):
+                    code.append(lines[i])
+                    i += 1
+                i += 1  # Kapanış satırını atla
+                lang_attr = f' class="language-{html.escape(lang)}"' if lang else ''
+                out.append(f'<pre style="{CODE_BLOCK_STYLE}"><code{lang_attr}>'
+                           f'{html.escape(chr(10).join(code), quote=False)}</code></pre>')
+                continue
+            
+            if not stripped:
+                flush_paragraph()
+                i += 1
+                continue
+            
+            heading = self._HEADING.match(line)
+            if heading:
+                flush_paragraph()
+                level = len(heading.group(1))
+                out.append(f'<h{level}>{self._inline(heading.group(2))}</h{level}>')
+                i += 1
+                continue
+            
+            if self._HR.match(line):
+                flush_paragraph()
+                out.append('<hr>')
+                i += 1
+                continue
+            
+            if '|' in line and i + 1 < n and self._TABLE_SEP.match(lines[i + 1]):
+                flush_paragraph()
+                i = self._render_table(lines, i, out)
+                continue
+            
+            if self._LIST_ITEM.match(line):
+                flush_paragraph()
+                i = self._render_list(lines, i, out)
+                continue
+            
+            if self._QUOTE.match(line):
+                flush_paragraph()
+                quoted = []
+                while i < n and lines[i].strip():
+                    quote = self._QUOTE.match(lines[i])
+                    quoted.append(quote.group(1) if quote else lines[i])
+                    i += 1
+                out.append(f'<blockquote style="{BLOCKQUOTE_STYLE}">')
+                out.extend(self._render_blocks(quoted))
+                out.append('</blockquote>')
+                continue
+            
+            paragraph.append(stripped)
+            i += 1
+
+        flush_paragraph()
+        return out
+
+    def _render_table(self, lines, i, out):
+        header = self._split_row(lines[i])
+        aligns = []
+        for cell in self._split_row(lines[i + 1]):
+            if cell.startswith(':') and cell.endswith(':'):
+                aligns.append('center')
+            elif cell.endswith(':'):
+                aligns.append('right')
+            else:
+                aligns.append('left')
+        
+        def cell_style(base, col):
+            align = aligns[col] if col < len(aligns) else 'left'
+            return f'{base} text-align: {align};'
+        
+        out.append(f'<table style="{TABLE_STYLE}"><tr>')
+        for col, cell in enumerate(header):
+            out.append(f'<th style="{cell_style(TH_STYLE, col)}">{self._inline(cell)}</th>')
+        out.append('</tr>')
+        
+        i += 2
+        n = len(lines)
+        while i < n and lines[i].strip() and '|' in lines[i]:
+            out.append('<tr>')
+            cells = self._split_row(lines[i])
+            for col in range(len(header)):
+                cell = cells[col] if col < len(cells) else ''
+                out.append(f'<td style="{cell_style(TD_STYLE, col)}">{self._inline(cell)}</td>')
+            out.append('</tr>')
+            i += 1
+        out.append('</table>')
+        return i
+
+    def _render_list(self, lines, i, out):
+        # Girintiye göre iç içe listeler için (girinti, etiket) yığını
+        stack = []
+        n = len(lines)
+        while i < n:
+            line = lines[i]
+            item = self._LIST_ITEM.match(line)
+            if item is None:
+                # Girintili devam satırı son maddeye eklenir; boş satırdan sonra
+                # liste maddesiyle devam etmiyorsa liste biter
+                if line.strip() and line[:1] in ' \t' and stack:
+                    out.append(f'<br>{self._inline(line.strip())}')
+                    i += 1
+                    continue
+                if not line.strip() and i + 1 < n and self._LIST_ITEM.match(lines[i + 1]):
+                    i += 1
+                    continue
+                break
+            
+            indent = len(item.group(1).expandtabs(4))
+            tag = 'ul' if item.group(2) in '-*+' else 'ol'
+            while stack and indent < stack[-1][0]:
+                out.append(f'</li></{stack.pop()[1]}>')
+            if stack and indent == stack[-1][0] and tag != stack[-1][1]:
+                out.append(f'</li></{stack.pop()[1]}>')
+            if not stack or indent > stack[-1][0]:
+                stack.append((indent, tag))
+                out.append(f'<{tag}><li>')
+            else:
+                out.append('</li><li>')
+            out.append(self._inline(item.group(3)))
+            i += 1
+        while stack:
+            out.append(f'</li></{stack.pop()[1]}>')
+        return i
+
+class MarkdownBlockSplitter:
+    """Akan markdown metnini tamamlanmış bloklara ve açık kalan kuyruğa ayırır.
+
+    Bir blok; boş satırla biten paragraf/tablo/liste ya da kapanmış bir kod
+    bloğudur. Yalnızca tamamlanan bloklar HTML'e çevrilir, kuyruk düz metin kalır.
+    """
+    _FENCE = re.compile(r'^\s*(```|~~~)')
+    _LIST_ITEM = re.compile(r'^\s*([-*+]|\d+[.)])\s')
+
+    def __init__(self):
+        self.tail = ""
+        self._pos = 0
+        self._fence = None
+        self._has_content = False
+        self._blank_seen = False
+        self._in_list = False
+
+    def _cut(self, index):
+        block = self.tail[:index]
+        self.tail = self.tail[index:]
+        self._pos -= index
+        self._has_content = False
+        self._blank_seen = False
+        self._in_list = False
+        return block
+
+    def feed(self, text):
+        """Yeni metni ekler, bu sayede tamamlanan blokları döner."""
+        self.tail += text
+        blocks = []
+        while True:
+            newline = self.tail.find("\n", self._pos)
+            if newline == -1:
+                break
+            line_start = self._pos
+            line = self.tail[line_start:newline]
+            self._pos = newline + 1
+            
+            if self._fence is not None:
+                # Kod bloğu kapandıysa tek parça olarak tamamlanmış say
+                if line.strip().startswith(self._fence):
+                    self._fence = None
+                    blocks.append(self._cut(self._pos))
+                continue
+            
+            fence = self._FENCE.match(line)
+            if fence is not None:
+                if self._has_content:
+                    blocks.append(self._cut(line_start))
+                self._fence = fence.group(1)
+                self._has_content = True
+                continue
+            
+            if not line.strip():
+                if self._has_content:
+                    self._blank_seen = True
+                continue
+            
+            is_list_item = self._LIST_ITEM.match(line) is not None
+            if self._blank_seen:
+                # Boş satırla ayrılmış liste maddeleri aynı listede kalmalı
+                continues_list = self._in_list and (is_list_item or line[:1] in " \t")
+                if continues_list:
+                    self._blank_seen = False
+                else:
+                    blocks.append(self._cut(line_start))
+            self._has_content = True
+            self._in_list = self._in_list or is_list_item
+        return blocks
+
+    def flush(self):
+        """Kalan açık bloğu döner ve durumu sıfırlar."""
+        tail = self.tail
+        self.__init__()
+        return tail
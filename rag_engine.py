@@ -0,0 +1,1585 @@
+"""LmRag-Studio'nun Qt'den bağımsız çekirdeği.
+
+Vektör deposu erişimi, RAG araması, istem oluşturma ve LM Studio'dan akışlı
+yanıt alma burada yapılır; masaüstü arayüzü (lmRagStudio.py) bu motoru sarar.
+Ekran gerektirmediği için betiklerden, kıyaslamalardan ve sunucularda da
+kullanılabilir. Toplu soru yanıtlama için komut satırı:
+
+    python rag_engine.py sorular.jsonl yanitlar.jsonl --model <model> --concurrency 4
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+import threading
+import uuid
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Akış olaylarını çözmek için varsa daha hızlı orjson kullanılır
+try:
+    import orjson
+    json_loads = orjson.loads
+    HAVE_ORJSON = True
+except ImportError:
+    json_loads = json.loads
+    HAVE_ORJSON = False
+
+# RAG arama ayarları
+RAG_TOP_K = 3
+RAG_CACHE_SIZE = 256
+RAG_CACHE_TTL = 600  # saniye
+
+# Karma (BM25 + vektör) arama ayarları
+RAG_CANDIDATES_PER_RETRIEVER = 4  # her yöntemden top_k'nın bu katı aday alınır
+RAG_SEARCH_WORKERS = 4  # birden çok bilgi tabanı bu kadar iş parçacığında paralel aranır
+DEFAULT_KNOWLEDGE_BASE = "Genel"
+DEFAULT_COLLECTION = "rag_knowledge"
+RAG_MAX_DISTANCE = 0.8  # kosinüs uzaklığı (0-2); bunun üstündeki parçalar bağlama girmez
+RAG_MMR_LAMBDA = 0.7  # 1 = yalnızca alaka, 0 = yalnızca çeşitlilik
+RAG_DUPLICATE_SIMILARITY = 0.95  # seçilmiş bir parçaya bundan benzer adaylar hiç eklenmez
+RRF_K = 60
+BM25_K1 = 1.2
+BM25_B = 0.75
+# En az BM25_PRUNE_MIN_DOCS parçalık dizinlerde, parçaların bu oranından fazlasında
+# geçen terimler atlanır (IDF < log 2); küçük dizinlerde her terim puanlanır
+BM25_COMMON_TERM_RATIO = 0.5
+BM25_PRUNE_MIN_DOCS = 1000
+BM25_MAX_POSTINGS = 500  # terim başına okunan en fazla kayıt (sıklığı en yüksekler)
+
+# Modele gönderilen bağlamın token bütçesi (tahmini, ~4 karakter/token)
+CONTEXT_TOKEN_BUDGET = 4096
+CONTEXT_RECENT_MESSAGES = 6
+CONTEXT_SUMMARY_CHARS = 160
+# Geçmiş kullanıcı mesajlarıyla yeniden gönderilen RAG bağlamının üst sınırı
+# (karakter); 0 ise geçmiş bağlamlar hiç gönderilmez
+CONTEXT_HISTORY_CONTEXT_CHARS = 600
+CONTEXT_MESSAGE_OVERHEAD = 4
+# Geçmiş bu kadar mesajlık adımlarla kısaltılır; aradaki turlarda istemin başı
+# bayt bayt aynı kalır ve sunucunun önek (KV) önbelleği yeniden kullanılır
+CONTEXT_CUT_STEP = 8
+CONTEXT_SYSTEM_PROMPT = ("Sen yardımsever bir asistansın. Kullanıcının mesajında \"İlgili bilgiler\" "
+                         "bölümü varsa yanıtını öncelikle bu bilgilere dayandır.")
+
+# LM Studio bağlantı ayarları (saniye)
+LM_STUDIO_DEFAULT_URL = "http://localhost:1234"
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_FIRST_BYTE_TIMEOUT = 300  # uzun istemlerde ilk token geç gelebilir
+HTTP_STREAM_IDLE_TIMEOUT = 60
+HTTP_MAX_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_POOL_SIZE = 8
+
+# Yerel gömme modeli ayarları
+EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_MAX_LENGTH = 256
+EMBEDDING_CACHE_GROWTH = 4096  # önbellek dosyası bu kadar satırlık adımlarla büyür
+# Yerel model verilmediğinde koleksiyonlara yazılan model kimliği (Chroma varsayılanı)
+DEFAULT_EMBEDDING_MODEL_ID = "chroma-default"
+REEMBED_PAGE_SIZE = 500
+
+# İstek başına performans kayıtları (metrics.jsonl), bu boyutta döndürülür
+METRICS_MAX_BYTES = 1024 * 1024
+METRICS_BACKUPS = 3
+METRICS_SUMMARY_FIELDS = ("retrieval_ms", "vector_ms", "keyword_ms", "rerank_ms", "retrieved_chunks",
+                          "prompt_tokens", "ttft_ms", "tokens_per_sec", "generation_ms", "render_ms", "total_ms")
+
+class RagQueryCache:
+    """Normalize edilmiş sorgu ve n_results ile anahtarlanan LRU arama önbelleği.
+
+    Koleksiyon her değiştiğinde bump_version() çağrılır; eski sürümde
+    hesaplanan sonuçlar bir daha döndürülmez. Sorgu vektörleri ayrı bir LRU'da
+    (yine en fazla max_size) tutulur; koleksiyondan bağımsız oldukları için
+    sürüm artışında silinmez ve süreleri dolmaz.
+    """
+    _TRAILING_PUNCT = re.compile(r'[\s?!.,;:]+$')
+
+    def __init__(self, max_size=RAG_CACHE_SIZE, ttl=RAG_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.embedding_hits = 0
+        self._entries = OrderedDict()
+        self._embeddings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(max_size=settings.get("rag_cache_size"), ttl=settings.get("rag_cache_ttl"))
+
+    @classmethod
+    def normalize(cls, query):
+        return cls._TRAILING_PUNCT.sub('', " ".join(query.casefold().split()))
+
+    def get(self, query, n_results):
+        key = (self.normalize(query), n_results)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, stored_at, value = entry
+                if version == self.version and time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, query, n_results, value, version):
+        """Sonucu, sorgu başlarken okunan sürümle birlikte saklar."""
+        key = (self.normalize(query), n_results)
+        with self._lock:
+            # Arama sürerken koleksiyon değiştiyse sonuç zaten eskidir
+            if version != self.version:
+                return
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_embedding(self, query):
+        with self._lock:
+            vector = self._embeddings.get(query)
+            if vector is not None:
+                self._embeddings.move_to_end(query)
+                self.embedding_hits += 1
+            return vector
+
+    def put_embedding(self, query, vector):
+        with self._lock:
+            self._embeddings[query] = vector
+            self._embeddings.move_to_end(query)
+            while len(self._embeddings) > self.max_size:
+                self._embeddings.popitem(last=False)
+
+    def bump_version(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+def app_base_dir(base_dir=None):
+    """Ayarların (settings.json), RAG verilerinin ve sohbetlerin klasörü.
+
+    Sırasıyla verilen klasör, LMRAG_STUDIO_HOME ortam değişkeni ve programın
+    bulunduğu klasör kullanılır; arayüz ve toplu CLI aynı klasörü paylaşır.
+    """
+    return base_dir or os.environ.get("LMRAG_STUDIO_HOME") or os.path.dirname(os.path.abspath(__file__))
+
+class AppSettings:
+    """settings.json dosyasındaki kullanıcı ayarları; dosya atomik olarak yazılır."""
+    DEFAULTS = {
+        "lm_studio_url": LM_STUDIO_DEFAULT_URL,
+        "connect_timeout": HTTP_CONNECT_TIMEOUT,
+        "first_byte_timeout": HTTP_FIRST_BYTE_TIMEOUT,
+        "stream_idle_timeout": HTTP_STREAM_IDLE_TIMEOUT,
+        "max_retries": HTTP_MAX_RETRIES,
+        "context_token_budget": CONTEXT_TOKEN_BUDGET,
+        # Önek önbelleği için her turda bayt bayt aynı gönderilir
+        "system_prompt": CONTEXT_SYSTEM_PROMPT,
+        "rag_top_k": RAG_TOP_K,
+        "rag_max_distance": RAG_MAX_DISTANCE,
+        "rag_mmr_lambda": RAG_MMR_LAMBDA,
+        "rag_cache_size": RAG_CACHE_SIZE,
+        "rag_cache_ttl": RAG_CACHE_TTL,
+        # RAG sekmesinde düzenlenen ve yeni sohbetlere bağlanan bilgi tabanı
+        "knowledge_base": DEFAULT_KNOWLEDGE_BASE,
+        # Başlangıçta sunucu beklenmeden gösterilen son bilinen model listesi
+        "cached_models": [],
+        "last_model": "",
+        # Boşsa Chroma'nın varsayılan (ilk kullanımda indirilen) gömme modeli kullanılır
+        "embedding_model_path": "",
+        "embedding_batch_size": EMBEDDING_BATCH_SIZE,
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.values = dict(self.DEFAULTS)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ayar dosyası okunamadı: {e}")
+            return
+        if isinstance(data, dict):
+            self.values.update(data)
+
+    def get(self, key):
+        return self.values.get(key, self.DEFAULTS.get(key))
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.values, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Ayarlar kaydedilemedi: {e}")
+
+class LMStudioError(Exception):
+    """LM Studio isteği başarısız bir HTTP durumuyla döndüğünde yükseltilir."""
+
+class LMStudioClient:
+    """LM Studio için paylaşılan, iş parçacığı güvenli HTTP istemcisi.
+
+    Her iş parçacığı kendi Session nesnesini kullanır, ancak hepsi aynı
+    HTTPAdapter havuzunu paylaşır; böylece bağlantılar (keep-alive) yeniden
+    kullanılır. Bağlanma, ilk bayt ve akış sırasındaki boşta kalma için ayrı
+    zaman aşımları vardır. Bağlantı hataları yalnızca ilk token gelmeden önce,
+    sınırlı sayıda ve üstel beklemeyle yeniden denenir.
+    """
+
+    def __init__(self, base_url=LM_STUDIO_DEFAULT_URL, connect_timeout=HTTP_CONNECT_TIMEOUT,
+                 first_byte_timeout=HTTP_FIRST_BYTE_TIMEOUT, stream_idle_timeout=HTTP_STREAM_IDLE_TIMEOUT,
+                 max_retries=HTTP_MAX_RETRIES, backoff=HTTP_RETRY_BACKOFF, pool_size=HTTP_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.first_byte_timeout = first_byte_timeout
+        self.stream_idle_timeout = stream_idle_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._local = threading.local()
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        return cls(
+            settings.get("lm_studio_url"),
+            connect_timeout=settings.get("connect_timeout"),
+            first_byte_timeout=settings.get("first_byte_timeout"),
+            stream_idle_timeout=settings.get("stream_idle_timeout"),
+            max_retries=settings.get("max_retries"),
+            **kwargs
+        )
+
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, path, should_continue=None, **kwargs):
+        """İsteği gönderir; bağlantı hatalarında beklemeyle yeniden dener."""
+        attempt = 0
+        while True:
+            try:
+                return self.session().request(method, f"{self.base_url}{path}", **kwargs)
+            except requests.ConnectionError:
+                # Okuma zaman aşımı yeniden denenmez: model isteği zaten işliyor olabilir
+                if attempt >= self.max_retries or (should_continue is not None and not should_continue()):
+                    raise
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+
+    def list_models(self):
+        response = self.request("GET", "/v1/models",
+                                timeout=(self.connect_timeout, self.stream_idle_timeout))
+        response.raise_for_status()
+        return [model['id'] for model in response.json().get('data', [])]
+
+    def stream_chat(self, payload, should_continue=None):
+        """Akışlı sohbet isteğini açar; ilk token'a kadar ilk bayt zaman aşımı geçerlidir."""
+        return self.request("POST", "/v1/chat/completions", should_continue=should_continue,
+                            json=payload, stream=True,
+                            timeout=(self.connect_timeout, self.first_byte_timeout))
+
+    def set_idle_timeout(self, response):
+        """İlk token geldikten sonra okuma zaman aşımını boşta kalma süresine indirir."""
+        connection = getattr(response.raw, "connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            sock.settimeout(self.stream_idle_timeout)
+
+    @staticmethod
+    def release(response, stream=None):
+        """Yanıtın kalanını okuyup bağlantıyı havuza geri bırakır.
+
+        Akış yarıda bırakılan bir üreteçle okunuyorsa aynı üreteç tüketilmelidir;
+        yarım kalan üreteç kapatılırken urllib3 bağlantıyı da kapatır.
+        """
+        try:
+            for _ in (stream if stream is not None else response.iter_content(chunk_size=65536)):
+                pass
+        except requests.RequestException:
+            pass
+        response.close()
+
+class SSEParser:
+    """Bayt düzeyinde artımlı Server-Sent Events ayrıştırıcısı.
+
+    iter_content tamponlarını olduğu gibi alır; satırlar parça sınırlarında
+    bölünmüş olabilir. Bir olaydaki birden çok data: satırı "\n" ile birleştirilir,
+    diğer alanlar ve yorum satırları yok sayılır.
+    """
+
+    def __init__(self):
+        self._tail = b""
+        self._data = []
+
+    def feed(self, chunk):
+        """Tamamlanan olayların data yüklerini (bytes) liste olarak döndürür."""
+        lines = (self._tail + chunk).split(b"\n")
+        self._tail = lines.pop()
+        events = []
+        for line in lines:
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            if not line:
+                if self._data:
+                    events.append(self._data[0] if len(self._data) == 1 else b"\n".join(self._data))
+                    self._data = []
+            elif line.startswith(b"data:"):
+                self._data.append(line[6:] if line[5:6] == b" " else line[5:])
+        return events
+
+# Tek seçenekli olaylarda delta nesnesinin "content" dizgisi; delta içindeki
+# diğer alanların dizgileri (ör. "role") atlanır
+_DELTA_CONTENT = re.compile(rb'"delta":\s*\{(?:[^{}"]|"(?:[^"\\]|\\.)*")*?"content":\s*"((?:[^"\\]|\\.)*)"')
+
+def _content_json(data):
+    """Olayı tamamen çözer; choices[0].delta.content ya da None döndürür."""
+    try:
+        event = json_loads(data)
+    except ValueError:
+        return None
+    choices = event.get("choices") if isinstance(event, dict) else None
+    if choices:
+        return choices[0].get("delta", {}).get("content")
+    return None
+
+def _content_scan(data):
+    """orjson yokken hızlı yol: olayın tamamı yerine yalnızca içerik dizgisi çözülür.
+
+    json.loads her token olayındaki kimlik, model ve zaman alanlarını da
+    nesneye çevirir; bu, eski iter_lines döngüsünden bile yavaştır. Beklenen
+    biçime uymayan olaylar (birden çok seçenek, içeriksiz delta) tam çözülür.
+    """
+    start = data.find(b'"delta":')
+    if start != -1 and data.find(b'"delta":', start + 8) == -1:
+        match = _DELTA_CONTENT.match(data, start)
+        if match:
+            value = match.group(1)
+            if b"\\" not in value:
+                return value.decode("utf-8")
+            return json.loads(b'"' + value + b'"')
+    return _content_json(data)
+
+# orjson tüm olayı stdlib'in içerik taramasından da hızlı çözer: bench_sse_parse.py
+# medyanlarında token başına ~4,0 µs'ye karşı ~4,8 µs (tek ölçümler bunu gösteremeyecek kadar gürültülü)
+extract_sse_content = _content_json if HAVE_ORJSON else _content_scan
+
+def iter_sse_content(chunks, parser=None):
+    """OpenAI uyumlu akıştan içerik parçalarını üretir; [DONE] gelince durur."""
+    parser = parser or SSEParser()
+    for chunk in chunks:
+        for data in parser.feed(chunk):
+            if data == b"[DONE]":
+                return
+            content = extract_sse_content(data)
+            if content:
+                yield content
+
+class MetricsLog:
+    """İstek başına ölçümleri JSONL dosyasına ekler ve yüzdelik özetler üretir.
+
+    Dosya max_bytes'ı aşınca metrics.jsonl.1, .2 ... olarak döndürülür; en
+    fazla backups eski dosya tutulur. Özetler yalnızca bellekteki son kayıtlardan
+    hesaplanır, dosya yeniden okunmaz.
+    """
+
+    def __init__(self, path, max_bytes=METRICS_MAX_BYTES, backups=METRICS_BACKUPS, keep=1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.keep = keep
+        self.records = []
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Son keep kaydı, gerekirse döndürülmüş dosyalardan da okur."""
+        lines = []
+        for index in range(0, self.backups + 1):
+            path = f"{self.path}.{index}" if index else self.path
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines[:0] = f.readlines()
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                print(f"Ölçüm dosyası okunamadı: {e}")
+            if len(lines) >= self.keep:
+                break
+        for line in lines[-self.keep:]:
+            try:
+                self.records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    def rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def append(self, record):
+        with self._lock:
+            self.records.append(record)
+            del self.records[:-self.keep]
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    self.rotate()
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Ölçüm kaydedilemedi: {e}")
+
+    @staticmethod
+    def percentile(values, fraction):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def summary(self, fields=METRICS_SUMMARY_FIELDS):
+        """{alan: (adet, p50, p95)} döndürür; değeri olmayan alanlar atlanır."""
+        with self._lock:
+            records = list(self.records)
+        result = {}
+        for field in fields:
+            values = [record[field] for record in records if record.get(field) is not None]
+            if values:
+                result[field] = (len(values), self.percentile(values, 0.5), self.percentile(values, 0.95))
+        return result
+
+def estimate_tokens(text):
+    """Token sayısını kabaca tahmin eder (~4 karakter/token)."""
+    return (len(text) + 3) // 4
+
+class ContextBuilder:
+    """Sohbet geçmişinden token bütçesine sığan bir istem oluşturur.
+
+    Düzen her turda aynıdır: tek ve hiç değişmeyen sistem mesajı, varsa
+    kesim noktasında eski mesajların özeti (sabit bir kullanıcı/asistan
+    çifti olarak; katı sohbet şablonları ikinci bir sistem mesajını kabul
+    etmez), geçmiş ve en sonda RAG bağlamı ile soru. Son sorunun bağlamı
+    tam gönderilir; geçmiş kullanıcı mesajlarının "context" alanındaki
+    bağlam history_context_chars karakterle kesilerek yeniden gönderilir.
+    Arayan, gönderdiği bağlamı mesajın "context" alanına yazar.
+    Geçmiş her turda bir mesaj kaydırılmaz, cut_step'in katlarında kesilir.
+    Kesim noktası değişene kadar yeni istem, önceki istemle önceki sorunun
+    kısaltılan bağlamına kadar bayt bayt aynıdır ve LM Studio/llama.cpp önek
+    önbelleği o kısmı yeniden hesaplamaz. Kesim ilerlediğinde yalnızca sistem
+    istemi önbellekte kalır. Girdi listesi ve içindeki sözlükler hiçbir zaman
+    değiştirilmez.
+    """
+    ROLE_LABELS = {"user": "Kullanıcı", "assistant": "Asistan"}
+    SUMMARY_HEADER = "Önceki konuşmanın özeti:"
+    SUMMARY_ACK = "Anlaşıldı, konuşmaya bu özetle devam ediyorum."
+
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET, recent_messages=CONTEXT_RECENT_MESSAGES,
+                 summary_chars=CONTEXT_SUMMARY_CHARS, system_prompt=CONTEXT_SYSTEM_PROMPT,
+                 cut_step=CONTEXT_CUT_STEP, history_context_chars=CONTEXT_HISTORY_CONTEXT_CHARS):
+        self.budget = budget
+        self.recent_messages = recent_messages
+        self.summary_chars = summary_chars
+        self.system_prompt = system_prompt
+        self.cut_step = max(1, cut_step)
+        self.history_context_chars = max(0, history_context_chars)
+
+    @staticmethod
+    def message_tokens(message):
+        return estimate_tokens(message["content"]) + CONTEXT_MESSAGE_OVERHEAD
+
+    @staticmethod
+    def sent_message(message, rag_context=None, context_chars=None):
+        """Mesajın modele gönderilen biçimi.
+
+        rag_context verilmezse mesajın "context" alanı kullanılır; context_chars
+        verilirse bağlam bu uzunlukta kesilir (0 ise hiç eklenmez).
+        """
+        context = message.get("context") if rag_context is None else rag_context
+        if context and context_chars is not None and len(context) > context_chars:
+            context = context[:context_chars].rstrip() + "…" if context_chars else ""
+        content = message["content"]
+        if context:
+            content = f"İlgili bilgiler:\n{context}\n\nSoru: {content}"
+        return {"role": message["role"], "content": content}
+
+    def summary_line(self, message):
+        text = " ".join(message["content"].split())
+        if len(text) > self.summary_chars:
+            text = text[:self.summary_chars].rstrip() + "…"
+        return f"- {self.ROLE_LABELS.get(message['role'], message['role'])}: {text}"
+
+    def summarize(self, messages):
+        """Kesilen mesajların en yenilerinden bütçenin dörtte birine sığan özet satırları."""
+        lines = []
+        used = (estimate_tokens(self.SUMMARY_HEADER) + estimate_tokens(self.SUMMARY_ACK)
+                + 2 * CONTEXT_MESSAGE_OVERHEAD)
+        for message in reversed(messages):
+            line = self.summary_line(message)
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.budget // 4:
+                break
+            lines.append(line)
+            used += cost
+        lines.reverse()
+        return lines, (used if lines else 0)
+
+    def build(self, messages, rag_context=""):
+        """(gönderilecek mesajlar, tahmini token, özetlenen, atılan) döndürür."""
+        if not messages:
+            return [], 0, 0, 0
+        
+        # Son soru her zaman gönderilir; RAG bağlamı yalnızca gönderilen kopyaya eklenir
+        question = self.sent_message(messages[-1], rag_context)
+        fixed = self.message_tokens(question)
+        if self.system_prompt:
+            fixed += self.message_tokens({"content": self.system_prompt})
+        
+        # Özet düz metinden, bütçe gönderilecek biçimden (kısaltılmış RAG bağlamıyla) hesaplanır
+        plain = messages[:-1]
+        older = [self.sent_message(message, context_chars=self.history_context_chars)
+                 for message in plain]
+        costs = [self.message_tokens(message) for message in older]
+        # Kesim noktası cut_step'in katıdır: adet sınırından sonra en az
+        # recent_messages mesaj aynen kalır, bütçe aşılıyorsa bir adım daha kesilir
+        step = self.cut_step
+        cut = max(0, (len(older) - self.recent_messages) // step * step)
+        while True:
+            summary_lines, summary_used = self.summarize(plain[:cut])
+            used = fixed + sum(costs[cut:]) + summary_used
+            if used <= self.budget or cut >= len(older):
+                break
+            cut = min(len(older), cut + step)
+        if used > self.budget:
+            # Soru tek başına bütçeyi dolduruyor; özet de gönderilmez
+            summary_lines, used = [], fixed
+        
+        # Özet kesimle değişir; sistem isteminden sonra gelir ki önbellekteki önek
+        # korunsun. Kullanıcı/asistan çifti olduğundan rol sırası her şablonda geçerlidir
+        result = []
+        if self.system_prompt:
+            result.append({"role": "system", "content": self.system_prompt})
+        if summary_lines:
+            result.append({"role": "user",
+                           "content": self.SUMMARY_HEADER + "\n" + "\n".join(summary_lines)})
+            result.append({"role": "assistant", "content": self.SUMMARY_ACK})
+        result.extend(older[cut:])
+        result.append(question)
+        return result, used, len(summary_lines), cut - len(summary_lines)
+
+class EmbeddingCache:
+    """Metin içeriğinin SHA-256 özetiyle anahtarlanan kalıcı gömme önbelleği.
+
+    Vektörler bellek eşlemli (np.memmap) tek bir float32 dosyasında satır satır
+    tutulur, özet -> satır eşlemesi SQLite'tadır. Vektör önce dosyaya yazılıp
+    diske aktarılır, sonra dizine eklenir; yarım yazım hiçbir zaman okunmaz.
+    Her model kendi klasörünü kullanmalıdır.
+    """
+
+    def __init__(self, directory, growth=EMBEDDING_CACHE_GROWTH):
+        import numpy as np
+        self.np = np
+        self.directory = directory
+        self.growth = growth
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.dim = meta.get("dim")
+        self.count = meta.get("count", 0)
+        self._array = None
+        self._lock = threading.Lock()
+        if self.dim:
+            self._map(max(self.count, 1))
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _map(self, rows):
+        """Dosyayı en az rows satır alacak şekilde büyütüp yeniden eşler."""
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if size < rows * row_bytes:
+            capacity = (rows + self.growth - 1) // self.growth * self.growth
+            if self._array is not None:
+                self._array.flush()
+                self._array = None
+            with open(self.vectors_path, 'ab') as f:
+                f.truncate(capacity * row_bytes)
+            size = capacity * row_bytes
+        if self._array is None:
+            self._array = self.np.memmap(self.vectors_path, dtype=self.np.float32, mode='r+',
+                                         shape=(size // row_bytes, self.dim))
+
+    def get_many(self, texts):
+        """Her metin için önbellekteki vektörü ya da None döndürür."""
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            rows = {}
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows.update(self.conn.execute(
+                    f"SELECT hash, row FROM vectors WHERE hash IN ({','.join('?' * len(part))})", part))
+            return [self.np.array(self._array[rows[key]]) if key in rows else None for key in keys]
+
+    def put_many(self, texts, vectors):
+        vectors = self.np.asarray(vectors, dtype=self.np.float32)
+        if not len(texts):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (self.dim,))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Gömme boyutu önbellekle uyuşmuyor ({vectors.shape[1]} != {self.dim})")
+            start = self.count
+            self._map(start + len(texts))
+            self._array[start:start + len(texts)] = vectors
+            self._array.flush()
+            self.count = start + len(texts)
+            self.conn.executemany("INSERT OR IGNORE INTO vectors VALUES (?, ?)",
+                                  [(self.key(text), start + i) for i, text in enumerate(texts)])
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('count', ?)", (self.count,))
+            self.conn.commit()
+
+class LocalEmbeddingFunction:
+    """Yerel bir modelle, ağ erişimi olmadan gömme üreten Chroma gömme işlevi.
+
+    model_path bir ONNX dışa aktarımı (model.onnx + tokenizer.json) ise
+    onnxruntime ile, değilse sentence-transformers ile CPU'da çalıştırılır.
+    Metinler batch_size'lık gruplar halinde bir iş parçacığı havuzunda gömülür;
+    aynı içerik için vektör bir kez hesaplanır ve EmbeddingCache'te saklanır.
+    """
+
+    def __init__(self, model_path, cache_dir=None, batch_size=EMBEDDING_BATCH_SIZE, workers=None):
+        self.model_path = os.path.abspath(model_path)
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Gömme modeli bulunamadı: {self.model_path}")
+        # Koleksiyon metaverisine yazılır; model değişince koleksiyon yeniden gömülür
+        self.model_id = self.model_id_for(self.model_path)
+        self.batch_size = max(1, batch_size)
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self.cache = EmbeddingCache(cache_dir) if cache_dir else None
+        self.computed = 0
+        self.cache_hits = 0
+        self._encode = None
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def model_id_for(model_path):
+        """Model klasörünün adı ve tam yolunun kısa özeti (ör. "bge-small-1a2b3c4d")."""
+        model_path = os.path.abspath(model_path)
+        digest = hashlib.sha1(model_path.encode("utf-8")).hexdigest()[:8]
+        return f"{os.path.basename(model_path.rstrip(os.sep))}-{digest}"
+
+    @classmethod
+    def from_settings(cls, settings, data_dir):
+        """Ayarlarda yerel model yoksa None döner (Chroma varsayılanı kullanılır)."""
+        model_path = settings.get("embedding_model_path")
+        if not model_path:
+            return None
+        return cls(model_path, cache_dir=os.path.join(data_dir, "embedding_cache", cls.model_id_for(model_path)),
+                   batch_size=settings.get("embedding_batch_size"))
+
+    def _load(self):
+        with self._load_lock:
+            if self._encode is not None:
+                return self._encode
+            onnx_path = os.path.join(self.model_path, "model.onnx")
+            if os.path.isfile(onnx_path):
+                self._encode = self._load_onnx(onnx_path)
+            else:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.model_path, device="cpu")
+                self._encode = lambda texts: model.encode(texts, batch_size=len(texts),
+                                                          normalize_embeddings=True,
+                                                          convert_to_numpy=True)
+            return self._encode
+
+    def _load_onnx(self, onnx_path):
+        import numpy as np
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=EMBEDDING_MAX_LENGTH)
+        tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        options = onnxruntime.SessionOptions()
+        # Gruplar paralel çalıştığından her oturum çekirdeklerin bir payını kullanır
+        options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // self.workers)
+        session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        input_names = {item.name for item in session.get_inputs()}
+
+        def encode(texts):
+            encoded = tokenizer.encode_batch(texts)
+            input_ids = np.array([item.ids for item in encoded], dtype=np.int64)
+            attention_mask = np.array([item.attention_mask for item in encoded], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = session.run(None, feeds)[0]
+            # Dolgu hariç ortalama havuzlama, ardından L2 normalizasyonu
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+        return encode
+
+    def embed(self, texts):
+        """Önbellekte olmayan benzersiz metinleri gruplar halinde paralel gömer."""
+        vectors = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        self.cache_hits += len(texts) - sum(vector is None for vector in vectors)
+        if missing:
+            encode = self._load()
+            batches = [missing[start:start + self.batch_size]
+                       for start in range(0, len(missing), self.batch_size)]
+            computed = {}
+            for batch, result in zip(batches, self._pool.map(encode, batches)):
+                computed.update(zip(batch, result))
+                if self.cache is not None:
+                    self.cache.put_many(batch, result)
+            self.computed += len(missing)
+            vectors = [computed[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def __call__(self, input):
+        # Chroma bu imzayı (tek "input" parametresi) doğrular
+        return [[float(value) for value in vector] for vector in self.embed(list(input))]
+
+_TOKEN_RE = re.compile(r"\w+(?:[-_./:]\w+)*")
+
+def tokenize(text):
+    """Metni küçük harfli terimlere böler.
+
+    ERR-1042 ya da v2.3.1 gibi kodlar hem bütün olarak hem de parçalarıyla
+    dizinlenir; böylece tam kod ve parçaları ayrı ayrı aranabilir.
+    """
+    # casefold 'İ' harfini 'i' + birleşik nokta yapar ve kelimeyi böler
+    for match in _TOKEN_RE.finditer(text.replace("İ", "i").casefold()):
+        token = match.group()
+        yield token
+        if not token.isalnum():
+            yield from re.findall(r"\w+", token)
+
+class BM25Index:
+    """Parçalar üzerinde SQLite'ta tutulan, artımlı güncellenen BM25 ters dizini.
+
+    Terimler ve parçalar tamsayı kimliklerle saklanır; kayıt listeleri her
+    terim için terim sıklığına göre azalan sırada okunur ve en fazla
+    max_postings kayıtta kesilir. Nadir terimler (ürün kodu, hata kimliği)
+    böylece tam, çok yaygın terimler ise yaklaşık puanlanır ve arama süresi
+    koleksiyon boyutundan bağımsız kalır. Her parçanın (terim, sıklık) listesi
+    kendi satırında tutulduğu için silme yalnızca o parçanın kayıtlarına dokunur;
+    parça uzunluğu da kayıtlara yazılır, böylece arama docs tablosuna atlamaz.
+    """
+
+    def __init__(self, path, k1=BM25_K1, b=BM25_B, max_postings=BM25_MAX_POSTINGS,
+                 common_term_ratio=BM25_COMMON_TERM_RATIO, prune_min_docs=BM25_PRUNE_MIN_DOCS):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.common_term_ratio = common_term_ratio
+        self.prune_min_docs = prune_min_docs
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                doc INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE,
+                length INTEGER NOT NULL, terms BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term_id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE, df INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term_id INTEGER NOT NULL, tf INTEGER NOT NULL, doc INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (term_id, tf, doc)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self.conn.commit()
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.doc_count = meta.get("doc_count", 0)
+        self.total_length = meta.get("total_length", 0)
+
+    def _save_meta(self):
+        self.conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                              [("doc_count", self.doc_count), ("total_length", self.total_length)])
+
+    def _term_ids(self, terms):
+        """Terim -> term_id sözlüğü; SQLite parametre sınırı için parça parça sorgulanır."""
+        terms = list(terms)
+        found = {}
+        for start in range(0, len(terms), 500):
+            part = terms[start:start + 500]
+            found.update(self.conn.execute(
+                f"SELECT term, term_id FROM terms WHERE term IN ({','.join('?' * len(part))})", part))
+        return found
+
+    def _delete(self, ids):
+        for doc_id in ids:
+            row = self.conn.execute("SELECT doc, length, terms FROM docs WHERE id = ?", (doc_id,)).fetchone()
+            if row is None:
+                continue
+            doc, length, blob = row
+            pairs = array("q", blob)
+            entries = list(zip(pairs[::2], pairs[1::2]))
+            self.conn.executemany("DELETE FROM postings WHERE term_id = ? AND tf = ? AND doc = ?",
+                                  [(term_id, tf, doc) for term_id, tf in entries])
+            self.conn.executemany("UPDATE terms SET df = df - 1 WHERE term_id = ?",
+                                  [(term_id,) for term_id, _ in entries])
+            self.conn.execute("DELETE FROM docs WHERE doc = ?", (doc,))
+            self.doc_count -= 1
+            self.total_length -= length
+
+    def add(self, ids, documents):
+        with self._lock:
+            # Aynı kimlik yeniden eklenirse önce eskisi çıkarılır
+            self._delete(ids)
+            counted = [Counter(tokenize(document)) for document in documents]
+            df = Counter()
+            for counts in counted:
+                df.update(counts.keys())
+            self.conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, ?) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df", df.items())
+            term_ids = self._term_ids(df)
+
+            postings = []
+            for doc_id, counts in zip(ids, counted):
+                entries = [(term_ids[term], tf) for term, tf in counts.items()]
+                length = sum(counts.values())
+                blob = array("q", [value for entry in entries for value in entry]).tobytes()
+                doc = self.conn.execute("INSERT INTO docs (id, length, terms) VALUES (?, ?, ?)",
+                                        (doc_id, length, blob)).lastrowid
+                postings.extend((term_id, tf, doc, length) for term_id, tf in entries)
+                self.doc_count += 1
+                self.total_length += length
+            self.conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", postings)
+            self._save_meta()
+            self.conn.commit()
+
+    def delete(self, ids):
+        with self._lock:
+            self._delete(ids)
+            self.conn.execute("DELETE FROM terms WHERE df <= 0")
+            self._save_meta()
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.executescript("DELETE FROM docs; DELETE FROM postings; DELETE FROM terms;")
+            self.doc_count = 0
+            self.total_length = 0
+            self._save_meta()
+            self.conn.commit()
+
+    def count(self):
+        return self.doc_count
+
+    def search(self, query, n_results):
+        """En yüksek BM25 puanlı (kimlik, puan) çiftlerini döndürür."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            if not self.doc_count:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            found = sorted(self.conn.execute(
+                f"SELECT term_id, df FROM terms WHERE term IN ({placeholders}) AND df > 0",
+                tuple(terms)), key=lambda item: item[1])
+            if not found:
+                return []
+            if self.doc_count >= self.prune_min_docs:
+                # En nadir terim her zaman kullanılır; parçaların çoğunda geçen
+                # terimlerin IDF'si küçüktür ve okunmaları en pahalıdır
+                limit = self.doc_count * self.common_term_ratio
+                found = found[:1] + [item for item in found[1:] if item[1] <= limit]
+            average_length = self.total_length / self.doc_count
+            scores = {}
+            for term_id, df in found:
+                idf = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+                for doc, tf, length in self.conn.execute(
+                        "SELECT doc, tf, length FROM postings WHERE term_id = ? ORDER BY tf DESC LIMIT ?",
+                        (term_id, self.max_postings)):
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            best = heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+            names = dict(self.conn.execute(
+                f"SELECT doc, id FROM docs WHERE doc IN ({','.join('?' * len(best))})",
+                [doc for doc, _ in best]))
+        return [(names[doc], score) for doc, score in best]
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Kimlik listelerini 1 / (k + sıra) puanlarıyla birleştirir; puana göre sıralı (kimlik, puan) döner."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+def mmr_select(relevance, vectors, k, mmr_lambda=RAG_MMR_LAMBDA,
+               duplicate_similarity=RAG_DUPLICATE_SIMILARITY):
+    """Maksimum marjinal alaka ile en fazla k satırın indeksini seçer.
+
+    vectors birim uzunluklu satırlardan oluşur; benzerlik matrisi bir kez
+    hesaplanır ve her adımda seçilenlere en yüksek benzerlik güncellenir.
+    Seçilmiş bir satıra duplicate_similarity'den benzer olanlar elenir; bu
+    yüzden yalnızca tekrarlar kaldığında k'dan az satır dönebilir.
+    """
+    import numpy as np
+    count = len(relevance)
+    if count == 0 or k <= 0:
+        return []
+    similarity = vectors @ vectors.T
+    selected = [int(np.argmax(relevance))]
+    closest = similarity[selected[0]].copy()
+    available = closest < duplicate_similarity
+    available[selected[0]] = False
+    while len(selected) < k and available.any():
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * closest
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(closest, similarity[best], out=closest)
+        available &= closest < duplicate_similarity
+        available[best] = False
+    return selected
+
+def default_embedding_function():
+    """Koleksiyona işlev verilmediğinde Chroma'nın kullandığı gömme işlevi."""
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+def open_vector_store(data_dir):
+    """ChromaDB istemcisini açar; koleksiyonlar bilgi tabanı başına RagEngine'de açılır.
+
+    chromadb içe aktarması başlangıcın en pahalı adımlarından biridir; bu yüzden
+    modül yüklenirken değil, ilk kez gerektiğinde burada yapılır.
+    """
+    import chromadb
+    from chromadb.config import Settings
+    client = chromadb.Client(Settings(
+        anonymized_telemetry=False,
+        allow_reset=True,
+        persist_directory=data_dir,
+        is_persistent=True
+    ))
+    return client
+
+class KnowledgeBase:
+    """Adlandırılmış bir bilgi tabanı: bir Chroma koleksiyonu ve onun BM25 dizini.
+
+    Parçalar yalnızca add/delete üzerinden değiştirilmelidir; böylece iki
+    dizin birlikte güncel kalır.
+    """
+
+    def __init__(self, name, collection, keyword_index):
+        self.name = name
+        self.collection = collection
+        self.keyword_index = keyword_index
+
+    def sync_keyword_index(self, page_size=1000):
+        """BM25 dizini koleksiyonla uyuşmuyorsa (ör. eski sürümden gelen veri) yeniden kurar."""
+        if self.keyword_index.count() == self.collection.count():
+            return
+        self.keyword_index.clear()
+        offset = 0
+        while True:
+            page = self.collection.get(limit=page_size, offset=offset, include=["documents"])
+            if not page["ids"]:
+                break
+            self.keyword_index.add(page["ids"], page["documents"])
+            offset += len(page["ids"])
+
+    def add(self, documents, metadatas):
+        ids = [str(uuid.uuid4()) for _ in documents]
+        self.collection.add(documents=documents, ids=ids, metadatas=metadatas)
+        self.keyword_index.add(ids, documents)
+        return ids
+
+    def delete(self, ids=None, where=None):
+        if where is not None:
+            ids = self.collection.get(where=where, include=[])["ids"]
+        ids = list(ids or [])
+        if ids:
+            self.collection.delete(ids=ids)
+            self.keyword_index.delete(ids)
+        return len(ids)
+
+    def retrieve(self, query, query_vector, n_results):
+        """Vektör ve anahtar kelime adaylarını getirir.
+
+        (vektör kimlikleri, anahtar kelime kimlikleri, metinler, vektörler,
+        süreler) döndürür; anahtar kelimeyle bulunanların metni ve vektörü de
+        koleksiyondan alınır.
+        """
+        timings = {}
+        started = time.perf_counter()
+        results = self.collection.query(query_embeddings=[query_vector], n_results=n_results,
+                                        include=["documents", "embeddings"])
+        timings["vector_ms"] = (time.perf_counter() - started) * 1000
+        texts = {}
+        vectors = {}
+        vector_ids = []
+        if results['ids'] and results['ids'][0]:
+            vector_ids = results['ids'][0]
+            texts.update(zip(vector_ids, results['documents'][0]))
+            vectors.update(zip(vector_ids, results['embeddings'][0]))
+        
+        started = time.perf_counter()
+        keyword_ids = [doc_id for doc_id, _ in self.keyword_index.search(query, n_results)]
+        timings["keyword_ms"] = (time.perf_counter() - started) * 1000
+        
+        missing = [doc_id for doc_id in keyword_ids if doc_id not in texts]
+        if missing:
+            page = self.collection.get(ids=missing, include=["documents", "embeddings"])
+            texts.update(zip(page["ids"], page["documents"]))
+            vectors.update(zip(page["ids"], page["embeddings"]))
+        return vector_ids, keyword_ids, texts, vectors, timings
+
+class RagEngine:
+    """Arayüzden bağımsız RAG çekirdeği: arama, istem oluşturma ve akışlı yanıt.
+
+    Parçalar adlandırılmış bilgi tabanlarında tutulur; ad -> koleksiyon eşlemesi
+    veri klasöründeki knowledge_bases.json dosyasındadır. RAG sekmesi etkin
+    tabanı düzenler, her sohbet ise aramayı kendi bağlı tabanlarıyla sınırlar.
+    
+    Vektör deposu isteğe bağlıdır; açılmadıysa sorular RAG bağlamı olmadan
+    yanıtlanır. Arama her tabanda vektör benzerliği ile BM25 anahtar kelime
+    sonuçlarını paralel olarak getirir ve hepsini karşılıklı sıra
+    birleştirmesiyle (RRF) harmanlar; sorguya kosinüs uzaklığı max_distance'ı
+    aşan adaylar atılır, kalanlardan en fazla top_k tanesi MMR ile birbirinin
+    tekrarı olmayacak şekilde seçilir. Parçalar yalnızca
+    add_chunks/delete_chunks/reset_store üzerinden değiştirilmelidir; böylece
+    dizinler ve arama önbelleği birlikte güncel kalır. Metotlar iş
+    parçacıklarından aynı anda çağrılabilir.
+    """
+
+    def __init__(self, client, data_dir=None, top_k=RAG_TOP_K, cache=None, embedding_function=None,
+                 max_distance=RAG_MAX_DISTANCE, mmr_lambda=RAG_MMR_LAMBDA,
+                 system_prompt=CONTEXT_SYSTEM_PROMPT, active_base=DEFAULT_KNOWLEDGE_BASE):
+        self.client = client
+        self.system_prompt = system_prompt
+        self.data_dir = data_dir
+        self.top_k = top_k
+        self.max_distance = max_distance
+        self.mmr_lambda = mmr_lambda
+        self.cache = cache or RagQueryCache()
+        # None ise Chroma'nın varsayılan gömme işlevi kullanılır
+        self.embedding_function = embedding_function
+        self.query_embedder = None
+        self.chroma_client = None
+        self.active_base = active_base
+        # ad -> KnowledgeBase; ekleme sırası korunur
+        self.bases = {}
+        self._registry = {}
+        self._bases_lock = threading.Lock()
+        self._search_pool = ThreadPoolExecutor(max_workers=RAG_SEARCH_WORKERS)
+
+    @property
+    def collection(self):
+        """Etkin bilgi tabanının koleksiyonu; depo açılmadıysa None."""
+        base = self.bases.get(self.active_base)
+        return base.collection if base is not None else None
+
+    @property
+    def keyword_index(self):
+        base = self.bases.get(self.active_base)
+        return base.keyword_index if base is not None else None
+
+    @property
+    def registry_path(self):
+        return os.path.join(self.data_dir, "knowledge_bases.json")
+
+    @property
+    def embedding_model_id(self):
+        return getattr(self.embedding_function, "model_id", None) or DEFAULT_EMBEDDING_MODEL_ID
+
+    def _load_registry(self):
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                registry = json.load(f)
+        except FileNotFoundError:
+            registry = {}
+        # Tek koleksiyonlu eski veriler varsayılan taban olarak görünür
+        return registry or {DEFAULT_KNOWLEDGE_BASE: DEFAULT_COLLECTION}
+
+    def _save_registry(self):
+        tmp_path = self.registry_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._registry, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.registry_path)
+
+    def _create_collection(self, collection_name):
+        """Koleksiyonu açar; yoksa etkin gömme modelinin kimliğiyle oluşturur.
+
+        get_or_create_collection bazı Chroma sürümlerinde var olan koleksiyonun
+        metaverisinin üzerine yazdığı için kullanılmaz.
+        """
+        kwargs = {} if self.embedding_function is None else {"embedding_function": self.embedding_function}
+        # Chroma sürümüne göre list_collections adları ya da koleksiyon nesnelerini döner
+        names = {getattr(collection, "name", collection) for collection in self.chroma_client.list_collections()}
+        if collection_name in names:
+            return self.chroma_client.get_collection(collection_name, **kwargs)
+        return self.chroma_client.create_collection(
+            collection_name, metadata={"embedding_model": self.embedding_model_id}, **kwargs)
+
+    def _keyword_index_path(self, collection_name):
+        return os.path.join(self.data_dir, f"bm25-{collection_name}.sqlite3")
+
+    @staticmethod
+    def _remove_sqlite_files(path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    def _reembed_collection(self, name, collection_name, collection):
+        """Tabanın parçalarını etkin modelle yeni bir koleksiyona gömer.
+
+        Eski koleksiyon, kopya tamamlanıp kayıt dosyası yeni koleksiyonu
+        gösterene kadar silinmez; yarıda kalan bir kopya sonraki açılışta
+        baştan yapılır. Yerel modelde daha önce gömülmüş metinler
+        EmbeddingCache'ten gelir. (yeni koleksiyon adı, koleksiyon) döndürür.
+        """
+        new_name = f"kb-{uuid.uuid4().hex[:16]}"
+        target = self._create_collection(new_name)
+        total = collection.count()
+        print(f"'{name}' bilgi tabanı yeni gömme modeliyle ({self.embedding_model_id}) "
+              f"yeniden gömülüyor: {total} parça")
+        offset = 0
+        while True:
+            page = collection.get(limit=REEMBED_PAGE_SIZE, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            target.add(ids=page["ids"], documents=page["documents"], metadatas=page["metadatas"])
+            offset += len(page["ids"])
+        self._registry[name] = new_name
+        self._save_registry()
+        self.chroma_client.delete_collection(collection_name)
+        self._remove_sqlite_files(self._keyword_index_path(collection_name))
+        return new_name, target
+
+    def _open_base(self, name, collection_name):
+        collection = self._create_collection(collection_name)
+        model_id = (collection.metadata or {}).get("embedding_model")
+        if model_id is None:
+            # Model kimliği yazılmadan önce oluşturulan koleksiyonlar Chroma'nın
+            # varsayılan modeliyle gömülmüştür
+            model_id = DEFAULT_EMBEDDING_MODEL_ID if collection.count() else self.embedding_model_id
+            collection.modify(metadata={**(collection.metadata or {}), "embedding_model": model_id})
+        if model_id != self.embedding_model_id:
+            # Farklı modelin vektörleri ya boyut hatası verir ya da sessizce yanlış sonuç döndürür
+            collection_name, collection = self._reembed_collection(name, collection_name, collection)
+        keyword_index = BM25Index(self._keyword_index_path(collection_name))
+        base = KnowledgeBase(name, collection, keyword_index)
+        base.sync_keyword_index()
+        return base
+
+    def open_store(self):
+        """Vektör deposunu ve tüm bilgi tabanlarını açar; (istemci, etkin koleksiyon) döndürür.
+
+        Başka bir gömme modeliyle oluşturulmuş tabanlar açılırken etkin modelle
+        yeniden gömülür (bkz. _reembed_collection).
+        """
+        self.chroma_client = open_vector_store(self.data_dir)
+        # Sorgu vektörü bir kez hesaplanır; hem vektör araması hem eşik/MMR için kullanılır
+        self.query_embedder = self.embedding_function or default_embedding_function()
+        with self._bases_lock:
+            self._registry = self._load_registry()
+            self.bases = {name: self._open_base(name, collection_name)
+                          for name, collection_name in list(self._registry.items())}
+            if self.active_base not in self.bases:
+                self.active_base = next(iter(self.bases))
+        self.cache.bump_version()
+        return self.chroma_client, self.collection
+
+    def base_names(self):
+        return list(self.bases)
+
+    def base(self, name=None):
+        """Adı verilen (varsayılan: etkin) bilgi tabanı; yoksa KeyError."""
+        name = name or self.active_base
+        try:
+            return self.bases[name]
+        except KeyError:
+            raise KeyError(f"Bilgi tabanı bulunamadı: {name}") from None
+
+    def set_active_base(self, name):
+        self.base(name)
+        self.active_base = name
+
+    def create_base(self, name):
+        """Boş bir bilgi tabanı oluşturur; ad boşsa ya da kullanılıyorsa ValueError."""
+        name = " ".join(name.split())
+        if not name:
+            raise ValueError("Bilgi tabanı adı boş olamaz")
+        with self._bases_lock:
+            if name in self.bases:
+                raise ValueError(f"Bu adla bir bilgi tabanı zaten var: {name}")
+            # Chroma koleksiyon adları yalnızca ASCII kabul ettiği için ad ayrı tutulur
+            collection_name = f"kb-{uuid.uuid4().hex[:16]}"
+            self.bases[name] = self._open_base(name, collection_name)
+            self._registry[name] = collection_name
+            self._save_registry()
+        return self.bases[name]
+
+    def delete_base(self, name):
+        """Bilgi tabanını tüm parçalarıyla siler; son kalan taban silinemez."""
+        with self._bases_lock:
+            base = self.base(name)
+            if len(self.bases) == 1:
+                raise ValueError("Son bilgi tabanı silinemez; temizlemek için tüm bilgileri silin")
+            collection_name = self._registry.pop(name)
+            del self.bases[name]
+            self._save_registry()
+            self.chroma_client.delete_collection(collection_name)
+            base.keyword_index.conn.close()
+            self._remove_sqlite_files(base.keyword_index.path)
+            if self.active_base == name:
+                self.active_base = next(iter(self.bases))
+        self.cache.bump_version()
+
+    def add_chunks(self, documents, metadatas, base=None):
+        """Parçaları tabanın iki dizinine de ekler; verilen kimlikleri döndürür."""
+        ids = self.base(base).add(documents, metadatas)
+        self.cache.bump_version()
+        return ids
+
+    def delete_chunks(self, ids=None, where=None, base=None):
+        """Kimliğe ya da metaveri koşuluna göre siler; silinen parça sayısını döndürür."""
+        deleted = self.base(base).delete(ids, where)
+        if deleted:
+            self.cache.bump_version()
+        return deleted
+
+    def reset_store(self, base=None):
+        """Bilgi tabanının koleksiyonunu silip boş olarak yeniden oluşturur."""
+        knowledge_base = self.base(base)
+        collection_name = self._registry[knowledge_base.name]
+        self.chroma_client.delete_collection(collection_name)
+        knowledge_base.collection = self._create_collection(collection_name)
+        knowledge_base.keyword_index.clear()
+        self.cache.bump_version()
+
+    def search_documents(self, query, bases=None):
+        """Sorguya en yakın belgeleri liste olarak döner."""
+        return self.search_documents_timed(query, bases)[0]
+
+    def search_documents_timed(self, query, bases=None):
+        """(belgeler, süreler) döndürür.
+
+        bases aranacak bilgi tabanlarının adlarıdır (varsayılan: etkin taban);
+        artık var olmayan adlar yok sayılır. Tabanlar paralel aranır; süreler
+        sözlüğü vektör ve anahtar kelime aramasının (en yavaş tabana göre),
+        eşik/MMR seçiminin ms cinsinden gecikmesini, değerlendirilen aday ve
+        aranan taban sayısını içerir.
+
+        Sonuç önbellekten geldiyse süreler sözlüğü boştur. Hiçbir aday eşiği
+        geçemezse liste boştur ve soru RAG bağlamı olmadan yanıtlanır.
+        """
+        # Depo henüz açılmadıysa soru RAG bağlamı olmadan yanıtlanır
+        if bases is None:
+            bases = [self.active_base]
+        targets = [self.bases[name] for name in dict.fromkeys(bases) if name in self.bases]
+        if not targets:
+            return [], {}
+        # Ayarlar arayüzden değişebilir; arama boyunca aynı değerler kullanılır
+        top_k, max_distance, mmr_lambda = self.top_k, self.max_distance, self.mmr_lambda
+        params = (top_k, max_distance, mmr_lambda, tuple(sorted(base.name for base in targets)))
+        cached = self.cache.get(query, params)
+        if cached is not None:
+            return list(cached), {}
+        
+        version = self.cache.version
+        candidates = top_k * RAG_CANDIDATES_PER_RETRIEVER
+        timings = {}
+        try:
+            started = time.perf_counter()
+            # Eklemeler sonuç önbelleğini boşaltır; aynı soru yeniden gömülmez
+            query_vector = self.cache.get_embedding(query)
+            if query_vector is None:
+                query_vector = self.query_embedder([query])[0]
+                self.cache.put_embedding(query, query_vector)
+            embed_ms = (time.perf_counter() - started) * 1000
+            if len(targets) == 1:
+                results = [targets[0].retrieve(query, query_vector, candidates)]
+            else:
+                results = list(self._search_pool.map(
+                    lambda base: base.retrieve(query, query_vector, candidates), targets))
+            
+            rankings, texts, vectors = [], {}, {}
+            for vector_ids, keyword_ids, base_texts, base_vectors, _ in results:
+                rankings.extend((vector_ids, keyword_ids))
+                texts.update(base_texts)
+                vectors.update(base_vectors)
+            timings["vector_ms"] = round(embed_ms + max(result[4]["vector_ms"] for result in results), 2)
+            timings["keyword_ms"] = round(max(result[4]["keyword_ms"] for result in results), 2)
+            fused = [(doc_id, score) for doc_id, score in reciprocal_rank_fusion(rankings)
+                     if doc_id in vectors]
+            
+            started = time.perf_counter()
+            documents = self.select_documents(query_vector, fused, texts, vectors,
+                                              top_k, max_distance, mmr_lambda)
+            timings["rerank_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            timings["candidates"] = len(fused)
+            timings["bases"] = len(targets)
+            self.cache.put(query, params, tuple(documents), version)
+            return documents, timings
+        except Exception as e:
+            print(f"RAG arama hatası: {e}")
+            return [], timings
+
+    @staticmethod
+    def select_documents(query_vector, fused, texts, vectors, top_k, max_distance, mmr_lambda):
+        """Uzaklık eşiğini geçen adaylardan MMR ile top_k metin seçer.
+
+        Alaka puanı RRF puanının en yüksek puana oranıdır; böylece anahtar
+        kelime eşleşmeleri sıralamada ağırlığını korur, eşik ise yalnızca
+        anlamsal uzaklığa bakar.
+        """
+        import numpy as np
+        if not fused:
+            return []
+        matrix = np.asarray([vectors[doc_id] for doc_id, _ in fused], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        # Kopyalanır: sorgu vektörü önbellekteki dizinin kendisi olabilir
+        query = np.array(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+        keep = np.flatnonzero(1.0 - matrix @ query <= max_distance)
+        if not keep.size:
+            return []
+        relevance = np.asarray([fused[index][1] for index in keep], dtype=np.float32)
+        chosen = mmr_select(relevance / relevance.max(), matrix[keep], top_k, mmr_lambda)
+        return [texts[fused[keep[index]][0]] for index in chosen]
+
+    def search(self, query, bases=None):
+        return "\n\n".join(self.search_documents(query, bases))
+
+    def build_prompt(self, messages, rag_context="", budget=CONTEXT_TOKEN_BUDGET):
+        """ContextBuilder.build ile aynı dörtlüyü döndürür."""
+        return ContextBuilder(budget, system_prompt=self.system_prompt).build(messages, rag_context)
+
+    def stream_completion(self, model, messages, should_continue=None):
+        """Yanıtı parça parça üretir.
+
+        Üreteç sonuna kadar tüketilirse bağlantı havuza geri bırakılır; yarıda
+        kapatılırsa ve should_continue() artık False ise bağlantı kapatılır,
+        böylece LM Studio üretimi keser.
+        """
+        response = self.client.stream_chat(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": -1,
+                "stream": True
+            },
+            should_continue=should_continue
+        )
+        if response.status_code != 200:
+            response.close()
+            raise LMStudioError(f"Hata: {response.status_code}")
+        
+        stream = response.iter_content(chunk_size=None)
+        first = True
+        try:
+            for content in iter_sse_content(stream):
+                if first:
+                    self.client.set_idle_timeout(response)
+                    first = False
+                yield content
+        finally:
+            if should_continue is None or should_continue():
+                self.client.release(response, stream)
+            else:
+                response.close()
+
+    def answer(self, model, question, history=(), budget=CONTEXT_TOKEN_BUDGET, bases=None):
+        """Tek bir soruyu uçtan uca yanıtlar; yanıtı ve aşama sürelerini döndürür."""
+        started = time.perf_counter()
+        documents, search_timings = self.search_documents_timed(question, bases)
+        retrieved = time.perf_counter()
+        messages = [*history, {"role": "user", "content": question}]
+        messages_to_send, prompt_tokens, _, _ = self.build_prompt(
+            messages, "\n\n".join(documents), budget)
+        
+        # Parçalar listede toplanıp sonda birleştirilir
+        parts = []
+        first_token = None
+        for content in self.stream_completion(model, messages_to_send):
+            if first_token is None:
+                first_token = time.perf_counter()
+            parts.append(content)
+        finished = time.perf_counter()
+        
+        ms = lambda t: round((t - started) * 1000, 1) if t is not None else None
+        return {
+            "answer": "".join(parts),
+            "documents": len(documents),
+            "prompt_tokens": prompt_tokens,
+            "retrieval_ms": ms(retrieved),
+            **search_timings,
+            "first_token_ms": ms(first_token),
+            "latency_ms": ms(finished),
+        }
+
+def read_questions(path):
+    """JSONL dosyasından (kimlik, soru) çiftleri üretir.
+
+    Her satır {"id": ..., "question": ...} nesnesi ya da yalın bir JSON dizgisi
+    olabilir; kimlik verilmezse satır numarası kullanılır.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield number, record
+            else:
+                yield record.get("id", number), record["question"]
+
+def answer_batch(engine, model, questions, output, concurrency=4, budget=CONTEXT_TOKEN_BUDGET,
+                 bases=None):
+    """Soruları en fazla concurrency eşzamanlı istekle yanıtlar.
+
+    Sonuçlar tamamlandıkça output dosyasına JSONL olarak yazılır; bellekte en
+    fazla concurrency * 2 soru bekletilir. (yanıtlanan, hatalı) döndürür.
+    """
+    def run_one(question_id, question):
+        try:
+            return {"id": question_id, "question": question,
+                    **engine.answer(model, question, budget=budget, bases=bases)}
+        except Exception as e:
+            return {"id": question_id, "question": question, "error": str(e)}
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = set()
+        pending = iter(questions)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < concurrency * 2:
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                    break
+                in_flight.add(pool.submit(run_one, *item))
+            if not in_flight:
+                break
+            future = next(as_completed(in_flight))
+            in_flight.discard(future)
+            result = future.result()
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            done += 1
+            if "error" in result:
+                failed += 1
+    return done, failed
+
+def main(argv=None):
+    base_dir = app_base_dir()
+    parser = argparse.ArgumentParser(description="JSONL dosyasındaki soruları RAG ile toplu yanıtlar.")
+    parser.add_argument("questions", help="Soruları içeren JSONL dosyası")
+    parser.add_argument("output", help="Yanıtların yazılacağı JSONL dosyası ('-' = standart çıktı)")
+    parser.add_argument("--model", help="Kullanılacak model (varsayılan: sunucudaki ilk model)")
+    parser.add_argument("--url", help="LM Studio adresi (varsayılan: settings.json)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Eşzamanlı istek sayısı")
+    parser.add_argument("--top-k", type=int, help="Soru başına en fazla getirilecek belge sayısı (varsayılan: settings.json)")
+    parser.add_argument("--max-distance", type=float,
+                        help="Bağlama girecek parçaların en fazla kosinüs uzaklığı (varsayılan: settings.json)")
+    parser.add_argument("--mmr-lambda", type=float,
+                        help="MMR dengesi: 1 = yalnızca alaka, 0 = yalnızca çeşitlilik (varsayılan: settings.json)")
+    parser.add_argument("--budget", type=int, help="İstem token bütçesi (varsayılan: settings.json)")
+    parser.add_argument("--data-dir", default=os.path.join(base_dir, "rag_data"), help="Vektör deposu klasörü")
+    parser.add_argument("--no-rag", action="store_true", help="Vektör deposunu açmadan yanıtla")
+    parser.add_argument("--kb", action="append",
+                        help="Aranacak bilgi tabanı (birden çok verilebilir; varsayılan: settings.json'daki etkin taban)")
+    parser.add_argument("--embedding-model", help="Yerel gömme modeli klasörü (varsayılan: settings.json)")
+    args = parser.parse_args(argv)
+
+    settings = AppSettings(os.path.join(base_dir, "settings.json"))
+    if args.url:
+        settings.set("lm_studio_url", args.url)
+    if args.embedding_model:
+        settings.set("embedding_model_path", args.embedding_model)
+    # Her eşzamanlı istek havuzdan kendi bağlantısını alabilsin
+    client = LMStudioClient.from_settings(settings, pool_size=max(HTTP_POOL_SIZE, args.concurrency))
+    engine = RagEngine(
+        client, args.data_dir,
+        top_k=args.top_k if args.top_k is not None else settings.get("rag_top_k"),
+        max_distance=args.max_distance if args.max_distance is not None else settings.get("rag_max_distance"),
+        mmr_lambda=args.mmr_lambda if args.mmr_lambda is not None else settings.get("rag_mmr_lambda"),
+        cache=RagQueryCache.from_settings(settings),
+        system_prompt=settings.get("system_prompt"),
+        active_base=settings.get("knowledge_base"))
+    if not args.no_rag:
+        engine.embedding_function = LocalEmbeddingFunction.from_settings(settings, args.data_dir)
+        engine.open_store()
+
+    model = args.model or settings.get("last_model")
+    if not model:
+        models = client.list_models()
+        if not models:
+            parser.error("LM Studio'da yüklü model bulunamadı; --model ile belirtin")
+        model = models[0]
+    budget = args.budget or settings.get("context_token_budget")
+
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    started = time.perf_counter()
+    try:
+        done, failed = answer_batch(engine, model, read_questions(args.questions), output,
+                                    concurrency=max(1, args.concurrency), budget=budget,
+                                    bases=args.kb)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"{done} soru yanıtlandı ({failed} hatalı) · {elapsed:.1f} sn · model: {model}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
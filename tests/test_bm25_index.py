@@ -0,0 +1,37 @@
+"""BM25Index anahtar kelime araması testleri."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_engine import BM25Index
+
+
+def make_index(tmp_path, documents):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index.add([f"doc-{number}" for number in range(len(documents))], documents)
+    return index
+
+
+def test_multi_term_query_returns_every_matching_document(tmp_path):
+    index = make_index(tmp_path, [
+        "ERR-1042 hatası disk dolduğunda görülür",
+        "ZX-9 modelinin kurulum adımları",
+        "ağ ayarları nasıl değiştirilir",
+        "bellek kullanımı raporu",
+    ])
+    ids = {doc_id for doc_id, _ in index.search("ERR-1042 ZX-9", 10)}
+    assert ids == {"doc-0", "doc-1"}
+
+
+def test_common_terms_are_scored_in_small_indexes(tmp_path):
+    index = make_index(tmp_path, ["disk ayarı", "disk raporu", "disk ZX-9", "ağ ayarı"])
+    ids = [doc_id for doc_id, _ in index.search("disk ayarı", 10)]
+    assert ids[0] == "doc-0"
+    assert set(ids) == {"doc-0", "doc-1", "doc-2", "doc-3"}
+
+
+def test_deleted_documents_are_not_returned(tmp_path):
+    index = make_index(tmp_path, ["ERR-1042 hatası", "ZX-9 kurulumu"])
+    index.delete(["doc-0"])
+    assert [doc_id for doc_id, _ in index.search("ERR-1042 ZX-9", 10)] == ["doc-1"]
@@ -0,0 +1,38 @@
+"""MarkdownRenderer satır içi biçimlendirme testleri."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdown_render import MarkdownRenderer
+
+
+def test_link_url_with_balanced_parentheses():
+    html = MarkdownRenderer().render("Bkz. [Merkür](https://en.wikipedia.org/wiki/Mercury_(planet)) gezegeni")
+    assert 'href="https://en.wikipedia.org/wiki/Mercury_(planet)"' in html
+    assert "</a> gezegeni" in html
+
+
+def test_link_followed_by_parenthesized_text():
+    html = MarkdownRenderer().render("[belge](https://example.com/a) (eski sürüm)")
+    assert 'href="https://example.com/a"' in html
+    assert "</a> (eski sürüm)" in html
+
+
+def test_nested_emphasis():
+    html = MarkdownRenderer().render("**kalın *italik* metin** ve _alt çizgi_ ile `k*o*d`")
+    assert "<b>kalın <i>italik</i> metin</b>" in html
+    assert "<i>alt çizgi</i>" in html
+    assert ">k*o*d</code>" in html
+
+
+def test_unmatched_markers_stay_literal_and_linear():
+    renderer = MarkdownRenderer(cache_size=0)
+    assert renderer.render("2 * 3 ve a_b ile [yarım") == "<p>2 * 3 ve a_b ile [yarım</p>"
+    # Eski düzenli ifade bu girdide karesel geri izleme yapıyordu (saniyeler sürerdi)
+    text = "*a _b [c " * 20000
+    started = time.perf_counter()
+    html = renderer.render(text)
+    assert time.perf_counter() - started < 1.0
+    assert "<i>" not in html
@@ -0,0 +1,20 @@
+"""RagEngine.select_documents testleri."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_engine import RagEngine
+
+
+def test_select_documents_leaves_query_vector_unchanged():
+    # Önbellekten gelen sorgu vektörü float32 dizidir; normalize edilirken değişmemeli
+    query = np.array([3.0, 4.0], dtype=np.float32)
+    fused = [("a", 1.0), ("b", 0.5)]
+    texts = {"a": "birinci", "b": "ikinci"}
+    vectors = {"a": [3.0, 4.0], "b": [4.0, -3.0]}
+    for _ in range(2):
+        assert RagEngine.select_documents(query, fused, texts, vectors, 2, 1.0, 1.0) == ["birinci", "ikinci"]
+    assert query.tolist() == [3.0, 4.0]